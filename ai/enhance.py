@@ -5,21 +5,13 @@ import sys
 import dotenv
 import argparse
 
-import langchain_core.exceptions
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import (
-  ChatPromptTemplate,
-  SystemMessagePromptTemplate,
-  HumanMessagePromptTemplate,
-)
-from structure import Structure
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ai.router import ModelRouter, RoutingExhausted
+from ai.fake_backend import FakeBackend
 
 if os.path.exists('.env'):
     dotenv.load_dotenv()
 
-template = open("template.txt", "r").read()
-system = open("system.txt", "r").read()
-
 def parse_args():
     """解析命令行參數"""
     parser = argparse.ArgumentParser()
@@ -28,6 +20,11 @@ def parse_args():
 
 def main():
     args = parse_args()
+
+    # LangChain 與 Gemini SDK 載入需要約一秒，解析完參數才匯入（--help 不必付出成本）
+    import langchain_core.exceptions
+    import pydantic
+    from structure import Structure
     model_name = os.environ.get("MODEL_NAME", 'gemini-2.0-flash-exp')
     language = os.environ.get("LANGUAGE", 'English')
 
@@ -47,28 +44,66 @@ def main():
 
     print('Open:', args.data, file=sys.stderr)
 
-    # 使用 Google Gemini 模型
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        google_api_key=os.environ.get("GOOGLE_API_KEY")
-    ).with_structured_output(Structure, method="function_calling")
-    
-    print('Connect to:', model_name, file=sys.stderr)
-    prompt_template = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(system),
-        HumanMessagePromptTemplate.from_template(template=template)
-    ])
+    # 便宜優先的分層路由：解析或驗證失敗時才升級到較強的模型
+    router = ModelRouter.from_env(
+        model_name,
+        escalate_on=(langchain_core.exceptions.OutputParserException, pydantic.ValidationError)
+    )
+    print('Model tiers:', ' -> '.join(router.tiers), file=sys.stderr)
 
-    chain = prompt_template | llm
+    if os.environ.get("AI_BACKEND", "gemini") == "fake":
+        # 離線假後端，不呼叫任何 API
+        backend = FakeBackend.from_env(error_cls=langchain_core.exceptions.OutputParserException)
 
-    for idx, d in enumerate(data):
-        try:
-            response: Structure = chain.invoke({
+        def invoke(model, content):
+            return Structure(**backend.structured(model, content))
+    else:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from langchain.prompts import (
+            ChatPromptTemplate,
+            SystemMessagePromptTemplate,
+            HumanMessagePromptTemplate,
+        )
+
+        with open("template.txt", "r") as f:
+            template = f.read()
+        with open("system.txt", "r") as f:
+            system = f.read()
+        prompt_template = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(system),
+            HumanMessagePromptTemplate.from_template(template=template)
+        ])
+        chains = {}
+
+        def invoke(model, content):
+            if model not in chains:
+                # 使用 Google Gemini 模型
+                llm = ChatGoogleGenerativeAI(
+                    model=model,
+                    google_api_key=os.environ.get("GOOGLE_API_KEY")
+                ).with_structured_output(Structure, method="function_calling")
+                chains[model] = prompt_template | llm
+                print('Connect to:', model, file=sys.stderr)
+            return chains[model].invoke({
                 "language": language,
-                "content": d['summary']
+                "content": content
             })
+
+    def is_valid(response):
+        return isinstance(response, Structure) and all(
+            value.strip() for value in response.model_dump().values()
+        )
+
+    for idx, d in enumerate(data):
+        try:
+            response: Structure = router.route(
+                d['id'],
+                d['summary'],
+                lambda model: invoke(model, d['summary']),
+                validate=is_valid
+            )
             d['AI'] = response.model_dump()
-        except langchain_core.exceptions.OutputParserException as e:
+        except RoutingExhausted as e:
             print(f"{d['id']} has an error: {e}", file=sys.stderr)
             d['AI'] = {
                  "tldr": "Error",
@@ -92,5 +127,9 @@ def main():
 
         print(f"Finished {idx+1}/{len(data)}", file=sys.stderr)
 
+    routing_log = args.data.replace('.jsonl', f'_routing_{language}.jsonl')
+    router.write_log(routing_log)
+    print('Routing summary:', json.dumps(router.summary()), file=sys.stderr)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+ReportGenerator 渲染效能測試
+以 1,000 篇合成論文比較串流寫檔與一次性 render() 的耗時與峰值記憶體
+
+使用方式（於專案根目錄）:
+    python benchmarks/bench_report_generator.py --papers 1000 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root / "benchmarks"))
+
+from generator.report_generator import ReportGenerator
+from synthetic import make_papers
+
+
+def measure(fn, repeat: int):
+    """回傳 (最佳耗時, 峰值記憶體)；耗時與記憶體分開量測，避免 tracemalloc 影響計時"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache_dir = tmp / "jinja2"
+
+        start = time.perf_counter()
+        generator = ReportGenerator(cache_dir=cache_dir)
+        print(f"首次載入範本（編譯並寫入 bytecode 快取）: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        from generator import report_generator
+        report_generator._environments.clear()
+        start = time.perf_counter()
+        generator = ReportGenerator(cache_dir=cache_dir)
+        print(f"新環境載入範本（讀取 bytecode 快取）: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        stats = generator._extract_statistics(papers)
+        data = {'date': '2025-06-10', 'papers': papers, 'generation_time': '2025-06-10 00:00:00', **stats}
+
+        def render_string():
+            content = generator.template.render(**data)
+            (tmp / "string.md").write_text(content, encoding='utf-8')
+
+        def render_stream():
+            generator.generate_report(papers, tmp / "stream.md", '2025-06-10')
+
+        for label, fn in (("render() 一次性字串", render_string), ("generate() 串流寫檔", render_stream)):
+            best, peak = measure(fn, args.repeat)
+            print(f"{label}: 最佳 {best * 1000:.1f} ms, 峰值記憶體 {peak / 1024 / 1024:.2f} MiB")
+
+        size = (tmp / "stream.md").stat().st_size
+        print(f"報告大小: {size / 1024:.0f} KiB（{args.papers} 篇論文）")
+
+
+if __name__ == "__main__":
+    main()
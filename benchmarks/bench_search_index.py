@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+靜態搜尋索引效能測試
+以合成的多日歷史建立分片索引，量測增量建立耗時、索引大小與查詢延遲（冷快取與熱快取）
+
+使用方式（於專案根目錄）:
+    python benchmarks/bench_search_index.py --days 180 --papers 300
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root / "benchmarks"))
+
+from synthetic import make_papers
+from generator.search_index import SearchIndex, SearchIndexBuilder
+
+QUERIES = ["diffusion", "graph policy", "efficient sparse transformer", "author 42", "retr"]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--papers", type=int, default=300, help="每日論文數")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = Path(tmp) / "search"
+        builder = SearchIndexBuilder(index_dir)
+        first_day = date(2025, 1, 1)
+        day_times = []
+        for d in range(args.days):
+            papers = make_papers(args.papers, seed=d)
+            for i, paper in enumerate(papers):
+                paper['id'] = f"{d:04d}.{i:05d}"
+            start = time.perf_counter()
+            builder.add_day((first_day + timedelta(days=d)).isoformat(), papers)
+            day_times.append(time.perf_counter() - start)
+
+        files = list(index_dir.rglob("*.json"))
+        sizes = [f.stat().st_size for f in files]
+        print(f"索引: {args.days * args.papers} 篇論文, {len(files)} 個檔案, "
+              f"共 {sum(sizes) / 1024 / 1024:.1f} MiB, 最大分片 {max(sizes) / 1024:.0f} KiB")
+        print(f"增量加入一天: 中位數 {percentile(day_times, 0.5) * 1000:.1f} ms, "
+              f"最後一天 {day_times[-1] * 1000:.1f} ms")
+
+        for query in QUERIES:
+            index = SearchIndex(index_dir)
+            start = time.perf_counter()
+            results = index.query(query)
+            cold = time.perf_counter() - start
+            loaded = index.bytes_loaded
+
+            warm = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                index.query(query)
+                warm.append(time.perf_counter() - start)
+            print(f"查詢 {query!r}: {len(results)} 筆, 冷快取 {cold * 1000:.1f} ms "
+                  f"（下載 {loaded / 1024:.0f} KiB）, 熱快取 p50 {percentile(warm, 0.5) * 1000:.2f} ms "
+                  f"p99 {percentile(warm, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
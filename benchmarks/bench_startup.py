@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+命令列啟動時間測試
+在子程序中執行各個進入點，量測牆鐘時間並以 `-X importtime` 列出最耗時的匯入；
+任一進入點的中位數超過預算時回傳 1（可放在 CI 中）
+
+`main-dry-run` 與沒有新論文、所有階段都沿用快取的執行走相同的路徑（載入設定、計算階段指紋），
+是短時間內大量觸發執行時的主要成本。
+
+使用方式（於專案根目錄）:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --only main-dry-run --imports 30
+    python benchmarks/bench_startup.py --scale 2 --output /tmp/startup.json   # 較慢的機器放寬預算
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+project_root = Path(__file__).parent.parent
+
+# 名稱 → 指令、工作目錄與預算（秒）
+TARGETS: Dict[str, Dict] = {
+    'main-help': {'argv': ["src/main.py", "--help"], 'budget': 0.25},
+    'main-dry-run': {'argv': ["src/main.py", "--dry-run"], 'budget': 0.3},
+    'enhance-help': {'argv': ["enhance.py", "--help"], 'cwd': "ai", 'budget': 0.25},
+    'convert-help': {'argv': ["to_md/convert.py", "--help"], 'budget': 0.25},
+    'multi-format-help': {'argv': ["-m", "generator.multi_format", "--help"], 'budget': 0.25},
+    'search-index-help': {'argv': ["-m", "generator.search_index", "--help"], 'budget': 0.25},
+}
+
+# 直譯器啟動時的匯入，與進入點無關
+INTERPRETER_IMPORTS = {'site', 'encodings', 'codecs', 'io', 'abc', 'zipimport', '_frozen_importlib_external'}
+
+
+def _run(target: Dict, extra: Optional[List[str]] = None) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = str(project_root / "src")
+    env.setdefault('CUSTOM_DATE', '2025-06-10')
+    return subprocess.run(
+        [sys.executable, *(extra or []), *target['argv']],
+        cwd=project_root / target.get('cwd', '.'),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+def time_target(target: Dict, repeat: int) -> List[float]:
+    """量測 repeat 次的牆鐘時間（秒），失敗時拋出 RuntimeError"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = _run(target)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return timings
+
+
+def import_breakdown(target: Dict, top: int) -> List[Dict]:
+    """
+    以 -X importtime 取得累計耗時最多的頂層匯入（由進入點直接觸發；不含直譯器啟動的 site）
+
+    Returns:
+        [{'module', 'self_us', 'cumulative_us'}]，依累計耗時由多到少排序
+    """
+    result = _run(target, ["-X", "importtime"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        module = parts[2].rstrip()
+        depth = (len(module) - len(module.lstrip())) // 2
+        if depth or module.strip() in INTERPRETER_IMPORTS:
+            continue
+        rows.append({
+            'module': module.strip(),
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+        })
+    rows.sort(key=lambda r: r['cumulative_us'], reverse=True)
+    return rows[:top]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="命令列啟動時間測試")
+    parser.add_argument("--only", help="以逗號分隔的進入點：" + ",".join(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=15, help="每個進入點列出的匯入數量（0 表示不列出）")
+    parser.add_argument("--scale", type=float, default=1.0, help="預算倍數")
+    parser.add_argument("--output", type=Path, help="結果 JSON 檔案")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(TARGETS)
+    unknown = [n for n in names if n not in TARGETS]
+    if unknown:
+        parser.error(f"未知的進入點: {', '.join(unknown)}")
+
+    results = {}
+    over_budget = []
+    for name in names:
+        target = TARGETS[name]
+        budget = target['budget'] * args.scale
+        try:
+            timings = time_target(target, args.repeat)
+        except RuntimeError as e:
+            print(f"❌ {name}: 執行失敗: {e}")
+            over_budget.append(name)
+            results[name] = {'error': str(e)}
+            continue
+        median = statistics.median(timings)
+        ok = median <= budget
+        if not ok:
+            over_budget.append(name)
+        print(f"{'✅' if ok else '❌'} {name:<18} 中位數 {median * 1000:7.1f} ms  "
+              f"最佳 {min(timings) * 1000:7.1f} ms  預算 {budget * 1000:.0f} ms")
+        results[name] = {
+            'median_seconds': round(median, 4),
+            'best_seconds': round(min(timings), 4),
+            'budget_seconds': budget,
+        }
+        if args.imports:
+            breakdown = import_breakdown(target, args.imports)
+            results[name]['imports'] = breakdown
+            for row in breakdown:
+                print(f"    {row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if over_budget:
+        print(f"❌ 超過啟動預算: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
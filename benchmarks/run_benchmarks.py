@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+熱點路徑效能測試套件
+以 synthetic.py 產生的資料量測爬蟲解析、關鍵字過濾、數量限制、BM25 排序、ArxivSpider.parse、
+convert.py 與 ReportGenerator.generate_report 的耗時，結果存成 JSON；
+指定基準檔時任一路徑變慢超過門檻、或超過該路徑的耗時預算即回傳 1（可放在 CI 中）
+
+使用方式（於專案根目錄）:
+    python benchmarks/run_benchmarks.py --papers 1000 --output benchmarks/results/latest.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/baseline.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --only parse_entries,convert
+    python benchmarks/run_benchmarks.py compare old.json new.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --papers 10000 --only bm25_rank --baseline old.json --scale 2   # 較慢的機器放寬預算
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import statistics
+import tempfile
+import importlib.util
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root / "benchmarks"))
+sys.path.insert(0, str(project_root))
+
+from synthetic import make_atom_feed, make_enhanced_jsonl, make_list_new_html, make_papers
+
+RESULTS_VERSION = 1
+CATEGORIES = ['cs.AI', 'cs.LG', 'cs.CV', 'cs.CL']
+
+# 名稱 → (準備函數, 需要的選用套件)；準備函數回傳 (被量測的函數, 每次處理的項目數)
+BENCHMARKS: Dict[str, Tuple[Callable[[int, Path], Tuple[Callable, int]], Optional[str]]] = {}
+# 名稱 → (固定秒數, 每篇秒數)：最佳耗時的上限為 固定秒數 + 每篇秒數 × 論文數
+BUDGETS: Dict[str, Tuple[float, float]] = {}
+
+
+def benchmark(name: str, requires: Optional[str] = None, budget: Optional[Tuple[float, float]] = None):
+    """註冊效能測試；requires 的套件未安裝時略過，budget 為 (固定秒數, 每篇秒數) 的耗時預算"""
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, requires)
+        if budget is not None:
+            BUDGETS[name] = budget
+        return setup
+    return decorator
+
+
+def budget_seconds(name: str, items: int) -> Optional[float]:
+    """處理 items 篇論文的耗時預算（沒有預算時為 None）"""
+    if name not in BUDGETS:
+        return None
+    fixed, per_item = BUDGETS[name]
+    return round(fixed + per_item * items, 6)
+
+
+def _crawler(**config):
+    from crawler.arxiv_crawler import ArxivCrawler
+    return ArxivCrawler({'categories': CATEGORIES, **config})
+
+
+def _parsed_papers(n: int) -> List[Dict]:
+    crawler = _crawler()
+    root = ET.fromstring(make_atom_feed(n))
+    return [crawler._parse_paper_entry(e) for e in root.findall('{http://www.w3.org/2005/Atom}entry')]
+
+
+@benchmark("parse_entries")
+def bench_parse_entries(n: int, tmp: Path):
+    """ArxivCrawler._parse_paper_entry：已解析的 XML 元素 → 論文字典"""
+    crawler = _crawler()
+    entries = ET.fromstring(make_atom_feed(n)).findall('{http://www.w3.org/2005/Atom}entry')
+    return (lambda: [crawler._parse_paper_entry(e) for e in entries]), n
+
+
+@benchmark("search_papers")
+def bench_search_papers(n: int, tmp: Path):
+    """ArxivCrawler._search_papers：API 回應位元組 → 論文列表（不含網路與限速等待）"""
+    crawler = _crawler()
+    response = mock.Mock(content=make_atom_feed(n))
+    crawler.session = mock.Mock(get=mock.Mock(return_value=response))
+
+    def run():
+        with mock.patch('crawler.arxiv_crawler.time.sleep'):
+            papers = crawler._search_papers("cat:cs.AI", max_results=n)
+        assert len(papers) == n
+    return run, n
+
+
+@benchmark("filter_keywords")
+def bench_filter_keywords(n: int, tmp: Path):
+    """ArxivCrawler._filter_papers_by_keywords（config/topics.yaml 的關鍵字）"""
+    import yaml
+    with open(project_root / "config" / "topics.yaml", 'r', encoding='utf-8') as f:
+        keywords = yaml.safe_load(f).get('keywords', {})
+    crawler = _crawler(keywords=keywords)
+    papers = _parsed_papers(n)
+    return (lambda: crawler._filter_papers_by_keywords(papers)), n
+
+
+@benchmark("apply_limits")
+def bench_apply_limits(n: int, tmp: Path):
+    """ArxivCrawler._apply_limits：依發布時間排序並截斷"""
+    crawler = _crawler(limits={'max_papers_per_day': max(1, n // 10)})
+    papers = _parsed_papers(n)
+    papers.reverse()  # API 由新到舊；反轉後排序才有實際工作
+    return (lambda: crawler._apply_limits(papers)), n
+
+
+@benchmark("bm25_rank", requires="scipy", budget=(0.05, 70e-6))
+def bench_bm25_rank(n: int, tmp: Path):
+    """BM25Ranker.score + rank：1000 個查詢詞彙（單詞與雙詞）對整批論文排序（一萬篇的預算 0.75 秒）"""
+    from synthetic import WORDS
+    from processor.relevance import BM25Ranker
+    papers = _parsed_papers(n)
+    keywords = [f"{a} {b}" for a in WORDS for b in WORDS if a != b][:200]
+    keywords += [f"term{i}" for i in range(1000 - len(keywords) - len(WORDS))] + WORDS
+    ranker = BM25Ranker(n_docs=50_000, total_tokens=50_000 * 150)
+    return (lambda: ranker.rank(papers, ranker.score(papers, keywords))), n
+
+
+@benchmark("spider_parse", requires="scrapy")
+def bench_spider_parse(n: int, tmp: Path):
+    """ArxivSpider.parse：/list/new HTML → 論文 ID 與分類"""
+    from scrapy.http import HtmlResponse
+    sys.path.insert(0, str(project_root / "daily_arxiv"))
+    os.environ.setdefault("CATEGORIES", ",".join(CATEGORIES))
+    from daily_arxiv.spiders.arxiv import ArxivSpider
+
+    spider = ArxivSpider()
+    response = HtmlResponse(
+        url="https://arxiv.org/list/cs.AI/new",
+        body=make_list_new_html(n, 'cs.AI').encode('utf-8'),
+        encoding='utf-8',
+    )
+    return (lambda: list(spider.parse(response))), n
+
+
+@benchmark("convert")
+def bench_convert(n: int, tmp: Path):
+    """to_md/convert.py：AI 增強 JSONL → Markdown"""
+    from to_md.convert import convert
+    lines = make_enhanced_jsonl(n)
+    return (lambda: convert(lines, io.StringIO(), preference=CATEGORIES)), n
+
+
+@benchmark("generate_report")
+def bench_generate_report(n: int, tmp: Path):
+    """ReportGenerator.generate_report：Jinja2 串流寫檔"""
+    from generator.report_generator import ReportGenerator
+    generator = ReportGenerator(cache_dir=tmp / "jinja2")
+    papers = make_papers(n)
+    output_file = tmp / "report.md"
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            assert generator.generate_report(papers, output_file, '2025-06-10')
+    return run, n
+
+
+def time_benchmark(fn: Callable, repeat: int) -> List[float]:
+    """先暖身一次，再量測 repeat 次的耗時（秒）"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_suite(papers: int, repeat: int, only: Optional[List[str]] = None) -> Dict:
+    """
+    執行效能測試
+
+    Args:
+        papers: 每個測試的資料量
+        repeat: 量測次數（另有一次暖身）
+        only: 只執行這些測試
+
+    Returns:
+        結果字典
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (setup, requires) in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            if requires and importlib.util.find_spec(requires) is None:
+                results[name] = {'skipped': f"{requires} 未安裝"}
+                print(f"⏭️ {name}: 略過（{requires} 未安裝）")
+                continue
+            with redirect_stdout(io.StringIO()):
+                fn, items = setup(papers, Path(tmp))
+            timings = time_benchmark(fn, repeat)
+            best = min(timings)
+            results[name] = {
+                'best_seconds': round(best, 6),
+                'median_seconds': round(statistics.median(timings), 6),
+                'items': items,
+                'per_item_us': round(best / items * 1e6, 3),
+                'repeat': repeat,
+            }
+            if name in BUDGETS:
+                results[name]['budget_seconds'] = budget_seconds(name, items)
+            print(f"⏱️ {name:<16} 最佳 {best * 1000:9.2f} ms  中位數 "
+                  f"{statistics.median(timings) * 1000:9.2f} ms  ({results[name]['per_item_us']} µs/篇)")
+    return {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'papers': papers,
+        'benchmarks': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, scale: float = 1.0) -> List[Dict]:
+    """
+    比較兩次結果，以每篇論文的最佳耗時判斷（資料量不同時仍可比較），並檢查本次結果是否超過耗時預算
+
+    Args:
+        current: 本次結果
+        baseline: 基準結果
+        threshold: 允許的相對增幅（0.25 表示 +25%）
+        scale: 預算倍數（較慢的機器放寬預算）
+
+    Returns:
+        變慢超過門檻或超過預算的測試
+    """
+    regressions = []
+    for name, now in current.get('benchmarks', {}).items():
+        if 'per_item_us' not in now:
+            continue
+        before = baseline.get('benchmarks', {}).get(name)
+        if before and 'per_item_us' in before:
+            ratio = now['per_item_us'] / before['per_item_us']
+            status = "❌" if ratio > 1 + threshold else "✅"
+            print(f"{status} {name:<16} {before['per_item_us']:>10} → {now['per_item_us']:>10} µs/篇 ({ratio:.2f}x)")
+            if ratio > 1 + threshold:
+                regressions.append({'benchmark': name, 'baseline': before['per_item_us'],
+                                    'current': now['per_item_us'], 'ratio': round(ratio, 3)})
+
+        # 舊的結果檔沒有記錄預算時，以目前的預算計算
+        budget = now.get('budget_seconds') or budget_seconds(name, now['items'])
+        if budget is not None:
+            budget *= scale
+            status = "❌" if now['best_seconds'] > budget else "✅"
+            print(f"{status} {name:<16} 最佳 {now['best_seconds'] * 1000:.2f} ms  預算 {budget * 1000:.0f} ms"
+                  f"（{now['items']} 篇）")
+            if now['best_seconds'] > budget:
+                regressions.append({'benchmark': name, 'budget_seconds': round(budget, 6),
+                                    'current': now['best_seconds']})
+    return regressions
+
+
+def _load(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(description="比較兩份效能測試結果")
+        parser.add_argument("baseline", type=Path)
+        parser.add_argument("current", type=Path)
+        parser.add_argument("--threshold", type=float, default=0.25)
+        parser.add_argument("--scale", type=float, default=1.0, help="預算倍數")
+        args = parser.parse_args(argv[1:])
+        return 1 if compare(_load(args.current), _load(args.baseline), args.threshold, args.scale) else 0
+
+    parser = argparse.ArgumentParser(description="熱點路徑效能測試")
+    parser.add_argument("--papers", type=int, default=1000, help="每個測試的論文數")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="以逗號分隔的測試名稱：" + ",".join(BENCHMARKS))
+    parser.add_argument("--output", type=Path, help="結果 JSON 檔案")
+    parser.add_argument("--baseline", type=Path, help="基準結果；任一測試變慢超過門檻時回傳 1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允許的相對增幅")
+    parser.add_argument("--scale", type=float, default=1.0, help="預算倍數（與 --baseline 一起使用）")
+    args = parser.parse_args(argv)
+
+    # 被測程式碼的 info 日誌不列入輸出
+    logging.basicConfig(level=logging.WARNING)
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    unknown = [name for name in only or [] if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的測試: {', '.join(unknown)}")
+
+    results = run_suite(args.papers, args.repeat, only)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 結果已寫入 {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, _load(args.baseline), args.threshold, args.scale)
+        if regressions:
+            print(f"❌ {len(regressions)} 個測試變慢超過 {args.threshold:.0%} 或超過預算")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+合成 arXiv 資料產生器
+產生指定規模的 Atom API 回應、/list/new HTML 頁面與 AI 增強後的 JSONL，供效能測試使用；
+相同的 seed 產生相同的資料
+
+使用方式（於專案根目錄）:
+    python benchmarks/synthetic.py atom --papers 500 > /tmp/feed.xml
+    python benchmarks/synthetic.py html --papers 500 --category cs.AI > /tmp/new.html
+    python benchmarks/synthetic.py jsonl --papers 1000 > /tmp/2025-06-10_AI_enhanced_Chinese.jsonl
+"""
+
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from html import escape as html_escape
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape as xml_escape
+
+WORDS = ("transformer attention diffusion graph policy language vision benchmark "
+         "retrieval alignment reasoning robustness efficient sparse federated").split()
+
+# 分類代碼 → /list/new 頁面上的完整名稱
+CATEGORY_NAMES = {
+    'cs.AI': 'Artificial Intelligence',
+    'cs.LG': 'Machine Learning',
+    'cs.CV': 'Computer Vision and Pattern Recognition',
+    'cs.CL': 'Computation and Language',
+    'cs.RO': 'Robotics',
+    'stat.ML': 'Machine Learning',
+    'math.OC': 'Optimization and Control',
+}
+
+# 合成資料中混入的關鍵字，讓關鍵字過濾有實際的通過/排除比例
+PHRASES = ("deep learning", "large language model", "reinforcement learning", "survey only",
+           "neural network", "computer vision", "quantum chemistry", "protein folding")
+
+
+def _sentence(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(k)).capitalize() + "."
+
+
+def _abstract(rng: random.Random) -> str:
+    parts = [_sentence(rng, 20) for _ in range(8)]
+    parts.insert(rng.randrange(len(parts)), f"We study {rng.choice(PHRASES)}.")
+    return " ".join(parts)
+
+
+def make_papers(n: int, seed: int = 0) -> List[Dict]:
+    """產生合成的 AI 增強論文資料（ReportGenerator / convert.py 的輸入格式）"""
+    rng = random.Random(seed)
+    papers = []
+    for i in range(n):
+        arxiv_id = f"2506.{i:05d}"
+        papers.append({
+            'id': arxiv_id,
+            'title': _sentence(rng, 10),
+            'authors': [f"Author {rng.randrange(5000)}" for _ in range(rng.randint(1, 8))],
+            'categories': rng.sample(['cs.AI', 'cs.LG', 'cs.CV', 'cs.CL', 'stat.ML'], 2),
+            'published': '2025-06-10T00:00:00+00:00',
+            'entry_id': f"https://arxiv.org/abs/{arxiv_id}",
+            'abs': f"https://arxiv.org/abs/{arxiv_id}",
+            'pdf_url': f"https://arxiv.org/pdf/{arxiv_id}",
+            'summary': " ".join(_sentence(rng, 20) for _ in range(8)),
+            'AI': {
+                'tldr': _sentence(rng, 20), 'motivation': _sentence(rng, 40), 'method': _sentence(rng, 60),
+                'result': _sentence(rng, 40), 'conclusion': _sentence(rng, 30), 'summary_zh': _sentence(rng, 80),
+                'keywords': rng.sample(WORDS, 4), 'difficulty': '中等',
+            },
+        })
+    return papers
+
+
+def make_enhanced_jsonl(n: int, seed: int = 0) -> List[str]:
+    """產生 AI 增強後的 JSONL 行（*_AI_enhanced_*.jsonl 的內容）"""
+    return [json.dumps(paper, ensure_ascii=False) + "\n" for paper in make_papers(n, seed)]
+
+
+def make_atom_feed(n: int, seed: int = 0, start: Optional[datetime] = None) -> bytes:
+    """
+    產生 arXiv API（export.arxiv.org/api/query）格式的 Atom 回應
+
+    Args:
+        n: 論文數量
+        seed: 亂數種子
+        start: 最新一篇的提交時間，之後每篇往前 7 分鐘（與 API 的由新到舊排序一致）
+
+    Returns:
+        UTF-8 編碼的 XML
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+        f'  <title type="html">ArXiv Query: synthetic</title>\n'
+        f'  <id>http://arxiv.org/api/synthetic{seed}</id>\n'
+    ]
+    for i in range(n):
+        arxiv_id = f"2506.{i:05d}v{rng.randint(1, 3)}"
+        stamp = (start - timedelta(minutes=7 * i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        categories = rng.sample(list(CATEGORY_NAMES), rng.randint(1, 3))
+        authors = "".join(
+            f"    <author><name>Author {rng.randrange(5000)}</name></author>\n"
+            for _ in range(rng.randint(1, 8))
+        )
+        extra = "".join(f'    <category term="{c}" scheme="http://arxiv.org/schemas/atom"/>\n'
+                        for c in categories)
+        parts.append(
+            "  <entry>\n"
+            f"    <id>http://arxiv.org/abs/{arxiv_id}</id>\n"
+            f"    <updated>{stamp}</updated>\n"
+            f"    <published>{stamp}</published>\n"
+            f"    <title>{xml_escape(_sentence(rng, 10))}\n      {xml_escape(_sentence(rng, 3))}</title>\n"
+            f"    <summary>  {xml_escape(_abstract(rng))}\n</summary>\n"
+            f"{authors}"
+            f'    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>\n'
+            f'    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>\n'
+            f'    <arxiv:primary_category term="{categories[0]}" scheme="http://arxiv.org/schemas/atom"/>\n'
+            f"{extra}"
+            "  </entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts).encode('utf-8')
+
+
+def make_list_new_html(n: int, category: str = 'cs.AI', seed: int = 0,
+                       cross_fraction: float = 0.3, replacement_fraction: float = 0.2) -> str:
+    """
+    產生 arxiv.org/list/<category>/new 格式的 HTML 頁面
+
+    頁首的目錄錨點把頁面分成新論文、交叉列表與替換三段，與 ArxivSpider.parse 的判斷方式相同
+
+    Args:
+        n: 論文數量（三段合計）
+        category: 列表頁的分類
+        seed: 亂數種子
+        cross_fraction: 交叉列表所占比例
+        replacement_fraction: 替換（舊論文新版本）所占比例
+
+    Returns:
+        HTML 字串
+    """
+    rng = random.Random(seed)
+    n_replaced = int(n * replacement_fraction)
+    n_cross = int(n * cross_fraction)
+    n_new = n - n_cross - n_replaced
+    sections = [(1, 'New submissions'), (n_new + 1, 'Cross-lists'), (n_new + n_cross + 1, 'Replacements')]
+
+    parts = [
+        "<!DOCTYPE html>\n<html><head><title>New submissions</title></head><body>\n"
+        "<div id='dlpage'>\n"
+        f"<h1>{html_escape(CATEGORY_NAMES.get(category, category))}</h1>\n<ul>\n"
+    ]
+    for anchor, label in sections:
+        parts.append(f"<li><a href='#item{anchor}'>{label}</a></li>\n")
+    parts.append("</ul>\n<dl id='articles'>\n")
+
+    others = [c for c in CATEGORY_NAMES if c != category]
+    for i in range(1, n + 1):
+        arxiv_id = f"2506.{i:05d}"
+        if i <= n_new or rng.random() < 0.5:
+            primary = category
+        else:
+            primary = rng.choice(others)
+        secondary = rng.sample(others, rng.randint(0, 2))
+        subjects = "; ".join(f"{CATEGORY_NAMES[c]} ({c})" for c in secondary)
+        parts.append(
+            f"<dt><a name='item{i}'>[{i}]</a>&nbsp;\n"
+            f"  <a href='/abs/{arxiv_id}' title='Abstract' id='{arxiv_id}'>arXiv:{arxiv_id}</a>\n"
+            f"  [<a href='/pdf/{arxiv_id}' title='Download PDF' id='pdf-{arxiv_id}'>pdf</a>]\n"
+            "</dt>\n<dd>\n<div class='meta'>\n"
+            f"<div class='list-title mathjax'><span class='descriptor'>Title:</span>\n"
+            f"  {html_escape(_sentence(rng, 10))}\n</div>\n"
+            "<div class='list-authors'>"
+            + ", ".join(f"<a href='/a/author_{rng.randrange(5000)}'>Author</a>" for _ in range(rng.randint(1, 6)))
+            + "</div>\n"
+            "<div class='list-subjects'><span class='descriptor'>Subjects:</span>\n"
+            f"  <span class='primary-subject'>{html_escape(CATEGORY_NAMES[primary])} ({primary})</span>"
+            f"{'; ' + html_escape(subjects) if subjects else ''}\n</div>\n"
+            f"<p class='mathjax'>{html_escape(_abstract(rng))}</p>\n"
+            "</div>\n</dd>\n"
+        )
+    parts.append("</dl>\n</div>\n</body></html>\n")
+    return "".join(parts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="產生合成 arXiv 資料")
+    parser.add_argument("kind", choices=["atom", "html", "jsonl"])
+    parser.add_argument("--papers", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--category", default="cs.AI", help="html 頁面的分類")
+    args = parser.parse_args(argv)
+
+    if args.kind == "atom":
+        sys.stdout.buffer.write(make_atom_feed(args.papers, args.seed))
+    elif args.kind == "html":
+        sys.stdout.write(make_list_new_html(args.papers, args.category, args.seed))
+    else:
+        sys.stdout.writelines(make_enhanced_jsonl(args.papers, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,35 @@ today=`date -u "+%Y-%m-%d"`
 cd daily_arxiv
 scrapy crawl arxiv -o ../data/${today}.jsonl
 
-cd ../ai
-python enhance.py --data ../data/${today}.jsonl
+# 設定 QUEUE_WORKERS 時改由租約式工作佇列分給多個工作行程增強（輸出檔相同）
+if [ -n "${QUEUE_WORKERS}" ]; then
+    cd ..
+    PYTHONPATH=src python -m pipeline.work_queue run --data data/${today}.jsonl --workers ${QUEUE_WORKERS}
+    cd ai
+else
+    cd ../ai
+    python enhance.py --data ../data/${today}.jsonl
+fi
 
-cd ../to_md
+# 本地關鍵詞與技術難度（config/topics.yaml 的 ai_analysis 開啟時；不呼叫模型），寫回增強檔供所有輸出格式使用
+cd ..
+PYTHONPATH=src python -m processor.feature_extractor annotate --data data/${today}_AI_enhanced_${LANGUAGE}.jsonl
+
+cd to_md
 python convert.py --data ../data/${today}_AI_enhanced_${LANGUAGE}.jsonl
 
+# 同一份增強結果產生 HTML、JSON Feed 與 RSS。Markdown 仍由 convert.py 產生：它是依類別分組並附目錄的舊版版面
+# （to_md/paper_template.md），寫到同一個 data/{date}.md 並更新 update_readme.py 讀取的報告清單
 cd ..
+PYTHONPATH=src python -m generator.multi_format --data data/${today}_AI_enhanced_${LANGUAGE}.jsonl --date ${today} --formats html,json,rss
+
 python update_readme.py
 
-ls data/*.jsonl | sed 's|data/||' > assets/file-list.txt
\ No newline at end of file
+# 將新的增強結果併入靜態搜尋索引（config/topics.yaml 的 history.search_index 為 true 時）
+PYTHONPATH=src python -m generator.search_index build --if-enabled
+
+# 將已結束月份的每日 JSONL 封存為壓縮包
+PYTHONPATH=src python -m processor.archive compact
+
+# 檔案清單包含已封存月份的每日檔案
+PYTHONPATH=src python -m processor.archive list "*.jsonl" > assets/file-list.txt
\ No newline at end of file
@@ -3,5 +3,8 @@ AI 摘要生成模組
 """
 
 from .summarizer import AISummarizer
+from .gemini_enhancer import GeminiEnhancer
+from .router import ModelRouter, RoutingExhausted
+from .fake_backend import FakeBackend
 
-__all__ = ['AISummarizer']
+__all__ = ['AISummarizer', 'GeminiEnhancer', 'ModelRouter', 'RoutingExhausted', 'FakeBackend']
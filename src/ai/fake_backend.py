@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+離線假模型後端
+不呼叫任何 API，依摘要內容產生可預期的輸出，用於測試路由與流程
+"""
+
+import os
+import re
+import time
+from typing import Dict, Iterable, Optional, Type
+
+
+class FakeBackend:
+    """離線假後端"""
+
+    def __init__(self, fail_models: Optional[Iterable[str]] = None,
+                 error_cls: Type[Exception] = ValueError, latency: float = 0.0):
+        """
+        初始化假後端
+
+        Args:
+            fail_models: 固定回傳解析錯誤的模型名稱（模擬便宜模型失敗）
+            error_cls: 失敗時拋出的例外類型
+            latency: 每次呼叫的模擬延遲（秒）
+        """
+        self.fail_models = set(fail_models or [])
+        self.error_cls = error_cls
+        self.latency = latency
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls, error_cls: Type[Exception] = ValueError) -> 'FakeBackend':
+        """由 `FAKE_FAIL_MODELS` 與 `FAKE_LATENCY` 環境變數建立假後端"""
+        fail_models = [m.strip() for m in os.environ.get('FAKE_FAIL_MODELS', '').split(',') if m.strip()]
+        latency = float(os.environ.get('FAKE_LATENCY', '0'))
+        return cls(fail_models, error_cls=error_cls, latency=latency)
+
+    def _call(self, model: str):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if model in self.fail_models:
+            raise self.error_cls(f"fake parse failure from {model}")
+
+    def structured(self, model: str, content: str) -> Dict[str, str]:
+        """
+        產生結構化分析結果
+
+        Args:
+            model: 模型名稱
+            content: 論文摘要
+
+        Returns:
+            與 Structure 欄位相同的字典
+        """
+        self._call(model)
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', content.strip()) if s.strip()]
+        if not sentences:
+            sentences = [content.strip() or "(empty)"]
+
+        def pick(i: int) -> str:
+            return sentences[min(i, len(sentences) - 1)]
+
+        return {
+            'tldr': pick(0),
+            'motivation': pick(0),
+            'method': pick(1),
+            'result': pick(len(sentences) - 2),
+            'conclusion': pick(len(sentences) - 1),
+        }
+
+    def generate(self, model: str, prompt: str) -> str:
+        """產生純文字回應"""
+        self._call(model)
+        return f"[{model}] {prompt.strip()[:200]}"
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+單篇論文 AI 增強模組
+以 Google Gemini 為每篇論文產生結構化分析（tldr / motivation / method / result / conclusion），
+透過模型路由器便宜優先、失敗才升級
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from utils.lazy_import import lazy_import
+from .router import ModelRouter, RoutingExhausted
+from .fake_backend import FakeBackend
+
+# SDK 載入需要數百毫秒，第一次使用 genai 時才真正匯入；未安裝時為 None
+genai = lazy_import('google.generativeai')
+
+logger = logging.getLogger(__name__)
+
+AI_FIELDS = ('tldr', 'motivation', 'method', 'result', 'conclusion')
+
+SYSTEM_PROMPT = """You are a professional paper analyst.
+You should not respond too long output.
+Your output should in {language}."""
+
+USER_PROMPT = """Please analyze the following abstract of papers.
+Reply with a single JSON object with exactly these string fields:
+"tldr" (a too long; didn't read summary), "motivation", "method", "result", "conclusion".
+
+Content:
+{content}"""
+
+FULLTEXT_PROMPT = """Please analyze the following paper, given its abstract and excerpts of its full text.
+Reply with a single JSON object with exactly these string fields:
+"tldr" (a too long; didn't read summary), "motivation", "method", "result", "conclusion".
+
+Abstract:
+{abstract}
+
+Full text excerpts:
+{excerpts}"""
+
+
+class GeminiEnhancer:
+    """單篇論文 AI 增強器"""
+
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None,
+                 language: Optional[str] = None, backend=None,
+                 router: Optional[ModelRouter] = None, max_retries: int = 3):
+        """
+        初始化增強器
+
+        Args:
+            api_key: Google API 金鑰，預設讀取 GOOGLE_API_KEY
+            model_name: 模型名稱（未設定 MODEL_TIERS 時的唯一層級），預設讀取 MODEL_NAME
+            language: 輸出語言，預設讀取 LANGUAGE
+            backend: 替代的模型後端；AI_BACKEND=fake 時自動使用 FakeBackend
+            router: 模型路由器，預設由環境變數建立
+            max_retries: 同一層級內網路等暫時性錯誤的重試次數
+        """
+        self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
+        self.model_name = model_name or os.getenv('MODEL_NAME', 'gemini-2.0-flash-exp')
+        self.language = language or os.getenv('LANGUAGE', 'Traditional Chinese')
+        self.max_retries = max_retries
+        if backend is None and os.getenv('AI_BACKEND', 'gemini') == 'fake':
+            backend = FakeBackend.from_env()
+        self.backend = backend
+        # 回應無法解析成 JSON 或缺少欄位時拋出 ValueError，交由路由器升級
+        self.router = router or ModelRouter.from_env(self.model_name, escalate_on=(ValueError,))
+        self._models = {}
+        self.available = True
+
+        if backend is not None:
+            logger.info("🧪 使用替代模型後端")
+        elif not genai:
+            logger.warning("⚠️ google-generativeai 套件未安裝，將跳過 AI 增強")
+            self.available = False
+        elif not self.api_key:
+            logger.warning("⚠️ GOOGLE_API_KEY 未設定，將跳過 AI 增強")
+            self.available = False
+        else:
+            genai.configure(api_key=self.api_key)
+            logger.info(f"✅ AI 增強器初始化完成: {' -> '.join(self.router.tiers)}")
+
+    def _get_model(self, model_name: str):
+        """取得（並快取）指定名稱的模型"""
+        if model_name not in self._models:
+            self._models[model_name] = genai.GenerativeModel(
+                model_name,
+                system_instruction=SYSTEM_PROMPT.format(language=self.language)
+            )
+        return self._models[model_name]
+
+    @staticmethod
+    def _parse(text: str) -> Dict[str, str]:
+        """解析模型回應；不是 JSON 或缺少欄位時拋出 ValueError"""
+        text = (text or "").strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+            text = text[text.find("{"):]
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("回應不是 JSON 物件")
+        result = {field: str(data.get(field) or "").strip() for field in AI_FIELDS}
+        missing = [field for field, value in result.items() if not value]
+        if missing:
+            raise ValueError(f"回應缺少欄位: {', '.join(missing)}")
+        return result
+
+    @staticmethod
+    def _excerpts(paper: Dict) -> str:
+        """全文階段附上的片段（paper['fulltext']），依章節標示"""
+        return "\n\n".join(f"[{chunk['section']}]\n{chunk['text']}" for chunk in paper.get('fulltext') or [])
+
+    def _create_analysis_prompt(self, paper: Dict) -> str:
+        """建立單篇論文的分析提示詞（子類別可覆寫）；有全文片段時一併提供"""
+        if paper.get('fulltext'):
+            return FULLTEXT_PROMPT.format(abstract=paper.get('summary', ''), excerpts=self._excerpts(paper))
+        return USER_PROMPT.format(content=paper.get('summary', ''))
+
+    def _invoke(self, model_name: str, paper: Dict) -> Dict[str, str]:
+        """
+        以單一模型層級分析一篇論文
+
+        網路等暫時性錯誤在同一層級內重試；解析失敗（ValueError）交由路由器決定是否升級
+        """
+        if self.backend is not None:
+            content = paper.get('summary', '')
+            if paper.get('fulltext'):
+                content = f"{content}\n\n{self._excerpts(paper)}"
+            return self.backend.structured(model_name, content)
+
+        model = self._get_model(model_name)
+        prompt = self._create_analysis_prompt(paper)
+        for attempt in range(self.max_retries):
+            try:
+                response = model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=0.3,
+                        response_mime_type="application/json",
+                    )
+                )
+                return self._parse(response.text)
+            except ValueError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ {model_name} 呼叫失敗 (嘗試 {attempt + 1}/{self.max_retries}): {e}")
+                if attempt < self.max_retries - 1:
+                    time.sleep(2 ** attempt)  # 指數退避
+                else:
+                    raise
+        raise RuntimeError("unreachable")
+
+    def enhance_paper(self, paper: Dict) -> Dict:
+        """
+        增強單篇論文
+
+        Args:
+            paper: 論文資料（需含 summary；全文階段附上的 fulltext 片段一併送往模型）
+
+        Returns:
+            附上 'AI' 欄位的新字典；失敗時各欄位為 "Error"，與 ai/enhance.py 的輸出一致。
+            全文片段不寫入輸出，只在 fulltext_sections 記錄使用了哪些章節
+        """
+        paper_id = paper.get('id') or paper.get('arxiv_id') or ''
+        enhanced = dict(paper)
+        chunks = enhanced.pop('fulltext', None)
+        if chunks:
+            enhanced['fulltext_sections'] = list(dict.fromkeys(chunk['section'] for chunk in chunks))
+        if not self.available:
+            enhanced['AI'] = {field: "Error" for field in AI_FIELDS}
+            return enhanced
+        try:
+            enhanced['AI'] = self.router.route(
+                paper_id,
+                paper.get('summary', ''),
+                lambda model_name: self._invoke(model_name, paper)
+            )
+        except RoutingExhausted as e:
+            logger.error(f"❌ {paper_id} AI 增強失敗: {e}")
+            enhanced['AI'] = {field: "Error" for field in AI_FIELDS}
+        except Exception as e:
+            logger.error(f"❌ {paper_id} AI 增強時發生未預期的錯誤: {e}")
+            enhanced['AI'] = {field: "Error" for field in AI_FIELDS}
+        return enhanced
+
+    def enhance_papers(self, papers: Iterable[Dict]) -> List[Dict]:
+        """
+        依序增強多篇論文
+
+        Args:
+            papers: 論文列表
+
+        Returns:
+            增強後的論文列表
+        """
+        enhanced = []
+        for paper in papers:
+            enhanced.append(self.enhance_paper(paper))
+            logger.info(f"🧠 已增強 {len(enhanced)} 篇論文")
+        if enhanced:
+            logger.info(f"📊 路由統計: {json.dumps(self.router.summary(), ensure_ascii=False)}")
+        return enhanced
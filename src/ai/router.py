@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+模型分層路由模組
+短摘要先交給快速、便宜的模型，只有在結構化輸出解析失敗或驗證失敗時才升級到較強的模型
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingExhausted(Exception):
+    """所有模型層級皆失敗"""
+
+    def __init__(self, paper_id: str, last_error: Optional[BaseException] = None):
+        super().__init__(f"{paper_id}: 所有模型層級皆無法產生有效輸出 ({last_error})")
+        self.paper_id = paper_id
+        self.last_error = last_error
+
+
+class ModelRouter:
+    """便宜優先的模型路由器"""
+
+    def __init__(self, tiers: List[str], short_abstract_chars: int = 1200,
+                 max_math_tokens: int = 6,
+                 escalate_on: Tuple[Type[BaseException], ...] = ()):
+        """
+        初始化路由器
+
+        Args:
+            tiers: 由便宜到昂貴排序的模型名稱列表
+            short_abstract_chars: 視為「短摘要」的字元數上限
+            max_math_tokens: 視為「簡單摘要」的數學符號數上限
+            escalate_on: 觸發升級的例外類型（其他例外直接拋出）
+        """
+        if not tiers:
+            raise ValueError("至少需要一個模型層級")
+        self.tiers = list(tiers)
+        self.short_abstract_chars = short_abstract_chars
+        self.max_math_tokens = max_math_tokens
+        self.escalate_on = tuple(escalate_on)
+        self.decisions: List[Dict[str, Any]] = []
+        self.tier_stats: Dict[str, Dict[str, float]] = {
+            model: {'calls': 0, 'failures': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+            for model in self.tiers
+        }
+        # 多個執行緒同時呼叫 route 時保護統計資料
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_model: str, **kwargs) -> 'ModelRouter':
+        """
+        由環境變數建立路由器
+
+        `MODEL_TIERS` 以逗號分隔、由便宜到昂貴排列；未設定時只使用 `default_model`。
+        `ROUTING_SHORT_ABSTRACT_CHARS` 可覆寫短摘要門檻。
+        """
+        tiers = [t.strip() for t in os.environ.get('MODEL_TIERS', '').split(',') if t.strip()]
+        if not tiers:
+            tiers = [default_model]
+        short_chars = os.environ.get('ROUTING_SHORT_ABSTRACT_CHARS')
+        if short_chars:
+            kwargs.setdefault('short_abstract_chars', int(short_chars))
+        return cls(tiers, **kwargs)
+
+    def is_simple(self, text: str) -> bool:
+        """判斷摘要是否短且簡單"""
+        if len(text) > self.short_abstract_chars:
+            return False
+        math_tokens = text.count('$') // 2 + text.count('\\')
+        return math_tokens <= self.max_math_tokens
+
+    def initial_tier(self, text: str) -> int:
+        """決定起始層級：簡單摘要從最便宜的模型開始，其餘從第二層開始"""
+        if self.is_simple(text) or len(self.tiers) == 1:
+            return 0
+        return 1
+
+    def route(self, paper_id: str, text: str, invoke: Callable[[str], Any],
+              validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        依路由策略呼叫模型
+
+        Args:
+            paper_id: 論文 ID（用於記錄）
+            text: 用來判斷難易度的摘要文字
+            invoke: 接收模型名稱並回傳模型輸出的函數
+            validate: 檢查輸出是否有效的函數，回傳 False 時升級
+
+        Returns:
+            第一個通過驗證的模型輸出
+
+        Raises:
+            RoutingExhausted: 所有層級皆失敗
+        """
+        start = self.initial_tier(text)
+        attempts = []
+        last_error: Optional[BaseException] = None
+
+        for tier in range(start, len(self.tiers)):
+            model = self.tiers[tier]
+            t0 = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = invoke(model)
+                ok = validate(result) if validate else True
+                if not ok:
+                    error = "validation failed"
+            except self.escalate_on as e:
+                ok = False
+                error = f"{type(e).__name__}: {e}"
+                last_error = e
+            latency = time.perf_counter() - t0
+
+            with self._lock:
+                stats = self.tier_stats[model]
+                stats['calls'] += 1
+                stats['latency_total'] += latency
+                stats['latency_max'] = max(stats['latency_max'], latency)
+                if not ok:
+                    stats['failures'] += 1
+            attempts.append({'model': model, 'tier': tier, 'ok': ok,
+                             'latency': round(latency, 4), 'error': error})
+
+            if ok:
+                self._record(paper_id, len(text), start, attempts)
+                return result
+            if tier + 1 < len(self.tiers):
+                logger.warning(f"⚠️ {paper_id} 在 {model} 失敗 ({error})，升級到 {self.tiers[tier + 1]}")
+
+        self._record(paper_id, len(text), start, attempts)
+        raise RoutingExhausted(paper_id, last_error)
+
+    def _record(self, paper_id: str, text_len: int, start: int, attempts: List[Dict]):
+        """記錄單篇論文的路由決策"""
+        with self._lock:
+            self.decisions.append({
+                'id': paper_id,
+                'abstract_chars': text_len,
+                'initial_model': self.tiers[start],
+                'final_model': attempts[-1]['model'],
+                'escalations': len(attempts) - 1,
+                'ok': attempts[-1]['ok'],
+                'attempts': attempts,
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        """取得各層級的呼叫次數、失敗次數與延遲統計"""
+        tiers = {}
+        for model, stats in self.tier_stats.items():
+            calls = int(stats['calls'])
+            tiers[model] = {
+                'calls': calls,
+                'failures': int(stats['failures']),
+                'latency_avg': round(stats['latency_total'] / calls, 4) if calls else 0.0,
+                'latency_max': round(stats['latency_max'], 4),
+            }
+        return {
+            'papers': len(self.decisions),
+            'escalated': sum(1 for d in self.decisions if d['escalations']),
+            'failed': sum(1 for d in self.decisions if not d['ok']),
+            'tiers': tiers,
+        }
+
+    def write_log(self, path: Path):
+        """將路由決策寫成 JSONL，最後一行為統計摘要"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for decision in self.decisions:
+                f.write(json.dumps(decision, ensure_ascii=False) + "\n")
+            f.write(json.dumps({'summary': self.summary()}, ensure_ascii=False) + "\n")
@@ -9,29 +9,45 @@ import logging
 import json
 import time
 from typing import List, Dict, Optional
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-    
 from datetime import datetime
 
+from utils.lazy_import import lazy_import
+from .router import ModelRouter, RoutingExhausted
+
+# SDK 載入需要數百毫秒，第一次使用 genai 時才真正匯入；未安裝時為 None
+genai = lazy_import('google.generativeai')
+
 logger = logging.getLogger(__name__)
 
 class AISummarizer:
     """AI 摘要生成器"""
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-2.0-flash-exp"):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-2.0-flash-exp",
+                 backend=None, router: Optional[ModelRouter] = None):
         """
         初始化 AI 摘要生成器
         
         Args:
             api_key: Google API 金鑰
-            model_name: 模型名稱
+            model_name: 模型名稱（未設定 MODEL_TIERS 時的唯一層級）
+            backend: 替代的模型後端（例如離線的 FakeBackend）
+            router: 模型路由器，預設由環境變數建立
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         self.model_name = model_name
         self.language = os.getenv('LANGUAGE', 'Traditional Chinese')
+        self.backend = backend
+        # 整批摘要的提示詞較長，以整份提示詞長度判斷是否交給便宜模型；
+        # genai 在回應被阻擋或沒有內容時存取 response.text 會拋出 ValueError，視為驗證失敗
+        self.router = router or ModelRouter.from_env(
+            model_name, short_abstract_chars=20000, escalate_on=(ValueError,)
+        )
+        self._models = {}
+        
+        if backend is not None:
+            logger.info("🧪 使用替代模型後端")
+            self.model = backend
+            return
         
         if not genai:
             logger.warning("⚠️ google-generativeai 套件未安裝，將跳過 AI 摘要生成")
@@ -46,6 +62,7 @@ class AISummarizer:
         try:
             genai.configure(api_key=self.api_key)
             self.model = genai.GenerativeModel(self.model_name)
+            self._models[self.model_name] = self.model
             logger.info(f"✅ AI 模型初始化成功: {self.model_name}")
         except Exception as e:
             logger.error(f"❌ AI 模型初始化失敗: {e}")
@@ -117,7 +134,7 @@ arXiv ID: {paper['arxiv_id']}
 
 [按論文類別分組摘要，每個類別包含]
 
-### [類別名稱] ({該類別論文數量}篇)
+### [類別名稱] ({{該類別論文數量}}篇)
 
 - **[論文標題]** - [一句話描述核心貢獻] ([arXiv ID](連結))
 - **[論文標題]** - [一句話描述核心貢獻] ([arXiv ID](連結))
@@ -180,40 +197,72 @@ arXiv ID: {paper['arxiv_id']}
             return self._generate_empty_summary()
         
         try:
-            logger.info(f"🤖 使用 {self.model_name} 生成 {len(papers)} 篇論文的摘要...")
+            logger.info(f"🤖 使用 {' -> '.join(self.router.tiers)} 生成 {len(papers)} 篇論文的摘要...")
             
             prompt = self._create_summary_prompt(papers)
+            text = self.router.route(
+                'daily-summary',
+                prompt,
+                lambda model_name: self._generate_with_model(model_name, prompt),
+                validate=lambda text: bool(text and text.strip())
+            )
+            logger.info("✅ AI 摘要生成成功")
+            return text
             
-            # 生成摘要（增加重試機制）
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            temperature=0.7,
-                            max_output_tokens=4000,
-                        )
-                    )
-                    
-                    if response.text:
-                        logger.info("✅ AI 摘要生成成功")
-                        return response.text
-                    else:
-                        logger.warning(f"⚠️ AI 回應為空 (嘗試 {attempt + 1}/{max_retries})")
-                        
-                except Exception as e:
-                    logger.error(f"❌ AI 生成失敗 (嘗試 {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)  # 指數退避
-                    
-            logger.error("❌ AI 摘要生成失敗，使用預設摘要")
+        except RoutingExhausted:
+            logger.error("❌ 所有模型層級皆無有效回應，使用預設摘要")
             return self._generate_default_summary(papers)
-            
         except Exception as e:
             logger.error(f"❌ AI 摘要生成時發生錯誤: {e}")
             return self._generate_default_summary(papers)
     
+    def _get_model(self, model_name: str):
+        """取得（並快取）指定名稱的模型"""
+        if model_name not in self._models:
+            self._models[model_name] = genai.GenerativeModel(model_name)
+        return self._models[model_name]
+    
+    def _generate_with_model(self, model_name: str, prompt: str) -> str:
+        """
+        使用單一模型層級生成摘要
+        
+        網路等暫時性錯誤在同一層級內重試；回應為空或無法解析時交由路由器決定是否升級
+        
+        Args:
+            model_name: 模型名稱
+            prompt: 提示詞
+            
+        Returns:
+            生成的文字（可能為空）
+        """
+        if self.backend is not None:
+            return self.backend.generate(model_name, prompt)
+        
+        model = self._get_model(model_name)
+        
+        # 生成摘要（增加重試機制）
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                response = model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=0.7,
+                        max_output_tokens=4000,
+                    )
+                )
+                return response.text or ""
+                
+            except ValueError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ {model_name} 生成失敗 (嘗試 {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(2 ** attempt)  # 指數退避
+                else:
+                    raise
+        return ""
+    
     def _generate_default_summary(self, papers: List[Dict]) -> str:
         """
         生成預設摘要（當 AI 不可用時）
@@ -10,25 +10,48 @@ import time
 import logging
 import requests
 import xml.etree.ElementTree as ET
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 import yaml
 
+from utils.authors import FollowedAuthors
+from utils.profiles import matches_keywords, profile_in_scope, profile_limit, profile_matches, union_categories
+
 logger = logging.getLogger(__name__)
 
 class ArxivCrawler:
     """ArXiv 論文爬蟲"""
     
-    def __init__(self, config_path: str = "config/topics.yaml"):
+    def __init__(self, config: Union[str, Path, Dict] = "config/topics.yaml", metrics=None,
+                 profiles: Optional[List[Dict]] = None, ranker=None, prefilter=None):
         """
         初始化爬蟲
         
         Args:
-            config_path: 設定檔路徑
+            config: 設定檔路徑，或已載入的設定字典
+            metrics: PipelineMetrics 實例，記錄 XML 解析（parse）的耗時與網路錯誤
+            profiles: 多個設定檔（utils.profiles.load_profiles）；有設定時以類別聯集查詢一次，
+                各設定檔的關鍵字與數量限制分別套用，論文標記於 paper['profiles']
+            ranker: processor.relevance.BM25Ranker；有設定時數量限制依 include 關鍵字的 BM25 分數
+                （而非發布時間）保留論文，分數寫入 paper['relevance']
+            prefilter: processor.prefilter.RelevancePrefilter；關鍵字過濾之後丟棄預測收錄機率過低的論文
+        
+        設定檔 authors.follow 中的追蹤作者，其論文不經關鍵字、預過濾與數量限制一律保留，
+        符合的名單項目寫入 paper['followed_authors']
         """
         self.base_url = "http://export.arxiv.org/api/query"
-        self.config = self._load_config(config_path)
+        self.config = config if isinstance(config, dict) else self._load_config(config)
+        self.metrics = metrics
+        self.profiles = profiles or []
+        self.ranker = ranker
+        self.ranking = self.config.get('ranking') or {}
+        self.prefilter = prefilter
+        self.followed = FollowedAuthors((self.config.get('authors') or {}).get('follow') or [])
+        # 本次爬取中被關鍵字、數量限制或相關性排序淘汰的候選（預過濾模型的負例）
+        self.rejected: List[Dict] = []
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'ArXiv-Daily-Summary/1.0 (https://github.com/audi0417/daily-arxiv-ai-summary)'
@@ -142,16 +165,19 @@ class ArxivCrawler:
                     pdf_url = link.get('href')
                     break
             
+            # 日期轉成 ISO 字串，論文可直接寫成 JSONL 或交給下一個階段
             return {
+                'id': arxiv_id,
                 'arxiv_id': arxiv_id,
                 'title': title,
                 'authors': authors,
                 'summary': summary,
                 'categories': categories,
-                'published': published,
-                'updated': updated,
+                'published': published.isoformat(),
+                'updated': updated.isoformat(),
                 'pdf_url': pdf_url,
-                'arxiv_url': f"https://arxiv.org/abs/{arxiv_id}"
+                'arxiv_url': f"https://arxiv.org/abs/{arxiv_id}",
+                'entry_id': f"https://arxiv.org/abs/{arxiv_id}"
             }
             
         except Exception as e:
@@ -171,42 +197,184 @@ class ArxivCrawler:
         if 'keywords' not in self.config:
             return papers
         
-        keywords_config = self.config['keywords']
-        include_keywords = keywords_config.get('include', [])
-        exclude_keywords = keywords_config.get('exclude', [])
-        
         filtered_papers = []
+        for paper in papers:
+            if self._matches_keywords(paper):
+                filtered_papers.append(paper)
+            else:
+                self._reject(paper)
+        
+        logger.info(f"🔍 關鍵字過濾: {len(papers)} → {len(filtered_papers)}")
+        return filtered_papers
+    
+    def _reject(self, paper: Dict):
+        """記錄被淘汰的候選（只保留訓練需要的欄位）"""
+        self.rejected.append({key: paper.get(key) for key in ('id', 'title', 'summary')})
+    
+    def _prefilter_papers(self, papers: List[Dict]) -> List[Dict]:
+        """
+        以預過濾模型丟棄收錄機率過低的論文（模型尚未訓練足夠時全部保留）
+        
+        被丟棄的論文不列入 rejected，避免模型以自己的判斷再訓練
+        """
+        if self.prefilter is None or not papers:
+            return papers
+        kept = [paper for paper, keep in zip(papers, self.prefilter.keep(papers)) if keep]
+        if len(kept) < len(papers):
+            logger.info(f"🎯 預過濾: {len(papers)} → {len(kept)}")
+            if self.metrics is not None:
+                self.metrics.count('prefilter', items_in=len(papers), items_out=len(kept))
+        return kept
+    
+    def _is_followed(self, paper: Dict) -> bool:
+        """論文是否有追蹤作者（有則寫入 paper['followed_authors']）"""
+        if not self.followed:
+            return False
+        matched = self.followed.match(paper.get('authors') or [])
+        if matched:
+            paper['followed_authors'] = matched
+        return bool(matched)
+    
+    def _split_followed(self, papers: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        分出追蹤作者的論文
         
+        Returns:
+            (追蹤作者的論文, 其餘論文)
+        """
+        followed, others = [], []
+        for paper in papers:
+            (followed if self._is_followed(paper) else others).append(paper)
+        if followed:
+            logger.info(f"👤 追蹤作者: {len(followed)} 篇論文（不受關鍵字與數量限制）")
+        return followed, others
+    
+    def _assign_followed_profiles(self, papers: List[Dict]) -> List[Dict]:
+        """追蹤作者的論文列入類別相符的所有設定檔，不佔用名額"""
         for paper in papers:
-            text_to_search = f"{paper['title']} {paper['summary']}".lower()
+            paper['profiles'] = [p['name'] for p in self.profiles if profile_in_scope(p, paper)]
+        return papers
+    
+    def _select(self, papers: List[Dict]) -> List[Dict]:
+        """
+        套用所有過濾條件：追蹤作者的論文直接保留，其餘依關鍵字、預過濾與數量限制（或各設定檔）篩選
+        
+        Returns:
+            追蹤作者的論文在前，其後為通過篩選的論文
+        """
+        self.rejected = []
+        followed, papers = self._split_followed(papers)
+        if self.profiles:
+            return self._assign_followed_profiles(followed) + self._apply_profiles(self._prefilter_papers(papers))
+        papers = self._filter_papers_by_keywords(papers)
+        papers = self._prefilter_papers(papers)
+        return followed + self._apply_limits(papers)
+    
+    def _matches_keywords(self, paper: Dict) -> bool:
+        """判斷單篇論文是否通過關鍵字條件"""
+        return matches_keywords(self.config.get('keywords'), paper)
+    
+    def _assign_profiles(self, paper: Dict, quota: Dict[str, int]) -> bool:
+        """
+        標記論文屬於哪些尚未額滿的設定檔
+        
+        Args:
+            paper: 論文資料，通過時寫入 paper['profiles']
+            quota: 各設定檔剩餘的名額，通過時扣除
             
-            # 檢查包含關鍵字
-            if include_keywords:
-                has_include_keyword = any(
-                    keyword.lower() in text_to_search 
-                    for keyword in include_keywords
-                )
-                if not has_include_keyword:
-                    continue
+        Returns:
+            是否至少屬於一個設定檔
+        """
+        names = [
+            profile['name'] for profile in self.profiles
+            if quota[profile['name']] > 0 and profile_matches(profile, paper)
+        ]
+        if not names:
+            return False
+        paper['profiles'] = names
+        for name in names:
+            quota[name] -= 1
+        return True
+    
+    def _search_scope(self) -> Tuple[List[str], int]:
+        """搜尋的類別與天數；有多個設定檔時取類別聯集與最長的天數"""
+        if self.profiles:
+            recent_days = max((p.get('date_filter') or {}).get('recent_days', 3) for p in self.profiles)
+            return union_categories(self.profiles), recent_days
+        return (
+            self.config.get('categories', ['cs.AI', 'cs.LG']),
+            self.config.get('date_filter', {}).get('recent_days', 3)
+        )
+    
+    def _relevance(self, papers: List[Dict], keyword_configs: List[Optional[Dict]]):
+        """
+        各組關鍵字的 BM25 分數
+        
+        Returns:
+            分數矩陣（論文 × 關鍵字組），沒有設定 ranker 時為 None
+        """
+        if self.ranker is None:
+            return None
+        return self.ranker.score_queries(
+            papers, [(config or {}).get('include', []) for config in keyword_configs]
+        )
+    
+    def _rank(self, indices: List[int], papers: List[Dict], scores=None) -> List[int]:
+        """
+        依相關性排序（同分或沒有分數時依發布時間由新到舊），去掉低於 ranking.min_score 的論文
+        
+        Args:
+            indices: 候選論文的索引
+            papers: 論文列表
+            scores: 每篇論文的分數，None 表示只依發布時間
             
-            # 檢查排除關鍵字
-            if exclude_keywords:
-                has_exclude_keyword = any(
-                    keyword.lower() in text_to_search 
-                    for keyword in exclude_keywords
-                )
-                if has_exclude_keyword:
-                    continue
+        Returns:
+            排序後的索引
+        """
+        order = sorted(indices, key=lambda i: papers[i]['published'], reverse=True)
+        if scores is None:
+            return order
+        min_score = self.ranking.get('min_score', 0)
+        order.sort(key=lambda i: -scores[i])
+        return [i for i in order if scores[i] >= min_score]
+    
+    def _apply_profiles(self, papers: List[Dict]) -> List[Dict]:
+        """
+        對每個設定檔分別套用類別、關鍵字與數量限制（依相關性或發布時間），回傳聯集
+        
+        Args:
+            papers: 論文列表
             
-            filtered_papers.append(paper)
+        Returns:
+            至少屬於一個設定檔的論文（寫入 paper['profiles']），保留原始順序
+        """
+        scores = self._relevance(papers, [profile.get('keywords') for profile in self.profiles])
+        chosen: Dict[int, List[int]] = {}
+        counts = []
+        for j, profile in enumerate(self.profiles):
+            candidates = [i for i, paper in enumerate(papers) if profile_matches(profile, paper)]
+            picked = self._rank(candidates, papers, None if scores is None else scores[:, j])
+            picked = picked[:profile_limit(profile)]
+            for i in picked:
+                chosen.setdefault(i, []).append(j)
+            counts.append(f"{profile['name']} {len(picked)} 篇")
         
-        logger.info(f"🔍 關鍵字過濾: {len(papers)} → {len(filtered_papers)}")
-        return filtered_papers
+        for i, paper in enumerate(papers):
+            if i not in chosen:
+                self._reject(paper)
+        for i, columns in chosen.items():
+            papers[i]['profiles'] = [self.profiles[j]['name'] for j in columns]
+            if scores is not None:
+                papers[i]['relevance'] = round(float(max(scores[i, j] for j in columns)), 4)
+        logger.info("📊 設定檔: " + ", ".join(counts))
+        return [papers[i] for i in sorted(chosen)]
     
     def _apply_limits(self, papers: List[Dict]) -> List[Dict]:
         """
         應用論文數量限制
         
+        有設定 ranker 時依 BM25 相關性由高到低保留，否則保留最新的論文
+        
         Args:
             papers: 論文列表
             
@@ -216,9 +384,23 @@ class ArxivCrawler:
         limits = self.config.get('limits', {})
         max_papers = limits.get('max_papers_per_day', 50)
         
+        if self.ranker is not None:
+            scores = self._relevance(papers, [self.config.get('keywords')])[:, 0]
+            order = self._rank(list(range(len(papers))), papers, scores)[:max_papers]
+            kept = set(order)
+            for i, paper in enumerate(papers):
+                if i not in kept:
+                    self._reject(paper)
+            for i in order:
+                papers[i]['relevance'] = round(float(scores[i]), 4)
+            logger.info(f"📊 依 BM25 相關性保留 {len(order)}/{len(papers)} 篇論文（上限 {max_papers}）")
+            return [papers[i] for i in order]
+        
         if len(papers) > max_papers:
             # 按發布時間排序，取最新的
             papers_sorted = sorted(papers, key=lambda x: x['published'], reverse=True)
+            for paper in papers_sorted[max_papers:]:
+                self._reject(paper)
             papers = papers_sorted[:max_papers]
             logger.info(f"📊 應用論文數量限制: {max_papers}")
         
@@ -239,14 +421,13 @@ class ArxivCrawler:
         
         # 計算搜尋日期範圍
         target_dt = datetime.strptime(target_date, '%Y-%m-%d')
-        recent_days = self.config.get('date_filter', {}).get('recent_days', 3)
+        categories, recent_days = self._search_scope()
         start_date = target_dt - timedelta(days=recent_days)
         date_from = start_date.strftime('%Y%m%d')
         
         logger.info(f"🔍 搜尋日期範圍: {start_date.strftime('%Y-%m-%d')} 到 {target_date}")
         
         # 取得類別列表
-        categories = self.config.get('categories', ['cs.AI', 'cs.LG'])
         logger.info(f"📚 搜尋類別: {categories}")
         
         # 建構搜尋查詢
@@ -262,25 +443,141 @@ class ArxivCrawler:
         logger.info(f"📄 找到 {len(papers)} 篇論文")
         
         # 應用過濾條件
-        papers = self._filter_papers_by_keywords(papers)
-        papers = self._apply_limits(papers)
+        papers = self._select(papers)
         
         logger.info(f"✅ 最終獲得 {len(papers)} 篇論文")
         return papers
     
-    def _search_papers(self, query: str, max_results: int = 100) -> List[Dict]:
+    def crawl_papers(self, target_date: Optional[str] = None) -> List[Dict]:
+        """爬取指定日期的論文（get_papers 的別名）"""
+        return self.get_papers(target_date)
+
+    def latest_submission(self, target_date: Optional[str] = None) -> Optional[str]:
+        """
+        搜尋範圍內最新一篇論文的 ID（只取一筆結果），常駐模式以此偵測新的公告是否已出現
+        
+        Args:
+            target_date: 目標日期 (YYYY-MM-DD)，預設為今日
+            
+        Returns:
+            論文 ID；請求失敗或沒有結果時為 None
+        """
+        if target_date is None:
+            target_date = datetime.utcnow().strftime('%Y-%m-%d')
+        categories, recent_days = self._search_scope()
+        date_from = (datetime.strptime(target_date, '%Y-%m-%d') - timedelta(days=recent_days)).strftime('%Y%m%d')
+        papers = self._search_papers(self._build_search_query(categories, date_from), max_results=1)
+        return papers[0]['id'] if papers else None
+    
+    def iter_papers(self, target_date: Optional[str] = None, page_size: int = 100) -> Iterator[Dict]:
+        """
+        逐篇產生指定日期的論文，解析完一篇就交出一篇（串流版的 get_papers）
+        
+        API 結果依提交時間由新到舊排列，因此取前 max_papers_per_day 篇通過關鍵字條件的論文，
+        與 get_papers 先全部取回再依發布時間截斷的結果相同；不足時會繼續翻頁。
+        有多個設定檔時，每個設定檔各自計算名額，全部額滿或沒有更多結果時才停止。
+        有追蹤作者時，名額用完後仍會翻完日期範圍內的結果，只交出追蹤作者的論文。
+        依相關性排序（ranker）時必須看過所有候選才能決定名單，因此先取回最多
+        ranking.max_candidates 篇，排序後再逐篇交出
+        
+        Args:
+            target_date: 目標日期 (YYYY-MM-DD)，預設為今日
+            page_size: 每次 API 請求的結果數量
+            
+        Yields:
+            論文資訊字典
+        """
+        if target_date is None:
+            target_date = datetime.utcnow().strftime('%Y-%m-%d')
+        
+        target_dt = datetime.strptime(target_date, '%Y-%m-%d')
+        categories, recent_days = self._search_scope()
+        date_from = (target_dt - timedelta(days=recent_days)).strftime('%Y%m%d')
+        max_papers = self.config.get('limits', {}).get('max_papers_per_day', 50)
+        search_query = self._build_search_query(categories, date_from)
+        self.rejected = []
+        if self.ranker is not None:
+            yield from self._iter_ranked(search_query, page_size)
+            return
+        quota = {profile['name']: profile_limit(profile) for profile in self.profiles}
+        
+        def done():
+            if self.profiles:
+                return all(remaining <= 0 for remaining in quota.values())
+            return produced >= max_papers
+        
+        produced = 0
+        dropped = 0
+        followed = 0
+        start = 0
+        while self.followed or not done():
+            page = self._search_papers(search_query, max_results=page_size, start=start)
+            for paper in page:
+                if self._is_followed(paper):
+                    if self.profiles:
+                        self._assign_followed_profiles([paper])
+                    yield paper
+                    followed += 1
+                    continue
+                if done():
+                    continue
+                if not self.profiles and not self._matches_keywords(paper):
+                    self._reject(paper)
+                    continue
+                if self.prefilter is not None and not self.prefilter.keep([paper])[0]:
+                    dropped += 1
+                    continue
+                if self.profiles and not self._assign_profiles(paper, quota):
+                    self._reject(paper)
+                    continue
+                yield paper
+                produced += 1
+                if done() and not self.followed:
+                    break
+            if len(page) < page_size:
+                break
+            start += page_size
+        
+        if dropped:
+            logger.info(f"🎯 預過濾丟棄 {dropped} 篇論文")
+            if self.metrics is not None:
+                self.metrics.count('prefilter', items_in=produced + dropped, items_out=produced)
+        if followed:
+            logger.info(f"👤 追蹤作者: {followed} 篇論文（不受關鍵字與數量限制）")
+        logger.info(f"✅ 串流爬取完成，共 {produced + followed} 篇論文")
+    
+    def _iter_ranked(self, search_query: str, page_size: int) -> Iterator[Dict]:
+        """取回候選論文後依相關性套用數量限制，再逐篇交出（iter_papers 的 ranker 版本）"""
+        max_candidates = self.ranking.get('max_candidates', 500)
+        candidates: List[Dict] = []
+        start = 0
+        while len(candidates) < max_candidates:
+            page = self._search_papers(search_query, max_results=min(page_size, max_candidates - len(candidates)),
+                                       start=start)
+            candidates.extend(page)
+            if len(page) < page_size:
+                break
+            start += page_size
+        
+        papers = self._select(candidates)
+        logger.info(f"✅ 候選 {len(candidates)} 篇，依相關性保留 {len(papers)} 篇論文")
+        yield from papers
+    
+    def _search_papers(self, query: str, max_results: int = 100, start: int = 0) -> List[Dict]:
         """
         執行 arXiv 搜尋
         
         Args:
             query: 搜尋查詢
             max_results: 最大結果數量
+            start: 結果的起始位置（翻頁用）
             
         Returns:
             論文列表
         """
         params = {
             'search_query': query,
+            'start': start,
             'max_results': max_results,
             'sortBy': 'submittedDate',
             'sortOrder': 'descending'
@@ -293,23 +590,28 @@ class ArxivCrawler:
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            # 解析 XML 回應
-            root = ET.fromstring(response.content)
-            
-            # 檢查是否有錯誤
-            for message in root.findall('.//{http://www.w3.org/2005/Atom}title'):
-                if 'Error' in message.text:
-                    logger.error(f"❌ arXiv API 錯誤: {message.text}")
-                    return []
-            
-            # 解析論文條目
-            papers = []
-            entries = root.findall('{http://www.w3.org/2005/Atom}entry')
-            
-            for entry in entries:
-                paper = self._parse_paper_entry(entry)
-                if paper:
-                    papers.append(paper)
+            # 每頁量測一次，不在逐篇解析的迴圈中計時
+            with self.metrics.measure('parse') if self.metrics else nullcontext():
+                # 解析 XML 回應
+                root = ET.fromstring(response.content)
+                
+                # 檢查是否有錯誤
+                for message in root.findall('.//{http://www.w3.org/2005/Atom}title'):
+                    if 'Error' in message.text:
+                        logger.error(f"❌ arXiv API 錯誤: {message.text}")
+                        self._record_error()
+                        return []
+                
+                # 解析論文條目
+                papers = []
+                entries = root.findall('{http://www.w3.org/2005/Atom}entry')
+                
+                for entry in entries:
+                    paper = self._parse_paper_entry(entry)
+                    if paper:
+                        papers.append(paper)
+            if self.metrics:
+                self.metrics.count('parse', items_in=len(entries), items_out=len(papers))
             
             # API 請求限制：每 3 秒最多 1 次請求
             time.sleep(3)
@@ -318,14 +620,22 @@ class ArxivCrawler:
             
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ 網路請求失敗: {e}")
+            self._record_error()
             return []
         except ET.ParseError as e:
+            # 已由 parse 階段的量測記錄錯誤
             logger.error(f"❌ XML 解析失敗: {e}")
             return []
         except Exception as e:
             logger.error(f"❌ 搜尋論文時發生未知錯誤: {e}")
+            self._record_error()
             return []
     
+    def _record_error(self):
+        """記錄爬取階段的錯誤（錯誤不會往上拋出，只回傳空結果）"""
+        if self.metrics:
+            self.metrics.error('crawl')
+    
     def get_paper_categories_stats(self, papers: List[Dict]) -> Dict[str, int]:
         """
         取得論文類別統計
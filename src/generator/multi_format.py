@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+多格式輸出
+論文資料只載入一次，建立共用的渲染模型後依序輸出 Markdown、HTML、JSON Feed 與 RSS
+（範本渲染是 CPU 工作，在 GIL 下以執行緒平行沒有好處）
+
+每種格式的指紋由輸入資料、範本原始碼與格式設定計算；指紋未變且輸出檔仍存在時略過該格式。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m generator.multi_format --data data/2025-06-10_AI_enhanced_Chinese.jsonl
+    PYTHONPATH=src python -m generator.multi_format --data ... --formats html,json,rss --force
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import logging
+from datetime import datetime
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from generator.report_generator import (
+    BYTECODE_CACHE_DIR, PROJECT_ROOT, TEMPLATE_DIR,
+    extract_statistics, get_environment,
+)
+from utils.atomic import write_atomic
+
+logger = logging.getLogger(__name__)
+
+RENDERER_VERSION = 3
+SITE_URL = "https://github.com/audi0417/daily-arxiv-ai-summary"
+
+# 格式名稱 → 範本（None 表示由程式產生）與輸出路徑（相對於輸出根目錄）
+FORMATS: Dict[str, Dict[str, Optional[str]]] = {
+    'markdown': {'template': 'report_template.md.j2', 'output': 'data/{date}.md'},
+    'html': {'template': 'report_template.html.j2', 'output': 'data/html/{date}.html'},
+    'json': {'template': None, 'output': 'assets/feed.json'},
+    'rss': {'template': 'feed.rss.j2', 'output': 'assets/feed.xml'},
+}
+
+# LANGUAGE（輸出語言名稱）→ 訂閱源的語言代碼
+LANGUAGE_CODES = {
+    'english': 'en',
+    'chinese': 'zh-TW',
+    'traditional chinese': 'zh-TW',
+    'simplified chinese': 'zh-CN',
+    'japanese': 'ja',
+    'korean': 'ko',
+    'french': 'fr',
+    'german': 'de',
+    'spanish': 'es',
+}
+
+
+def language_code(language: Optional[str] = None) -> str:
+    """
+    輸出語言名稱對應的語言代碼
+
+    Args:
+        language: 語言名稱，預設讀取 LANGUAGE（與 GeminiEnhancer 相同預設為 Traditional Chinese）
+
+    Returns:
+        語言代碼，無法對應時為 'en'
+    """
+    language = (language or os.getenv('LANGUAGE', 'Traditional Chinese')).strip()
+    return LANGUAGE_CODES.get(language.lower(), 'en')
+
+
+def normalize_fields(paper: Dict) -> Dict:
+    """
+    統一範本使用的欄位：舊版爬蟲（scrapy）與 enhance.py 的紀錄只有 abs/pdf，
+    沒有 entry_id/pdf_url 與 published
+
+    Returns:
+        含 entry_id、pdf_url 與 published 的論文（欄位齊全時為原物件，否則為淺複製）
+    """
+    if paper.get('entry_id') and paper.get('pdf_url') and 'published' in paper:
+        return paper
+    return {
+        **paper,
+        'entry_id': paper.get('entry_id') or paper.get('abs') or '',
+        'pdf_url': paper.get('pdf_url') or paper.get('pdf') or '',
+        'published': paper.get('published') or '',
+    }
+
+
+def build_model(papers: List[Dict], date: str, preference: Optional[List[str]] = None,
+                language: Optional[str] = None) -> Dict:
+    """
+    建立所有格式共用的渲染模型（只走訪論文一次）
+
+    Args:
+        papers: AI 增強後的論文
+        date: 報告日期（YYYY-MM-DD）
+        preference: 類別排序偏好，未列出的類別依名稱排在後面
+        language: 論文摘要的語言代碼，預設由 LANGUAGE 推得
+
+    Returns:
+        範本資料
+    """
+    preference = preference or []
+    papers = [normalize_fields(paper) for paper in papers]
+    groups: Dict[str, List[Dict]] = {}
+    topics: Dict[int, tuple] = {}
+    for paper in papers:
+        category = (paper.get('categories') or ['other'])[0]
+        groups.setdefault(category, []).append(paper)
+        # 主題分群（paper['topic']）；沒有分群時報告依類別或原始順序排列
+        topic = paper.get('topic')
+        if topic:
+            topics.setdefault(topic['id'], (topic, []))[1].append(paper)
+
+    def rank(category):
+        return (preference.index(category) if category in preference else len(preference), category)
+
+    return {
+        'date': date,
+        'language': language or language_code(),
+        'papers': papers,
+        'categories': [(c, groups[c]) for c in sorted(groups, key=rank)],
+        # 「其他」（id 0）排在最後
+        'topics': [topics[t] for t in sorted(topics, key=lambda t: (t == 0, t))],
+        'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'pub_date': format_datetime(datetime.strptime(date, '%Y-%m-%d').astimezone()),
+        'site_url': SITE_URL,
+        **extract_statistics(papers),
+    }
+
+
+def input_digest(papers: List[Dict], date: str) -> str:
+    """輸入資料的雜湊（不含生成時間，重跑相同資料時指紋不變）"""
+    digest = hashlib.sha256(date.encode('utf-8'))
+    for paper in papers:
+        digest.update(json.dumps(paper, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_json_feed(model: Dict) -> Iterator[str]:
+    """產生 JSON Feed 1.1"""
+    feed = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': '每日 ArXiv 論文智慧摘要',
+        'home_page_url': model['site_url'],
+        'description': f"由 AI 自動生成的 ArXiv 論文摘要（{model['date']}，共 {model['total_papers']} 篇）",
+        'language': model['language'],
+        'items': [
+            {
+                'id': f"arxiv:{paper.get('id', '')}",
+                'url': paper['entry_id'] or None,
+                'title': paper.get('title', ''),
+                'summary': (paper.get('AI') or {}).get('tldr', ''),
+                'content_text': (paper.get('AI') or {}).get('summary_zh') or paper.get('summary', ''),
+                'date_published': f"{model['date']}T00:00:00Z",
+                'authors': [{'name': name} for name in paper.get('authors', [])],
+                'tags': paper.get('categories', []),
+            }
+            for paper in model['papers']
+        ],
+    }
+    yield json.dumps(feed, ensure_ascii=False, indent=2)
+    yield "\n"
+
+
+class MultiFormatRenderer:
+    """多格式渲染器"""
+
+    def __init__(self, output_root: Path = PROJECT_ROOT,
+                 template_dir: Path = TEMPLATE_DIR,
+                 cache_dir: Optional[Path] = BYTECODE_CACHE_DIR,
+                 fingerprint_file: Optional[Path] = None,
+                 language: Optional[str] = None):
+        """
+        初始化渲染器
+
+        Args:
+            output_root: 輸出根目錄，FORMATS 中的路徑相對於此目錄
+            template_dir: 範本目錄
+            cache_dir: Jinja2 bytecode 快取目錄
+            fingerprint_file: 指紋紀錄檔，預設為輸出根目錄下的 .cache/render_fingerprints.json
+            language: 論文摘要的語言代碼，預設由 LANGUAGE 推得
+        """
+        self.output_root = Path(output_root)
+        self.environment = get_environment(template_dir, cache_dir)
+        self.fingerprint_file = Path(fingerprint_file or self.output_root / ".cache" / "render_fingerprints.json")
+        self.language = language or language_code()
+
+    def output_path(self, fmt: str, date: str) -> Path:
+        return self.output_root / FORMATS[fmt]['output'].format(date=date)
+
+    def _load_fingerprints(self) -> Dict[str, str]:
+        if not self.fingerprint_file.exists():
+            return {}
+        with open(self.fingerprint_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_fingerprints(self, fingerprints: Dict[str, str]):
+        write_atomic(self.fingerprint_file, [json.dumps(fingerprints, indent=2, sort_keys=True)])
+
+    def fingerprint(self, fmt: str, digest: str) -> str:
+        """格式指紋：輸入雜湊 + 範本原始碼 + 格式設定 + 語言 + 渲染器版本"""
+        spec = FORMATS[fmt]
+        h = hashlib.sha256(
+            f"{RENDERER_VERSION}\0{fmt}\0{spec['output']}\0{self.language}\0{digest}".encode('utf-8')
+        )
+        if spec['template']:
+            source, _, _ = self.environment.loader.get_source(self.environment, spec['template'])
+            h.update(source.encode('utf-8'))
+        return h.hexdigest()
+
+    def _render_one(self, fmt: str, model: Dict, output_file: Path):
+        template_name = FORMATS[fmt]['template']
+        if template_name is None:
+            chunks = render_json_feed(model)
+        else:
+            chunks = self.environment.get_template(template_name).generate(**model)
+        write_atomic(output_file, chunks)
+
+    def render(self, papers: List[Dict], date: str, formats: Optional[List[str]] = None,
+               preference: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """
+        渲染所有指定格式
+
+        Args:
+            papers: AI 增強後的論文
+            date: 報告日期
+            formats: 要輸出的格式，預設為全部
+            preference: 類別排序偏好
+            force: 忽略指紋，全部重新渲染
+
+        Returns:
+            {格式: 'rendered' | 'skipped' | 'failed: <錯誤>'}
+        """
+        formats = formats or list(FORMATS)
+        unknown = [fmt for fmt in formats if fmt not in FORMATS]
+        if unknown:
+            raise ValueError(f"未知的輸出格式: {', '.join(unknown)}")
+
+        digest = input_digest(papers, date)
+        fingerprints = self._load_fingerprints()
+        results: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+        for fmt in formats:
+            key = str(self.output_path(fmt, date).relative_to(self.output_root))
+            fp = self.fingerprint(fmt, digest)
+            if not force and fingerprints.get(key) == fp and self.output_path(fmt, date).exists():
+                results[fmt] = 'skipped'
+            else:
+                pending[fmt] = fp
+
+        if pending:
+            model = build_model(papers, date, preference, self.language)
+            for fmt, fp in pending.items():
+                try:
+                    self._render_one(fmt, model, self.output_path(fmt, date))
+                except Exception as error:
+                    results[fmt] = f"failed: {error}"
+                    logger.error(f"❌ 渲染 {fmt} 時發生錯誤: {error}")
+                else:
+                    results[fmt] = 'rendered'
+                    fingerprints[str(self.output_path(fmt, date).relative_to(self.output_root))] = fp
+            self._save_fingerprints(fingerprints)
+
+        logger.info("🖨️ 多格式輸出: " + ", ".join(f"{fmt}={status}" for fmt, status in results.items()))
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """多格式輸出命令列工具"""
+    parser = argparse.ArgumentParser(description="由 AI 增強後的 JSONL 產生多種格式的報告")
+    parser.add_argument("--data", type=Path, required=True, help="AI 增強後的 JSONL 檔案")
+    parser.add_argument("--date", help="報告日期，預設取檔名開頭")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="以逗號分隔的格式")
+    parser.add_argument("--output-root", type=Path, default=PROJECT_ROOT, help="輸出根目錄")
+    parser.add_argument("--force", action="store_true", help="忽略指紋，全部重新渲染")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    from utils.jsonl_codec import iter_jsonl
+
+    papers = list(iter_jsonl(args.data))
+    date = args.date or args.data.name[:10]
+    preference = [c.strip() for c in (os.environ.get('CATEGORIES') or '').split(',') if c.strip()]
+    renderer = MultiFormatRenderer(output_root=args.output_root)
+    results = renderer.render(papers, date, args.formats.split(','), preference, force=args.force)
+    print(json.dumps(results, ensure_ascii=False))
+    return 0 if all(not status.startswith('failed') for status in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
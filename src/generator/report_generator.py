@@ -3,111 +3,106 @@
 將處理後的論文資料生成美化的 Markdown 報告
 """
 
-import os
 from pathlib import Path
-from typing import List, Dict
+from typing import TYPE_CHECKING, Dict, List, Optional
 from datetime import datetime
-from jinja2 import Template
 from collections import Counter
 
+from utils.atomic import write_atomic
 
-class ReportGenerator:
-    """報告生成器類別"""
-    
-    def __init__(self):
-        """初始化生成器"""
-        self.template = self._get_report_template()
-        print("📝 報告生成器初始化完成")
-    
-    def _get_report_template(self) -> Template:
-        """取得報告範本"""
-        template_str = """
-# 每日 ArXiv 論文智慧摘要: {{ date }}
-
-> 🤖 由 AI 自動生成的論文摘要報告
-> 
-> 📊 本日共處理 {{ total_papers }} 篇論文
-> 
-> 🕒 生成時間: {{ generation_time }}
-
----
-
-{% for paper in papers %}
-## [{{ paper.title }}]({{ paper.entry_id }})
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
 
-**📝 一句話摘要**
-{{ paper.AI.tldr }}
 
-**👥 作者:** {{ paper.authors | join(', ') }}
-**🏷️ 類別:** {{ paper.categories | join(', ') }}
-**📅 發布日期:** {{ paper.published[:10] }}
-{% if paper.AI.keywords %}**🔍 關鍵詞:** {{ paper.AI.keywords | join(', ') }}{% endif %}
-{% if paper.AI.difficulty %}**⭐ 技術難度:** {{ paper.AI.difficulty }}{% endif %}
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+TEMPLATE_DIR = PROJECT_ROOT / "templates"
+BYTECODE_CACHE_DIR = PROJECT_ROOT / ".cache" / "jinja2"
 
-[**📄 論文連結**]({{ paper.entry_id }}) | [**📑 PDF 下載**]({{ paper.pdf_url }})
+_environments: Dict[tuple, "Environment"] = {}
 
-### 🎯 研究動機
-{{ paper.AI.motivation }}
 
-### 🔬 方法介紹  
-{{ paper.AI.method }}
+def get_environment(template_dir: Path = TEMPLATE_DIR,
+                    cache_dir: Optional[Path] = BYTECODE_CACHE_DIR) -> "Environment":
+    """
+    取得共用的 Jinja2 環境
 
-### 📈 實驗結果
-{{ paper.AI.result }}
+    同一程序內重複使用已編譯的範本；編譯後的 bytecode 寫入 `cache_dir`，跨程序也不必重新編譯。
+    jinja2 在第一次建立環境時才載入，只用到統計等工具函數的程式不必付出載入成本
 
-### 💡 研究結論
-{{ paper.AI.conclusion }}
+    Args:
+        template_dir: 範本目錄
+        cache_dir: bytecode 快取目錄，None 表示不使用磁碟快取
+    """
+    key = (str(template_dir), str(cache_dir))
+    if key not in _environments:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-### 📋 繁體中文摘要
-> {{ paper.AI.summary_zh }}
+        bytecode_cache = None
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+        _environments[key] = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            bytecode_cache=bytecode_cache,
+            auto_reload=True,
+        )
+    return _environments[key]
 
----
 
-{% endfor %}
-
-## 📊 本日統計
-
-- **論文總數:** {{ total_papers }}
-- **主要類別:** {{ main_categories | join(', ') }}
-- **平均作者數:** {{ avg_authors | round(1) }}
-
-## 🔗 相關連結
-
-- [ArXiv 官網](https://arxiv.org/)
-- [專案 GitHub](https://github.com/audi0417/daily-arxiv-ai-summary)
+def extract_statistics(papers: List[Dict]) -> Dict:
+    """提取論文統計資訊"""
+    if not papers:
+        return {
+            'total_papers': 0,
+            'main_categories': [],
+            'avg_authors': 0
+        }
+    
+    # 統計類別分布
+    all_categories = []
+    for paper in papers:
+        all_categories.extend(paper.get('categories', []))
+    
+    category_counter = Counter(all_categories)
+    main_categories = [cat for cat, _ in category_counter.most_common(5)]
+    
+    # 計算平均作者數
+    total_authors = sum(len(paper.get('authors', [])) for paper in papers)
+    avg_authors = total_authors / len(papers) if papers else 0
+    
+    return {
+        'total_papers': len(papers),
+        'main_categories': main_categories,
+        'avg_authors': avg_authors
+    }
 
----
 
-*本報告由 AI 自動生成，如有任何問題請提交 Issue。*
-"""
-        return Template(template_str)
+class ReportGenerator:
+    """報告生成器類別"""
+    
+    def __init__(self, template_name: str = "report_template.md.j2",
+                 template_dir: Path = TEMPLATE_DIR,
+                 cache_dir: Optional[Path] = BYTECODE_CACHE_DIR):
+        """
+        初始化生成器
+        
+        Args:
+            template_name: 範本檔案名稱
+            template_dir: 範本目錄
+            cache_dir: Jinja2 bytecode 快取目錄
+        """
+        self.environment = get_environment(template_dir, cache_dir)
+        self.template_name = template_name
+        self.template = self._get_report_template()
+        print("📝 報告生成器初始化完成")
+    
+    def _get_report_template(self) -> "Template":
+        """取得報告範本"""
+        return self.environment.get_template(self.template_name)
     
     def _extract_statistics(self, papers: List[Dict]) -> Dict:
         """提取論文統計資訊"""
-        if not papers:
-            return {
-                'total_papers': 0,
-                'main_categories': [],
-                'avg_authors': 0
-            }
-        
-        # 統計類別分布
-        all_categories = []
-        for paper in papers:
-            all_categories.extend(paper.get('categories', []))
-        
-        category_counter = Counter(all_categories)
-        main_categories = [cat for cat, _ in category_counter.most_common(5)]
-        
-        # 計算平均作者數
-        total_authors = sum(len(paper.get('authors', [])) for paper in papers)
-        avg_authors = total_authors / len(papers) if papers else 0
-        
-        return {
-            'total_papers': len(papers),
-            'main_categories': main_categories,
-            'avg_authors': avg_authors
-        }
+        return extract_statistics(papers)
     
     def generate_report(self, papers: List[Dict], output_file: Path, date: str) -> bool:
         """生成 Markdown 報告"""
@@ -125,15 +120,8 @@ class ReportGenerator:
                 **stats
             }
             
-            # 渲染範本
-            report_content = self.template.render(**template_data)
-            
-            # 確保輸出目錄存在
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 寫入檔案
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(report_content)
+            # 邊渲染邊寫入暫存檔，完成後再改名
+            write_atomic(output_file, self.template.generate(**template_data))
             
             print(f"✅ 報告生成完成: {output_file}")
             return True
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+靜態搜尋索引
+將 AI 增強後的歷史論文建立倒排索引，依詞彙前綴與月份切成小型 JSON 分片，
+靜態網頁只需依查詢詞下載對應的分片
+
+目錄結構（assets/search/）:
+    meta.json                   各月份的分片清單、每日的文件編號起點
+    YYYY-MM/docs-<n>.json       該月份第 n 段文件（每段 DOC_CHUNK 篇，文件依日期排序）
+    YYYY-MM/terms-<前綴>.json    {詞彙: [[文件編號, 欄位位元遮罩], ...]}
+
+查詢時先以詞彙分片算出分數，排序後只下載前幾名所在的文件段；
+每日新增只需改寫受影響的詞彙分片與最後一個文件段。
+
+英數詞彙依前綴分片；中日文沒有空白分詞，連續的漢字與假名切成相鄰兩字的雙字詞
+（只有一個字時保留單字），依第一個字的編碼分到 CJK_SHARDS 個分片（terms-x<nn>.json），
+查詢字串以相同方式切分後要求所有雙字詞都命中。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m generator.search_index build
+    PYTHONPATH=src python -m generator.search_index build --if-enabled   # 依 topics.yaml 的 history.search_index
+    PYTHONPATH=src python -m generator.search_index query "diffusion policy"
+"""
+
+import re
+import sys
+import json
+import shutil
+import argparse
+import logging
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.atomic import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+DOC_CHUNK = 250
+FIELDS = {'title': 1, 'tldr': 2, 'keywords': 4, 'authors': 8}
+FIELD_WEIGHTS = {1: 3.0, 2: 1.5, 4: 2.0, 8: 2.5}
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+WORD = re.compile(f"[a-z0-9]+|[{CJK}]+")
+CJK_SHARDS = 64
+STOPWORDS = frozenset("""
+a an and are as at be by for from in into is it its of on or that the their this to via we with
+""".split())
+DATE_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})_.*AI_enhanced.*\.jsonl$')
+
+
+def tokenize(text: str) -> List[str]:
+    """切成小寫英數詞彙（移除長度不足 2 的詞與常見虛詞）與中日文雙字詞"""
+    terms = []
+    for word in WORD.findall(text.lower()):
+        if word[0] < '\u3040':
+            if len(word) > 1 and word not in STOPWORDS:
+                terms.append(word)
+        elif len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def shard_key(term: str, prefix_length: int) -> str:
+    """詞彙所在的分片：英數詞彙取前綴，中日文依第一個字的編碼分組（同一個字開頭的詞在同一分片，支援前綴比對）"""
+    if term[0] < '\u3040':
+        return term[:prefix_length]
+    return f"x{ord(term[0]) % CJK_SHARDS:02x}"
+
+
+def _atomic_write_json(path: Path, data) -> int:
+    """原子寫入精簡格式的 JSON，回傳位元組數"""
+    return write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+class SearchIndexBuilder:
+    """分片倒排索引建立器"""
+
+    def __init__(self, out_dir: Path, prefix_length: int = 2):
+        """
+        Args:
+            out_dir: 索引輸出目錄（通常為 assets/search）
+            prefix_length: 分片依詞彙前綴的長度（僅在建立新索引時使用）
+        """
+        self.out_dir = Path(out_dir)
+        self.meta_path = self.out_dir / "meta.json"
+        self.meta = None
+        if self.meta_path.exists():
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != INDEX_VERSION:
+                # 舊版索引的分詞方式不同，移除後由 build_from_archive 重建
+                logger.warning(f"⚠️ 搜尋索引版本不符（{self.meta.get('version')} → {INDEX_VERSION}），將重新建立")
+                for month in self.meta.get('ranges', {}):
+                    shutil.rmtree(self.out_dir / month, ignore_errors=True)
+                self.meta = None
+        if self.meta is None:
+            self.meta = {'version': INDEX_VERSION, 'prefix_length': prefix_length,
+                         'doc_chunk': DOC_CHUNK, 'fields': FIELDS, 'ranges': {}}
+        self.prefix_length = self.meta['prefix_length']
+        self.doc_chunk = self.meta['doc_chunk']
+
+    def indexed_dates(self) -> List[str]:
+        """已建立索引的日期"""
+        return sorted(d for r in self.meta['ranges'].values() for d in r['days'])
+
+    @staticmethod
+    def _doc(date: str, paper: Dict) -> Dict:
+        ai = paper.get('AI') or {}
+        paper_id = paper.get('id') or paper.get('arxiv_id') or ''
+        return {
+            'id': paper_id,
+            'date': date,
+            'title': paper.get('title', ''),
+            'tldr': ai.get('tldr', ''),
+            'keywords': ai.get('keywords', []),
+            'authors': paper.get('authors', []),
+            'url': paper.get('abs') or paper.get('arxiv_url') or f"https://arxiv.org/abs/{paper_id}",
+        }
+
+    def _shards_by_prefix(self, docs: Iterable[Tuple[int, Dict]]) -> Dict[str, Dict[str, Dict[int, int]]]:
+        """{前綴: {詞彙: {文件編號: 欄位遮罩}}}"""
+        shards: Dict[str, Dict[str, Dict[int, int]]] = {}
+        for doc_no, doc in docs:
+            for field, bit in FIELDS.items():
+                value = doc.get(field) or ''
+                if isinstance(value, list):
+                    value = ' '.join(value)
+                for term in set(tokenize(value)):
+                    entry = shards.setdefault(shard_key(term, self.prefix_length), {}).setdefault(term, {})
+                    entry[doc_no] = entry.get(doc_no, 0) | bit
+        return shards
+
+    def _read_json(self, path: Path, default):
+        if not path.exists():
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_docs(self, month: str, docs: List[Dict], first_chunk: int = 0):
+        """寫入文件段；docs[0] 為第 first_chunk 段的第一篇"""
+        for i in range(0, len(docs), self.doc_chunk):
+            _atomic_write_json(self.out_dir / month / f"docs-{first_chunk + i // self.doc_chunk}.json",
+                               docs[i:i + self.doc_chunk])
+
+    def _load_docs(self, month: str) -> List[Dict]:
+        docs = []
+        for chunk in range((self.meta['ranges'][month]['docs'] + self.doc_chunk - 1) // self.doc_chunk):
+            docs.extend(self._read_json(self.out_dir / month / f"docs-{chunk}.json", []))
+        return docs
+
+    def add_day(self, date: str, papers: Iterable[Dict]) -> int:
+        """
+        將一天的論文併入索引
+
+        晚於該月份最後一天的新日期只讀寫受影響的分片；
+        重跑或補跑較早的日期時，會以既有文件重建該月份（保持文件依日期排序）
+
+        Returns:
+            加入的文件數量
+        """
+        month = date[:7]
+        (self.out_dir / month).mkdir(parents=True, exist_ok=True)
+        new_docs = [self._doc(date, p) for p in papers]
+        info = self.meta['ranges'].get(month)
+
+        if info is None or not info['days'] or date > max(info['days']):
+            info = info or self.meta['ranges'].setdefault(month, {'docs': 0, 'days': {}, 'shards': {}})
+            start = info['docs']
+            for prefix, terms in self._shards_by_prefix(enumerate(new_docs, start)).items():
+                path = self.out_dir / month / f"terms-{prefix}.json"
+                shard = self._read_json(path, {})
+                for term, entry in terms.items():
+                    shard.setdefault(term, []).extend([doc_no, mask] for doc_no, mask in entry.items())
+                info['shards'][prefix] = {'terms': len(shard), 'bytes': _atomic_write_json(path, shard)}
+
+            # 只改寫最後一個（未滿的）文件段與其後的新段
+            last_chunk = start // self.doc_chunk
+            docs = self._read_json(self.out_dir / month / f"docs-{last_chunk}.json", [])
+            self._write_docs(month, docs + new_docs, first_chunk=last_chunk)
+            info['days'][date] = start
+            info['docs'] = start + len(new_docs)
+        else:
+            docs = [d for d in self._load_docs(month) if d['date'] != date] + new_docs
+            self._rebuild_range(month, docs)
+
+        _atomic_write_json(self.meta_path, self.meta)
+        logger.info(f"🔎 搜尋索引加入 {date}: {len(new_docs)} 篇論文")
+        return len(new_docs)
+
+    def _rebuild_range(self, month: str, docs: List[Dict]):
+        range_dir = self.out_dir / month
+        for old in list(range_dir.glob("terms-*.json")) + list(range_dir.glob("docs-*.json")):
+            old.unlink()
+        docs.sort(key=lambda d: d['date'])
+        days: Dict[str, int] = {}
+        for doc_no, doc in enumerate(docs):
+            days.setdefault(doc['date'], doc_no)
+
+        shards = {}
+        for prefix, terms in self._shards_by_prefix(enumerate(docs)).items():
+            shard = {term: [[doc_no, mask] for doc_no, mask in sorted(entry.items())]
+                     for term, entry in terms.items()}
+            shards[prefix] = {'terms': len(shard),
+                              'bytes': _atomic_write_json(range_dir / f"terms-{prefix}.json", shard)}
+        self._write_docs(month, docs)
+        self.meta['ranges'][month] = {'docs': len(docs), 'days': days, 'shards': shards}
+
+    def build_from_archive(self, data_dir: Path) -> int:
+        """把資料目錄（含封存包）中尚未建立索引的日期加入索引"""
+        from processor.archive import DataArchive
+        from processor.data_processor import paper_key
+
+        archive = DataArchive(data_dir)
+        by_date: Dict[str, List[str]] = {}
+        for name in archive.glob("*_AI_enhanced*.jsonl"):
+            match = DATE_FILE.match(name)
+            if match:
+                by_date.setdefault(match.group(1), []).append(name)
+
+        added = 0
+        for date in sorted(set(by_date) - set(self.indexed_dates())):
+            papers = {}
+            for name in by_date[date]:
+                for paper in archive.iter_records(name):
+                    papers.setdefault(paper_key(paper), paper)
+            added += self.add_day(date, papers.values())
+        return added
+
+
+class SearchIndex:
+    """索引查詢端：只載入查詢所需的分片（Python 版，與靜態網頁的查詢邏輯相同）"""
+
+    def __init__(self, index_dir: Path, cache_size: int = 256):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / "meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.prefix_length = self.meta['prefix_length']
+        self.doc_chunk = self.meta['doc_chunk']
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, object]" = OrderedDict()
+        self.bytes_loaded = 0
+
+    def _load(self, relative: str):
+        if relative in self._cache:
+            self._cache.move_to_end(relative)
+            return self._cache[relative]
+        with open(self.index_dir / relative, 'rb') as f:
+            payload = f.read()
+        self.bytes_loaded += len(payload)
+        data = json.loads(payload)
+        self._cache[relative] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    @staticmethod
+    def _doc_range(info: Dict, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        """以每日起點換算日期範圍對應的文件編號範圍 [lo, hi)"""
+        days = sorted(info['days'].items())
+        dates = [d for d, _ in days]
+
+        def first_doc(i: int) -> int:
+            return days[i][1] if i < len(days) else info['docs']
+
+        lo = first_doc(bisect_left(dates, start)) if start else 0
+        hi = first_doc(bisect_right(dates, end)) if end else info['docs']
+        return lo, hi
+
+    def _score_month(self, month: str, terms: List[str], prefix_last: bool) -> Dict[int, float]:
+        shards = self.meta['ranges'][month]['shards']
+        scores: Optional[Dict[int, float]] = None
+        for i, term in enumerate(terms):
+            prefix = shard_key(term, self.prefix_length)
+            if prefix not in shards:
+                return {}
+            shard = self._load(f"{month}/terms-{prefix}.json")
+            if prefix_last and i == len(terms) - 1:
+                matched = [postings for t, postings in shard.items() if t.startswith(term)]
+            else:
+                matched = [shard[term]] if term in shard else []
+
+            term_scores: Dict[int, float] = {}
+            for postings in matched:
+                for doc_no, mask in postings:
+                    weight = sum(w for bit, w in FIELD_WEIGHTS.items() if mask & bit)
+                    term_scores[doc_no] = max(term_scores.get(doc_no, 0.0), weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {d: s + term_scores[d] for d, s in scores.items() if d in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def query(self, text: str, start: Optional[str] = None, end: Optional[str] = None,
+              limit: int = 20, prefix_last: bool = True) -> List[Dict]:
+        """
+        搜尋論文（所有查詢詞皆需命中；最後一個詞允許前綴比對）
+
+        Args:
+            text: 查詢字串
+            start: 起始日期（YYYY-MM-DD，含）
+            end: 結束日期（YYYY-MM-DD，含）
+            limit: 回傳數量上限
+            prefix_last: 最後一個詞是否以前綴比對（輸入中的即時搜尋）
+
+        Returns:
+            依分數、日期由新到舊排序的文件列表，每筆附上 score
+        """
+        terms = tokenize(text)
+        if not terms:
+            return []
+
+        hits: List[Tuple[float, str, int]] = []
+        for month, info in self.meta['ranges'].items():
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            lo, hi = self._doc_range(info, start, end)
+            if lo >= hi:
+                continue
+            for doc_no, score in self._score_month(month, terms, prefix_last).items():
+                if lo <= doc_no < hi:
+                    hits.append((score, month, doc_no))
+
+        # 同月份內文件依日期排序，因此 (月份, 文件編號) 即為日期順序
+        hits.sort(reverse=True)
+        results = []
+        for score, month, doc_no in hits[:limit]:
+            docs = self._load(f"{month}/docs-{doc_no // self.doc_chunk}.json")
+            results.append({**docs[doc_no % self.doc_chunk], 'score': score})
+        return results
+
+
+def search_index_enabled(config_path: Path) -> bool:
+    """設定檔中是否啟用靜態搜尋索引（history.search_index，預設關閉）"""
+    import yaml
+
+    if not Path(config_path).exists():
+        return False
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    return bool((config.get('history') or {}).get('search_index', False))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """搜尋索引命令列工具"""
+    parser = argparse.ArgumentParser(description="靜態搜尋索引")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄")
+    parser.add_argument("--index-dir", type=Path, default=Path("assets") / "search", help="索引目錄")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="增量建立索引")
+    build.add_argument("--if-enabled", action="store_true",
+                       help="只在設定檔的 history.search_index 為 true 時建立")
+    build.add_argument("--config", type=Path, default=Path("config") / "topics.yaml", help="設定檔")
+    query = sub.add_parser("query", help="查詢索引")
+    query.add_argument("text")
+    query.add_argument("--start", help="起始日期 (YYYY-MM-DD)")
+    query.add_argument("--end", help="結束日期 (YYYY-MM-DD)")
+    query.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "build":
+        if args.if_enabled and not search_index_enabled(args.config):
+            print("ℹ️ history.search_index 未啟用，略過搜尋索引")
+            return 0
+        builder = SearchIndexBuilder(args.index_dir)
+        print(f"✅ 新增 {builder.build_from_archive(args.data_dir)} 篇論文到搜尋索引")
+        return 0
+
+    if not (args.index_dir / "meta.json").exists():
+        print(f"找不到搜尋索引: {args.index_dir}", file=sys.stderr)
+        return 1
+    index = SearchIndex(args.index_dir)
+    for doc in index.query(args.text, args.start, args.end, args.limit):
+        print(f"{doc['score']:5.1f}  {doc['date']}  {doc['id']}  {doc['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
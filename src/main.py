@@ -6,56 +6,191 @@
 
 import os
 import sys
+import argparse
 import logging
 import yaml
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from typing import List, Dict, Optional
 
-# 新增專案根目錄到 Python 路徑
+# 新增 src 到 Python 路徑（放在最前面，避免專案根目錄的舊版 ai/ 套件遮蔽 src/ai）
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
 
 # 修正導入路徑 - 使用相對導入
+# 只匯入規劃階段需要的輕量模組；爬蟲（requests）、本地特徵（numpy）、範本（jinja2）與模型 SDK
+# 在第一次使用時才載入，--help、--dry-run 與所有階段都沿用快取的執行不必付出載入成本
 try:
-    from crawler.arxiv_crawler import ArxivCrawler
-    from processor.data_processor import DataProcessor
-    from ai.gemini_enhancer import GeminiEnhancer
-    from generator.report_generator import ReportGenerator
+    from processor.data_processor import DataProcessor, paper_key
+    from pipeline.orchestrator import STAGES, PipelineCancelled, checkpoint_paths
+    from pipeline.stage_cache import StageCache
+    from generator.report_generator import extract_statistics
+    from generator.multi_format import FORMATS
     from utils.config_loader import ConfigLoader
     from utils.logger import setup_logger
+    from utils.manifest import ReportManifest
+    from utils.metrics import PipelineMetrics, write_run_metrics
+    from utils.profiles import load_profiles, profile_view
 except ImportError:
     # 如果相對導入失敗，嘗試絕對導入
     sys.path.append(str(project_root / "src"))
-    from crawler.arxiv_crawler import ArxivCrawler
-    from processor.data_processor import DataProcessor
-    from ai.gemini_enhancer import GeminiEnhancer
-    from generator.report_generator import ReportGenerator
+    from processor.data_processor import DataProcessor, paper_key
+    from pipeline.orchestrator import STAGES, PipelineCancelled, checkpoint_paths
+    from pipeline.stage_cache import StageCache
+    from generator.report_generator import extract_statistics
+    from generator.multi_format import FORMATS
     from utils.config_loader import ConfigLoader
     from utils.logger import setup_logger
+    from utils.manifest import ReportManifest
+    from utils.metrics import PipelineMetrics, write_run_metrics
+    from utils.profiles import load_profiles, profile_view
 
 
 class DailyArxivUpdater:
     """每日 ArXiv 更新器主類別"""
     
-    def __init__(self):
-        """初始化更新器"""
+    def __init__(self, profile_names: Optional[List[str]] = None):
+        """
+        初始化更新器
+        
+        Args:
+            profile_names: 只執行這些設定檔（topics.yaml 的 profiles），None 表示全部
+        """
         self.logger = setup_logger("DailyArxivUpdater")
         self.config = ConfigLoader()
         
         # 載入主題設定
         self.topics_config = self._load_topics_config()
         
-        # 初始化各個模組
-        self.crawler = ArxivCrawler(self.topics_config)
+        # 多設定檔：以類別聯集爬取一次、每篇論文只增強一次，再依設定檔渲染各自的報告
+        self.profiles = load_profiles(self.topics_config, project_root / "config", profile_names)
+        if self.profiles:
+            self.logger.info(f"👥 設定檔: {', '.join(p['name'] for p in self.profiles)}")
+        
+        # 各階段的耗時、記憶體與數量指標
+        self.metrics = PipelineMetrics()
         self.processor = DataProcessor()
-        self.ai_enhancer = GeminiEnhancer()
-        self.report_generator = ReportGenerator()
         
         # 設定資料目錄
         self.data_dir = project_root / "data"
         self.data_dir.mkdir(exist_ok=True)
         
+        # 報告清單（README 更新只讀取尾端）
+        self.manifest = ReportManifest(self.data_dir / "manifest.jsonl")
+        
+        # 各階段的 JSONL 檢查點目錄，None 表示不寫檢查點
+        pipeline_config = self.topics_config.get('pipeline', {})
+        self.checkpoint_dir = self.data_dir if pipeline_config.get('checkpoints', True) else None
+        
+        # 階段快取：指紋未變的階段沿用檢查點（隨資料一起提交，CI 重跑時仍有效）
+        self.stage_cache = StageCache(self.data_dir / "stage_cache.json")
+        
+        # 最近一次 run() 失敗的原因（常駐模式寫入狀態檔），成功或沒有新論文時為 None
+        self.last_error: Optional[str] = None
+    
+    # ---- 以下模組在第一次使用時才建立 ----
+    
+    @cached_property
+    def crawler(self):
+        from crawler.arxiv_crawler import ArxivCrawler
+        return ArxivCrawler(
+            self.topics_config,
+            metrics=self.metrics,
+            profiles=self.profiles,
+            ranker=self.ranker if self.topics_config.get('ranking', {}).get('enabled', False) else None,
+            prefilter=self.prefilter if self.topics_config.get('prefilter', {}).get('enabled', False) else None
+        )
+    
+    @cached_property
+    def prefilter(self):
+        """由歷史收錄結果訓練的相關性預過濾（模型隨資料一起提交）"""
+        from processor.prefilter import RelevancePrefilter
+        config = self.topics_config.get('prefilter', {})
+        return RelevancePrefilter(
+            self.data_dir / "prefilter",
+            threshold=config.get('threshold', 0.2),
+            min_examples=config.get('min_examples', 50)
+        )
+    
+    @cached_property
+    def ranker(self):
+        """BM25 相關性排序（背景語料與本地特徵共用）"""
+        from processor.relevance import BM25Ranker
+        ranking = self.topics_config.get('ranking', {})
+        self._load_background()
+        return BM25Ranker.from_extractor(
+            self.feature_extractor, k1=ranking.get('k1', 1.5), b=ranking.get('b', 0.75)
+        )
+    
+    @cached_property
+    def ai_enhancer(self):
+        from ai.gemini_enhancer import GeminiEnhancer
+        return GeminiEnhancer()
+    
+    @cached_property
+    def report_generator(self):
+        from generator.report_generator import ReportGenerator
+        return ReportGenerator()
+    
+    @cached_property
+    def renderer(self):
+        from generator.multi_format import MultiFormatRenderer
+        return MultiFormatRenderer(output_root=project_root)
+    
+    @cached_property
+    def seen_index(self):
+        """已處理論文 ID 索引（涵蓋完整歷史）"""
+        from processor.seen_index import SeenIndex
+        seen_index = SeenIndex(self.data_dir / "seen_ids.sqlite")
+        seen_index.bootstrap(self.data_dir)
+        return seen_index
+    
+    @cached_property
+    def feature_extractor(self):
+        """本地關鍵詞與難度分析（不消耗 API 用量）"""
+        from processor.feature_extractor import LocalFeatureExtractor
+        return LocalFeatureExtractor(self.data_dir / "background_df.json")
+    
+    @cached_property
+    def fulltext(self):
+        """論文全文擷取（PDF 快取不提交，存於 data/.cache/）；未啟用或缺少 pypdf 時為 None"""
+        config = self.topics_config.get('fulltext', {})
+        if not config.get('enabled', False):
+            return None
+        from processor.fulltext import FullTextExtractor
+        extractor = FullTextExtractor(
+            self.data_dir / ".cache" / "fulltext",
+            max_cache_bytes=int(config.get('cache_mb', 512)) * 1024 * 1024,
+            fetch_workers=config.get('fetch_workers', 4),
+            per_host_interval=config.get('per_host_interval', 1.0),
+            extract_workers=config.get('extract_workers', 2),
+            token_budget=config.get('token_budget', 3000),
+            chunk_tokens=config.get('chunk_tokens', 400),
+            max_pages=config.get('max_pages', 20)
+        )
+        if not extractor.available:
+            self.logger.warning("⚠️ pypdf 套件未安裝，將只以摘要進行 AI 增強")
+            return None
+        return extractor
+    
+    @cached_property
+    def orchestrator(self):
+        """串流流程：爬取 → 去重 → 過濾 → AI 增強 → 渲染"""
+        from pipeline.orchestrator import StreamingOrchestrator
+        pipeline_config = self.topics_config.get('pipeline', {})
+        return StreamingOrchestrator(
+            self.crawler,
+            self.processor,
+            self.ai_enhancer,
+            seen_index=self.seen_index,
+            checkpoint_dir=self.checkpoint_dir,
+            queue_size=pipeline_config.get('queue_size', 32),
+            enhance_workers=pipeline_config.get('enhance_workers', 4),
+            metrics=self.metrics,
+            fulltext=self.fulltext
+        )
+    
     def _load_topics_config(self) -> Dict:
         """載入主題設定檔"""
         config_path = project_root / "config" / "topics.yaml"
@@ -103,120 +238,435 @@ class DailyArxivUpdater:
         self.logger.info(f"📅 使用今日日期: {today}")
         return today
     
-    def _get_previous_days_files(self, target_date: str) -> List[Path]:
-        """取得前幾天的資料檔案路徑"""
-        target_dt = datetime.strptime(target_date, '%Y-%m-%d')
-        previous_files = []
-        
-        # 檢查前 3 天的檔案
-        for i in range(1, 4):
-            prev_date = (target_dt - timedelta(days=i)).strftime('%Y-%m-%d')
-            prev_file = self.data_dir / f"{prev_date}_unique.jsonl"
-            if prev_file.exists():
-                previous_files.append(prev_file)
-                
-        self.logger.info(f"📂 找到 {len(previous_files)} 個歷史檔案用於去重")
-        return previous_files
+    def _stage_spec(self, stage: str, target_date: str, force_update: bool) -> Dict:
+        """
+        階段的設定片段、程式碼檔案與輸出檔
+        
+        Args:
+            stage: 階段名稱
+            target_date: 目標日期
+            force_update: 是否為強制更新模式
+            
+        Returns:
+            {'config': 設定片段, 'code': 程式碼與範本檔案, 'outputs': 輸出檔}
+        """
+        src = project_root / "src"
+        paths = checkpoint_paths(self.checkpoint_dir, target_date)
+        topics = self.topics_config
+        if stage == 'crawl':
+            config = {k: topics.get(k) for k in (
+                'categories', 'keywords', 'limits', 'date_filter', 'ranking', 'prefilter', 'authors'
+            )}
+            config['profiles'] = self.profiles
+            code = [src / "crawler" / "arxiv_crawler.py", src / "utils" / "profiles.py", src / "utils" / "authors.py",
+                    src / "processor" / "relevance.py", src / "processor" / "prefilter.py"]
+            outputs = [paths['raw']]
+        elif stage == 'filter':
+            config = {'force': force_update}
+            code = [src / "processor" / "data_processor.py", src / "processor" / "seen_index.py"]
+            outputs = [paths['unique'], paths['new']]
+        elif stage == 'enhance':
+            config = {k: os.getenv(k) for k in (
+                'MODEL_NAME', 'MODEL_TIERS', 'LANGUAGE', 'AI_BACKEND', 'ROUTING_SHORT_ABSTRACT_CHARS'
+            )}
+            config['fulltext'] = topics.get('fulltext')
+            code = [src / "ai" / "gemini_enhancer.py", src / "ai" / "router.py", src / "processor" / "fulltext.py"]
+            outputs = [paths['enhanced']]
+        else:
+            config = {k: topics.get(k) for k in ('ai_analysis', 'output', 'categories', 'history', 'clustering')}
+            config['profiles'] = self.profiles
+            code = [
+                src / "main.py",
+                src / "generator" / "report_generator.py",
+                src / "generator" / "multi_format.py",
+                src / "processor" / "feature_extractor.py",
+                src / "processor" / "clustering.py",
+                src / "ai" / "summarizer.py",
+                *sorted((project_root / "templates").glob("*.j2")),
+            ]
+            outputs = [
+                root / FORMATS[fmt]['output'].format(date=target_date)
+                for root, formats in self._output_roots()
+                for fmt in formats
+                if fmt in FORMATS and '{date}' in FORMATS[fmt]['output']
+            ]
+        return {'config': config, 'code': code, 'outputs': outputs}
+    
+    def _output_roots(self) -> List[tuple]:
+        """
+        報告的輸出根目錄與格式
+        
+        Returns:
+            [(輸出根目錄, 格式列表)]：專案根目錄（所有設定檔的聯集），以及各設定檔的 profiles/<name>/
+        """
+        default_formats = self.topics_config.get('output', {}).get('formats', ['markdown'])
+        roots = [(project_root, default_formats)]
+        for profile in self.profiles:
+            formats = (profile.get('output') or {}).get('formats', default_formats)
+            roots.append((project_root / "profiles" / profile['name'], formats))
+        return roots
+    
+    def _stage_fingerprint(self, stage: str, target_date: str, force_update: bool) -> str:
+        """以上游階段記錄的輸出雜湊計算指紋"""
+        spec = self._stage_spec(stage, target_date, force_update)
+        index = STAGES.index(stage)
+        upstream = self.stage_cache.output_digest(target_date, STAGES[index - 1]) if index else None
+        return StageCache.fingerprint(stage, upstream, spec['config'], spec['code'])
+    
+    def _plan_stages(self, target_date: str, force_update: bool) -> List[tuple]:
+        """
+        決定各階段是否需要執行
+        
+        Returns:
+            [(階段, 需要執行的原因；None 表示沿用快取)]，任一階段需要執行時其後所有階段都要執行
+        """
+        plan = []
+        stale = False
+        for stage in STAGES:
+            if stale:
+                plan.append((stage, "上游階段將重新執行"))
+                continue
+            spec = self._stage_spec(stage, target_date, force_update)
+            reason = self.stage_cache.check(
+                target_date, stage,
+                self._stage_fingerprint(stage, target_date, force_update),
+                spec['outputs']
+            )
+            stale = reason is not None
+            plan.append((stage, reason))
+        return plan
     
-    def run(self) -> bool:
-        """執行完整的更新流程"""
+    def _record_stage(self, stage: str, target_date: str, force_update: bool):
+        """階段完成時記錄指紋與輸出雜湊"""
+        spec = self._stage_spec(stage, target_date, force_update)
+        self.stage_cache.record(
+            target_date, stage,
+            self._stage_fingerprint(stage, target_date, force_update),
+            spec['outputs']
+        )
+    
+    def dry_run(self) -> List[tuple]:
+        """列出各階段會執行或沿用快取，不做任何變更"""
+        target_date = self._get_target_date()
+        force_update = os.getenv('FORCE_UPDATE', 'false').lower() == 'true'
+        plan = self._plan_stages(target_date, force_update)
+        print(f"📋 {target_date} 執行計畫:")
+        for stage, reason in plan:
+            print(f"  {stage:<8} {'略過（沿用快取）' if reason is None else f'執行（{reason}）'}")
+        return plan
+    
+    def run(self, use_cache: bool = True) -> bool:
+        """
+        執行完整的更新流程
+        
+        Args:
+            use_cache: 是否沿用階段快取；False 時所有階段重新執行
+        """
+        self.last_error = None
         try:
             self.logger.info("🚀 開始每日 ArXiv 論文更新流程")
             
             # 1. 確定目標日期
             target_date = self._get_target_date()
+            paths = checkpoint_paths(self.checkpoint_dir, target_date)
+            force_update = os.getenv('FORCE_UPDATE', 'false').lower() == 'true'
+            if force_update:
+                self.logger.info("🔄 強制更新模式：使用所有去重後的論文")
             
-            # 2. 定義檔案路徑
-            raw_file = self.data_dir / f"{target_date}.jsonl"
-            unique_file = self.data_dir / f"{target_date}_unique.jsonl"
-            new_only_file = self.data_dir / f"{target_date}_new_only.jsonl"
-            enhanced_file = self.data_dir / f"{target_date}_new_only_AI_enhanced.jsonl"
-            report_file = self.data_dir / f"{target_date}.md"
+            # 指紋未變的階段由檢查點重播；沒有檢查點時無法沿用
+            resume_from = STAGES[0]
+            if use_cache and self.checkpoint_dir is not None:
+                plan = self._plan_stages(target_date, force_update)
+                pending = [stage for stage, reason in plan if reason is not None]
+                if not pending:
+                    self.logger.info("♻️ 所有階段的輸入、設定與程式碼都沒有改變，沿用先前的輸出")
+                    return False
+                resume_from = pending[0]
+                if resume_from != STAGES[0]:
+                    self.logger.info(f"♻️ 沿用快取至 {resume_from} 之前的階段")
             
-            # 3. 爬取論文資料
-            self.logger.info("📊 步驟 1: 爬取論文資料")
-            papers = self.crawler.crawl_papers(target_date)
-            if not papers:
-                self.logger.warning("⚠️ 沒有爬取到任何論文")
-                return False
-                
-            # 儲存原始資料
-            self.processor.save_papers(papers, raw_file)
-            self.logger.info(f"💾 儲存了 {len(papers)} 篇論文到 {raw_file}")
-            
-            # 4. 去除重複
-            self.logger.info("🔄 步驟 2: 去除重複論文")
-            unique_papers = self.processor.deduplicate_papers(papers)
-            self.processor.save_papers(unique_papers, unique_file)
-            self.logger.info(f"✨ 去重後剩餘 {len(unique_papers)} 篇論文")
+            # 2. 爬取 → 去重 → 過濾新論文 → AI 增強 → 生成報告
+            # 以有界佇列串流串接，論文一解析完成就送往模型；中間檔案為檢查點
+            self.logger.info("🚚 步驟 1-5: 串流執行爬取、去重、過濾、AI 增強與報告生成")
+            stats = self.orchestrator.run(
+                target_date,
+                force=force_update,
+                render=lambda papers: self._render_outputs(target_date, papers, paths, force_update),
+                resume_from=resume_from,
+                on_stage_done=(
+                    (lambda stage: self._record_stage(stage, target_date, force_update))
+                    if self.checkpoint_dir is not None else None
+                )
+            )
             
-            # 5. 過濾新論文
-            self.logger.info("🆕 步驟 3: 過濾新論文")
-            previous_files = self._get_previous_days_files(target_date)
-            new_papers = self.processor.filter_new_papers(unique_papers, previous_files)
+            self._write_metrics(target_date, stats)
             
-            # 檢查是否強制更新
-            force_update = os.getenv('FORCE_UPDATE', 'false').lower() == 'true'
+            # 由檢查點重播增強或渲染階段時不會重新計算爬取數量
+            if not stats['crawled'] and not stats['new']:
+                self.logger.warning("⚠️ 沒有爬取到任何論文")
+                return False
             
-            if not new_papers and not force_update:
+            if not stats['new']:
                 self.logger.info("ℹ️ 沒有找到新論文，結束流程")
                 # 清理暫存檔案
-                raw_file.unlink(missing_ok=True)
-                unique_file.unlink(missing_ok=True)
+                for name in ('raw', 'unique', 'new'):
+                    paths[name].unlink(missing_ok=True)
                 return False
-                
-            if force_update and not new_papers:
-                self.logger.info("🔄 強制更新模式：使用所有去重後的論文")
-                new_papers = unique_papers
-                
-            self.processor.save_papers(new_papers, new_only_file)
-            self.logger.info(f"🎯 過濾出 {len(new_papers)} 篇新論文")
-            
-            # 6. AI 增強處理
-            self.logger.info("🧠 步驟 4: AI 增強處理")
-            enhanced_papers = self.ai_enhancer.enhance_papers(new_papers)
-            if not enhanced_papers:
-                self.logger.error("❌ AI 增強處理失敗")
-                return False
-                
-            self.processor.save_papers(enhanced_papers, enhanced_file)
-            self.logger.info(f"✨ AI 增強完成，處理了 {len(enhanced_papers)} 篇論文")
             
-            # 7. 生成報告
-            self.logger.info("📝 步驟 5: 生成報告")
-            success = self.report_generator.generate_report(
-                enhanced_papers, 
-                report_file, 
-                target_date
+            self.logger.info(
+                f"⏱️ 首篇論文增強完成: {stats['time_to_first_enhanced']} 秒，"
+                f"總耗時: {stats['wall_clock']} 秒"
             )
             
-            if not success:
-                self.logger.error("❌ 報告生成失敗")
-                return False
-                
-            # 8. 更新主要 README
+            # 3. 更新主要 README
             self.logger.info("📋 步驟 6: 更新主要 README")
             self._update_main_readme()
             
             self.logger.info("🎉 每日更新流程完成！")
             return True
             
+        except PipelineCancelled as e:
+            self.logger.warning(f"⏹️ {e}")
+            self.last_error = str(e)
+            return False
         except Exception as e:
+            self.last_error = str(e)
             self.logger.error(f"❌ 執行過程中發生錯誤: {e}")
             import traceback
             self.logger.error(traceback.format_exc())
             return False
     
+    def _write_metrics(self, target_date: str, stats: Dict):
+        """寫出階段指標（Prometheus textfile 與 JSON 摘要），並與上一次執行比較"""
+        metrics_config = self.topics_config.get('metrics', {})
+        if not metrics_config.get('enabled', True):
+            return
+        try:
+            write_run_metrics(
+                self.metrics,
+                project_root / metrics_config.get('dir', 'data/metrics'),
+                threshold=metrics_config.get('regression_threshold', 0.5),
+                date=target_date,
+                resumed_from=stats.get('resumed_from'),
+                wall_clock=stats.get('wall_clock'),
+                time_to_first_enhanced=stats.get('time_to_first_enhanced'),
+            )
+        except Exception as e:
+            self.logger.error(f"❌ 寫出階段指標時發生錯誤: {e}")
+    
+    def _render_outputs(self, target_date: str, enhanced_papers: List[Dict],
+                        paths: Dict[str, Path], force_update: bool):
+        """流程的渲染階段：本地特徵、報告、報告清單、歷史資料庫與搜尋索引"""
+        report_file = self.data_dir / f"{target_date}.md"
+        
+        annotated = self._annotate_local_features(enhanced_papers)
+        if self._cluster_topics(enhanced_papers) or annotated:
+            self.processor.save_papers(enhanced_papers, paths['enhanced'])
+        self.logger.info(f"✨ AI 增強完成，處理了 {len(enhanced_papers)} 篇論文")
+        
+        # Markdown 與其他設定的格式共用同一份資料
+        formats = self.topics_config.get('output', {}).get('formats', ['markdown'])
+        results = self.renderer.render(
+            enhanced_papers,
+            target_date,
+            formats,
+            preference=self.topics_config.get('categories'),
+            force=force_update
+        )
+        
+        if any(status.startswith('failed') for status in results.values()) or not report_file.exists():
+            raise RuntimeError("報告生成失敗")
+        
+        if not self.manifest.exists():
+            self.manifest.rebuild(self.data_dir)
+        stats = extract_statistics(enhanced_papers)
+        self.manifest.append(
+            target_date,
+            stats['total_papers'],
+            stats['main_categories'],
+            f"data/{report_file.name}"
+        )
+        
+        # 更新欄位式歷史資料庫
+        if self.topics_config.get('history', {}).get('columnar_store', False):
+            self._update_history_store(target_date, paths['unique'], enhanced_papers)
+        
+        # 更新靜態搜尋索引
+        if self.topics_config.get('history', {}).get('search_index', False):
+            self._update_search_index(target_date, enhanced_papers)
+        
+        # 更新本地查詢索引
+        if self.topics_config.get('history', {}).get('query_index', False):
+            self._update_query_index(target_date, paths['unique'], enhanced_papers)
+        
+        # 更新作者索引
+        if self.topics_config.get('authors', {}).get('index', False):
+            self._update_author_index(target_date, paths['unique'])
+        
+        self._update_background(target_date, paths['unique'])
+        self._update_prefilter(target_date, enhanced_papers)
+        
+        if self.profiles:
+            self._render_profiles(target_date, enhanced_papers, force_update)
+    
+    def _render_profiles(self, target_date: str, enhanced_papers: List[Dict], force_update: bool):
+        """
+        各設定檔的報告（profiles/<name>/ 下與專案根目錄相同的結構）
+        
+        論文已在爬取時標記所屬設定檔，這裡只是篩選視圖，不會重新分析或呼叫模型
+        
+        Raises:
+            RuntimeError: 任一設定檔渲染失敗（其餘設定檔仍會完成）
+        """
+        from generator.multi_format import MultiFormatRenderer
+        
+        failed = []
+        for (root, formats), profile in zip(self._output_roots()[1:], self.profiles):
+            papers = profile_view(profile, enhanced_papers)
+            if not papers:
+                self.logger.info(f"ℹ️ 設定檔 {profile['name']} 今日沒有論文，略過")
+                continue
+            renderer = MultiFormatRenderer(
+                output_root=root,
+                fingerprint_file=project_root / ".cache" / f"render_fingerprints_{profile['name']}.json"
+            )
+            results = renderer.render(
+                papers,
+                target_date,
+                formats,
+                preference=profile.get('categories'),
+                force=force_update
+            )
+            if any(status.startswith('failed') for status in results.values()):
+                failed.append(profile['name'])
+            else:
+                self.logger.info(f"👥 設定檔 {profile['name']}: {len(papers)} 篇 → {root.relative_to(project_root)}")
+        
+        if failed:
+            raise RuntimeError(f"設定檔報告生成失敗: {', '.join(failed)}")
+    
+    def _annotate_local_features(self, papers: List[Dict]) -> bool:
+        """以本地 TF-IDF 計算關鍵詞與技術難度，回傳是否有加上標註"""
+        analysis = self.topics_config.get('ai_analysis', {})
+        keywords = analysis.get('enable_keyword_scoring', False)
+        difficulty = analysis.get('enable_difficulty_assessment', False)
+        if not (keywords or difficulty):
+            return False
+        
+        self._load_background()
+        self.feature_extractor.annotate(papers, keywords=keywords, difficulty=difficulty)
+        self.logger.info(f"🔍 本地關鍵詞與難度分析完成: {len(papers)} 篇論文")
+        return True
+    
+    def _cluster_topics(self, papers: List[Dict]) -> bool:
+        """
+        依 TF-IDF 餘弦相似度將當天的論文分群（報告依主題分組，不呼叫模型），回傳是否有加上標註
+        """
+        clustering = self.topics_config.get('clustering', {})
+        if not clustering.get('enabled', False):
+            return False
+        
+        from processor.clustering import TopicClusterer
+        self._load_background()
+        clusterer = TopicClusterer.from_extractor(
+            self.feature_extractor,
+            threshold=clustering.get('threshold', 0.25),
+            min_size=clustering.get('min_size', 2),
+            max_size=clustering.get('max_size')
+        )
+        clusterer.annotate(papers)
+        return True
+    
+    def _update_prefilter(self, target_date: str, enhanced_papers: List[Dict]):
+        """
+        以當天收錄與淘汰的論文增量訓練預過濾模型
+        
+        只有本次實際執行爬取時才有淘汰名單；由檢查點重播爬取時略過，留待下次完整執行。
+        追蹤作者的論文不受過濾條件影響，不作為正例
+        """
+        if not self.topics_config.get('prefilter', {}).get('enabled', False):
+            return
+        if not self.crawler.rejected:
+            return
+        try:
+            selected = [p for p in enhanced_papers if not p.get('followed_authors')]
+            self.prefilter.update_day(target_date, selected, self.crawler.rejected)
+        except Exception as e:
+            self.logger.error(f"❌ 更新預過濾模型時發生錯誤: {e}")
+    
+    def _load_background(self):
+        """載入背景語料統計，沒有快取時由歷史資料建立"""
+        if not self.feature_extractor.n_docs and not self.feature_extractor.load_background():
+            self.feature_extractor.build_background_from_dir(self.data_dir)
+    
+    def _update_background(self, target_date: str, unique_file: Path):
+        """將當天去重後的論文加入背景語料（相關性排序與本地特徵使用的文件頻率）"""
+        analysis = self.topics_config.get('ai_analysis', {})
+        if not (self.topics_config.get('ranking', {}).get('enabled', False)
+                or analysis.get('enable_keyword_scoring', False)
+                or analysis.get('enable_difficulty_assessment', False)):
+            return
+        try:
+            self._load_background()
+            if unique_file.exists():
+                self.feature_extractor.add_documents(list(self.processor.load_papers(unique_file)), target_date)
+        except Exception as e:
+            self.logger.error(f"❌ 更新背景語料時發生錯誤: {e}")
+    
+    def _update_history_store(self, target_date: str, unique_file: Path, enhanced_papers: List[Dict]):
+        """將當天所有去重後的論文寫入歷史資料庫，已增強者使用增強後的資料"""
+        try:
+            from processor.history_store import HistoryStore
+            enhanced = {paper_key(p): p for p in enhanced_papers}
+            papers = (
+                enhanced.get(paper_key(p), p)
+                for p in self.processor.load_papers(unique_file)
+            )
+            HistoryStore(self.data_dir / "history").append_day(target_date, papers)
+        except Exception as e:
+            self.logger.error(f"❌ 更新歷史資料庫時發生錯誤: {e}")
+    
+    def _update_search_index(self, target_date: str, enhanced_papers: List[Dict]):
+        """將當天的增強論文併入靜態搜尋索引；首次執行時由歷史資料建立"""
+        try:
+            from generator.search_index import SearchIndexBuilder
+            builder = SearchIndexBuilder(project_root / "assets" / "search")
+            if builder.indexed_dates():
+                builder.add_day(target_date, enhanced_papers)
+            else:
+                builder.build_from_archive(self.data_dir)
+        except Exception as e:
+            self.logger.error(f"❌ 更新搜尋索引時發生錯誤: {e}")
+    
+    def _update_query_index(self, target_date: str, unique_file: Path, enhanced_papers: List[Dict]):
+        """將當天去重後的論文寫入本地查詢索引；首次執行時由歷史資料建立"""
+        try:
+            from processor.query_index import PaperIndex
+            with PaperIndex(self.data_dir / "query_index.sqlite") as index:
+                if not index.dates():
+                    index.sync(self.data_dir)
+                enhanced = {paper_key(p): p for p in enhanced_papers}
+                index.add_day(target_date, (
+                    enhanced.get(paper_key(p), p)
+                    for p in self.processor.load_papers(unique_file)
+                ))
+        except Exception as e:
+            self.logger.error(f"❌ 更新查詢索引時發生錯誤: {e}")
+    
+    def _update_author_index(self, target_date: str, unique_file: Path):
+        """將當天爬取（去重後）的論文作者寫入作者索引；首次執行時由歷史資料建立"""
+        try:
+            from processor.author_index import AuthorIndex
+            with AuthorIndex(self.data_dir / "author_index.sqlite") as index:
+                index.bootstrap(self.data_dir)
+                if unique_file.exists():
+                    index.add_papers(self.processor.load_papers(unique_file), target_date)
+        except Exception as e:
+            self.logger.error(f"❌ 更新作者索引時發生錯誤: {e}")
+    
     def _update_main_readme(self):
         """更新主要的 README.md 檔案"""
         try:
-            # 掃描所有 .md 報告檔案
-            md_files = sorted(
-                [f for f in self.data_dir.glob("*.md")],
-                key=lambda x: x.stem,  # 按日期排序
-                reverse=True  # 最新的在前面
-            )
-            
             # 讀取 README 範本
             template_path = project_root / "templates" / "readme_template.md"
             if not template_path.exists():
@@ -226,19 +676,23 @@ class DailyArxivUpdater:
             with open(template_path, 'r', encoding='utf-8') as f:
                 template = f.read()
             
+            # 由報告清單尾端取得最近 10 個報告，不掃描 data/
+            if not self.manifest.exists():
+                self.manifest.rebuild(self.data_dir)
+            latest = self.manifest.latest(10)
+            last = self.manifest.last()
+            
             # 生成報告連結列表
             report_links = []
-            for md_file in md_files[:10]:  # 只顯示最近 10 個報告
-                date_str = md_file.stem
-                relative_path = f"data/{md_file.name}"
-                link = f"- **{date_str}** 👉 [點擊查看報告]({relative_path})"
+            for record in latest:
+                link = f"- **{record['date']}** 👉 [點擊查看報告]({record['path']})"
                 report_links.append(link)
             
             # 填入範本
             readme_content = template.format(
                 report_list='\n'.join(report_links),
                 last_update=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                total_reports=len(md_files)
+                total_reports=last['total_reports'] if last else 0
             )
             
             # 寫入主要 README
@@ -252,11 +706,36 @@ class DailyArxivUpdater:
             self.logger.error(f"❌ 更新 README 時發生錯誤: {e}")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """主要執行函數"""
+    parser = argparse.ArgumentParser(description="每日 ArXiv 論文智慧摘要")
+    parser.add_argument("--dry-run", action="store_true", help="只列出各階段會執行或沿用快取")
+    parser.add_argument("--no-cache", action="store_true", help="忽略階段快取，所有階段重新執行")
+    parser.add_argument("--profile", action="append", dest="profiles", metavar="NAME",
+                        help="只執行指定的設定檔（可重複；預設為 topics.yaml 中的全部設定檔）")
+    parser.add_argument("--daemon", action="store_true",
+                        help="常駐模式：保留已載入的狀態，依 arXiv 公告時間表自動處理新論文")
+    parser.add_argument("--status-file", type=Path, default=project_root / "data" / ".cache" / "daemon_status.json",
+                        help="常駐模式的狀態檔（健康檢查用）")
+    args = parser.parse_args(argv)
+    
+    if args.daemon:
+        from pipeline.daemon import UpdaterDaemon
+        setup_logger("pipeline.daemon")
+        daemon = UpdaterDaemon(
+            lambda: DailyArxivUpdater(profile_names=args.profiles),
+            project_root / "config" / "topics.yaml",
+            args.status_file,
+            use_cache=not args.no_cache
+        )
+        sys.exit(daemon.serve_forever())
+    
     try:
-        updater = DailyArxivUpdater()
-        success = updater.run()
+        updater = DailyArxivUpdater(profile_names=args.profiles)
+        if args.dry_run:
+            updater.dry_run()
+            sys.exit(0)
+        success = updater.run(use_cache=not args.no_cache)
         
         if success:
             print("✅ 每日更新執行成功")
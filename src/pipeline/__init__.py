@@ -0,0 +1,9 @@
+"""
+流程協調模組
+以串流方式串接爬取、過濾、AI 增強與渲染
+"""
+
+from .orchestrator import StreamingOrchestrator, PipelineError, STAGES
+from .stage_cache import StageCache
+
+__all__ = ['StreamingOrchestrator', 'PipelineError', 'STAGES', 'StageCache']
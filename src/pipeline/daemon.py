@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+常駐排程模式
+每次 GitHub Actions 執行都是冷啟動：重新匯入、重新讀取歷史資料、重新建立索引後才開始爬取。
+常駐模式讓同一個 DailyArxivUpdater 留在記憶體中（已處理 ID 索引、模型用戶端、已編譯的範本、
+背景語料與預過濾模型），依 arXiv 的公告時間表等待，公告出現後立即處理
+
+    啟動 ──▶ 處理一次（補上錯過的公告）──▶ 等到下一次公告時間 ──▶ 輪詢最新論文 ──▶ 有新論文就處理 ──┐
+                                              ▲                                                  │
+                                              └──────────────────────────────────────────────────┘
+
+- arXiv 於美東時間週日至週四 20:00 公告新論文；公告時間到了之後每 poll_interval 秒查詢一次搜尋範圍內
+  最新的論文 ID，與上次處理時不同就執行完整流程，max_wait 內都沒有變化（假日）則等待下一次公告
+- topics.yaml 修改後，下一次處理前重新呼叫 factory 建立更新器（重新讀取設定，爬蟲、模型用戶端與範本都重新建立）；
+  已匯入的 Python 模組不會重新載入，程式碼更新後需要重新啟動
+- SIGTERM/SIGINT：等待中立即結束；處理中則中止流程，已增強的論文寫入部分檢查點，下次啟動時沿用
+- 狀態檔（JSON，原子寫入）記錄目前狀態、心跳時間、下一次公告時間與最近一次執行結果，供健康檢查使用
+
+使用方式（於專案根目錄）:
+    python src/main.py --daemon
+    PYTHONPATH=src python -m pipeline.daemon status --max-age 300   # 健康檢查，不健康時結束碼為 1
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from utils.atomic import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# arXiv 公告時間：美東時間週日至週四 20:00（datetime.weekday，週一為 0）
+ANNOUNCE_TZ = ZoneInfo("America/New_York")
+ANNOUNCE_HOUR = 20
+ANNOUNCE_WEEKDAYS = (6, 0, 1, 2, 3)
+
+
+def next_announcement(now: datetime) -> datetime:
+    """
+    now 之後的下一次公告時間
+
+    Args:
+        now: 帶時區的目前時間
+
+    Returns:
+        美東時間的公告時間（夏令時間切換時仍是當地 20:00）
+    """
+    local = now.astimezone(ANNOUNCE_TZ)
+    candidate = local.replace(hour=ANNOUNCE_HOUR, minute=0, second=0, microsecond=0)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() not in ANNOUNCE_WEEKDAYS:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class DaemonStatus:
+    """常駐模式的狀態檔"""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 狀態檔路徑；已存在時沿用其中的最近一次執行結果與最新論文 ID
+        """
+        self.path = Path(path)
+        self.data: Dict[str, Any] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+                self.data = {k: previous[k] for k in ('last_run', 'last_submission', 'runs', 'failures')
+                             if k in previous}
+            except (OSError, ValueError):
+                pass
+        self.data.setdefault('runs', 0)
+        self.data.setdefault('failures', 0)
+        self.data.update(pid=os.getpid(), started_at=_now())
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def update(self, **fields):
+        """更新欄位與心跳時間並寫出"""
+        with self._lock:
+            self.data.update(fields)
+            self.data['heartbeat'] = _now()
+            write_atomic(self.path, [json.dumps(self.data, ensure_ascii=False, indent=2)])
+
+
+def check_health(path: Path, max_age: float = 300.0) -> Tuple[bool, str]:
+    """
+    依狀態檔判斷常駐行程是否健康
+
+    Args:
+        path: 狀態檔路徑
+        max_age: 心跳時間最多落後幾秒
+
+    Returns:
+        (是否健康, 原因)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            status = json.load(f)
+    except (OSError, ValueError) as e:
+        return False, f"無法讀取狀態檔: {e}"
+    if status.get('state') == 'stopped':
+        return False, "常駐行程已停止"
+    try:
+        os.kill(status['pid'], 0)
+    except (KeyError, ProcessLookupError):
+        return False, "常駐行程不存在"
+    except PermissionError:
+        pass
+    age = (datetime.now(timezone.utc) - datetime.fromisoformat(status['heartbeat'])).total_seconds()
+    if age > max_age:
+        return False, f"心跳已 {age:.0f} 秒未更新"
+    return True, f"{status.get('state')}，心跳 {age:.0f} 秒前"
+
+
+class UpdaterDaemon:
+    """常駐排程器"""
+
+    def __init__(self, factory: Callable[[], Any], config_path: Path, status_path: Path,
+                 use_cache: bool = True):
+        """
+        初始化排程器
+
+        Args:
+            factory: 建立 DailyArxivUpdater 的函數（設定檔修改後重新呼叫）
+            config_path: topics.yaml 路徑，修改時間改變時重新建立更新器
+            status_path: 狀態檔路徑
+            use_cache: 是否沿用階段快取
+        """
+        self.factory = factory
+        self.config_path = Path(config_path)
+        self.status = DaemonStatus(status_path)
+        self.use_cache = use_cache
+        self.updater = None
+        self._config_mtime: Optional[float] = None
+        self._stop = threading.Event()
+        self._running = False
+
+    # ---- 設定 ----
+
+    @property
+    def settings(self) -> Dict:
+        return (self.updater.topics_config.get('daemon') or {}) if self.updater else {}
+
+    @property
+    def poll_interval(self) -> float:
+        return float(self.settings.get('poll_interval', 60))
+
+    @property
+    def max_wait(self) -> timedelta:
+        return timedelta(hours=float(self.settings.get('max_wait_hours', 3)))
+
+    @property
+    def heartbeat(self) -> float:
+        return float(self.settings.get('heartbeat', 30))
+
+    def _load(self):
+        """第一次或設定檔修改後建立更新器，並預先載入會在每次執行重複使用的模組"""
+        mtime = self.config_path.stat().st_mtime if self.config_path.exists() else None
+        if self.updater is not None and mtime == self._config_mtime:
+            return
+        if self.updater is not None:
+            logger.info("🔁 設定檔已修改，重新建立更新器")
+            self._close()
+        t0 = time.perf_counter()
+        self.updater = self.factory()
+        self._config_mtime = mtime
+        # 常駐狀態：已處理 ID 索引、爬蟲連線、模型用戶端與已編譯的範本
+        for name in ('seen_index', 'crawler', 'ai_enhancer', 'renderer', 'report_generator'):
+            getattr(self.updater, name)
+        logger.info(f"🔥 常駐狀態載入完成: {time.perf_counter() - t0:.2f} 秒")
+
+    def _close(self):
+        seen_index = self.updater.__dict__.get('seen_index')
+        if seen_index is not None:
+            seen_index.close()
+
+    # ---- 訊號與等待 ----
+
+    def stop(self, signum=None, frame=None):
+        """要求結束；處理中時中止流程（已增強的論文寫入部分檢查點）"""
+        if signum is not None:
+            logger.info(f"⏹️ 收到訊號 {signal.Signals(signum).name}，準備結束")
+        self._stop.set()
+        if self._running and self.updater is not None and 'orchestrator' in self.updater.__dict__:
+            self.updater.orchestrator.cancel()
+
+    def install_signal_handlers(self):
+        """SIGTERM 與 SIGINT 都視為結束要求（只能在主執行緒呼叫）"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def _sleep_until(self, deadline: datetime) -> bool:
+        """
+        等到指定時間，期間定期更新心跳
+
+        Returns:
+            是否等到（False 表示收到結束要求）
+        """
+        while not self._stop.is_set():
+            remaining = (deadline - datetime.now(timezone.utc)).total_seconds()
+            if remaining <= 0:
+                return True
+            if self._stop.wait(min(remaining, self.heartbeat)):
+                break
+            self.status.update()
+        return False
+
+    # ---- 處理 ----
+
+    def process(self, reason: str, latest: Optional[str] = None) -> bool:
+        """
+        執行一次完整流程
+
+        Args:
+            reason: 觸發原因（記錄於狀態檔）
+            latest: 觸發時的最新論文 ID，None 表示先查詢一次
+
+        Returns:
+            是否成功（有新論文或沒有新內容都算成功）
+        """
+        self._load()
+        if latest is None:
+            latest = self.updater.crawler.latest_submission()
+        started = _now()
+        self.status.update(state='running', current_run={'reason': reason, 'started_at': started})
+        logger.info(f"🚀 常駐模式開始處理（{reason}）")
+        # 處理期間另一個執行緒持續更新心跳，長時間的執行不會被健康檢查判為停止
+        finished = threading.Event()
+
+        def pulse():
+            while not finished.wait(self.heartbeat):
+                self.status.update()
+
+        threading.Thread(target=pulse, name="daemon-heartbeat", daemon=True).start()
+        self._running = True
+        t0 = time.perf_counter()
+        try:
+            updated = self.updater.run(use_cache=self.use_cache)
+        finally:
+            self._running = False
+            finished.set()
+        error = self.updater.last_error
+        last_run = {
+            'reason': reason,
+            'started_at': started,
+            'finished_at': _now(),
+            'wall_clock': round(time.perf_counter() - t0, 3),
+            'updated': updated,
+            'error': error,
+        }
+        fields = {'last_run': last_run, 'current_run': None, 'runs': self.status.get('runs', 0) + 1}
+        if error:
+            fields['failures'] = self.status.get('failures', 0) + 1
+        elif latest:
+            fields['last_submission'] = latest
+        self.status.update(**fields)
+        return error is None
+
+    def _poll(self, slot: datetime):
+        """公告時間到了之後輪詢，直到出現新論文、超過 max_wait 或收到結束要求"""
+        deadline = slot + self.max_wait
+        self.status.update(state='polling')
+        while not self._stop.is_set():
+            self._load()
+            latest = self.updater.crawler.latest_submission()
+            if latest and latest != self.status.get('last_submission'):
+                logger.info(f"📣 偵測到新公告: 最新論文 {latest}")
+                if self.process("新公告", latest) or self._stop.is_set():
+                    return
+                self.status.update(state='polling')
+            if datetime.now(timezone.utc) >= deadline:
+                logger.info("ℹ️ 公告時間後未出現新論文（可能是假日），等待下一次公告")
+                return
+            next_poll = datetime.now(timezone.utc) + timedelta(seconds=self.poll_interval)
+            if not self._sleep_until(min(next_poll, deadline)):
+                return
+
+    def serve_forever(self) -> int:
+        """
+        執行直到收到結束要求
+
+        Returns:
+            結束碼
+        """
+        self.install_signal_handlers()
+        logger.info(f"🛰️ 常駐模式啟動（PID {os.getpid()}），狀態檔: {self.status.path}")
+        self.status.update(state='starting')
+        try:
+            self._load()
+            if self.settings.get('run_on_start', True) and not self._stop.is_set():
+                self.process("啟動")
+            while not self._stop.is_set():
+                slot = next_announcement(datetime.now(timezone.utc))
+                logger.info(f"⏳ 下一次公告: {slot.isoformat()}")
+                self.status.update(state='waiting', next_announcement=slot.isoformat())
+                if not self._sleep_until(slot):
+                    break
+                self._poll(slot)
+        finally:
+            if self.updater is not None:
+                self._close()
+            self.status.update(state='stopped', current_run=None)
+            logger.info("👋 常駐模式結束")
+        return 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    """常駐模式狀態查詢"""
+    parser = argparse.ArgumentParser(description="常駐模式狀態")
+    parser.add_argument("command", choices=["status"])
+    parser.add_argument("--status-file", type=Path, default=Path("data/.cache/daemon_status.json"))
+    parser.add_argument("--max-age", type=float, default=300.0, help="心跳最多落後幾秒")
+    args = parser.parse_args(argv)
+
+    healthy, reason = check_health(args.status_file, args.max_age)
+    if args.status_file.exists():
+        print(args.status_file.read_text(encoding='utf-8'))
+    print(f"{'✅' if healthy else '❌'} {reason}")
+    return 0 if healthy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+串流流程協調器
+以有界佇列串接 爬取 → 去重 → 新論文過濾 → AI 增強 → 渲染，
+論文一解析完成就開始送往模型，不必等整個爬取結束；中間檔案僅作為可選的檢查點
+
+    crawl ──q_raw──▶ dedup/filter ──q_new──▶ [fulltext ──q_text──▶] enhance × N ──q_out──▶ collect ──▶ render
+
+設定全文擷取器時，新論文先下載 PDF、附上全文片段再送往模型（仍屬於 enhance 階段，從檢查點繼續時一併重跑）。
+每個佇列都有容量上限，下游變慢時上游自然被擋住（背壓），記憶體用量與總論文數無關。
+指定 resume_from 時，之前的階段改由檢查點重播，不重新執行（搭配 StageCache 使用）。
+執行中呼叫 cancel()（例如收到 SIGTERM）時，已增強的論文寫入部分檢查點，下次執行同一天時不再呼叫模型。
+"""
+
+import time
+import queue
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from processor.data_processor import paper_key
+from utils.metrics import PipelineMetrics
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+STAGES = ('crawl', 'filter', 'enhance', 'render')
+# 新論文過濾每次查詢索引的論文數：夠小讓增強不必等到整天爬完，又避免每篇論文一次查詢
+FILTER_BATCH_SIZE = 64
+
+
+class PipelineError(Exception):
+    """流程中某個階段失敗"""
+
+
+class PipelineCancelled(PipelineError):
+    """流程被 cancel() 中止"""
+
+
+def checkpoint_paths(checkpoint_dir: Optional[Path], target_date: str) -> Dict[str, Path]:
+    """各階段的檢查點檔案（檔名與 DailyArxivUpdater 相同）"""
+    base = Path(checkpoint_dir) if checkpoint_dir else Path(".")
+    return {
+        'raw': base / f"{target_date}.jsonl",
+        'unique': base / f"{target_date}_unique.jsonl",
+        'new': base / f"{target_date}_new_only.jsonl",
+        'enhanced': base / f"{target_date}_new_only_AI_enhanced.jsonl",
+        # 中止時已增強的論文（檔名刻意不含 _AI_enhanced，不會被當成報告資料讀取）
+        'partial': base / f"{target_date}_enhance_partial.jsonl",
+    }
+
+
+class StreamingOrchestrator:
+    """串流流程協調器"""
+
+    def __init__(self, crawler, processor, enhancer, seen_index=None,
+                 checkpoint_dir: Optional[Path] = None,
+                 queue_size: int = 32, enhance_workers: int = 4,
+                 metrics: Optional[PipelineMetrics] = None, fulltext=None):
+        """
+        初始化協調器
+
+        Args:
+            crawler: 提供 iter_papers(target_date) 的爬蟲
+            processor: DataProcessor 實例
+            enhancer: 提供 enhance_paper(paper) 的增強器
+            seen_index: SeenIndex 實例，None 表示不過濾舊論文
+            checkpoint_dir: 檢查點目錄，None 表示不寫中間檔案
+            queue_size: 每個階段之間的佇列容量
+            enhance_workers: 同時呼叫模型的執行緒數
+            metrics: 階段指標收集器，每次執行前重設；None 表示建立新的收集器
+            fulltext: 提供 attach((序號, 論文) 串流) 的全文擷取器，None 表示只以摘要增強
+        """
+        self.crawler = crawler
+        self.processor = processor
+        self.enhancer = enhancer
+        self.seen_index = seen_index
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.queue_size = queue_size
+        self.enhance_workers = max(1, enhance_workers)
+        self.metrics = metrics or PipelineMetrics()
+        self.fulltext = fulltext
+        self._stop = threading.Event()
+        self._cancelled = False
+        self._partial: Dict[str, Dict] = {}
+
+    def checkpoint_paths(self, target_date: str) -> Dict[str, Path]:
+        """各階段的檢查點檔案"""
+        return checkpoint_paths(self.checkpoint_dir, target_date)
+
+    def cancel(self):
+        """
+        中止目前的執行（可在訊號處理函式中呼叫）
+
+        各階段在下一次佇列操作時停止，進行中的模型呼叫會完成；run() 把已增強的論文寫入
+        部分檢查點後拋出 PipelineCancelled，不進行渲染，也不把當天的論文記為已處理
+        """
+        self._cancelled = True
+        self._stop.set()
+
+    def _load_partial(self, path: Path) -> Dict[str, Dict]:
+        """上次中止時寫出的增強結果（論文鍵 → 增強後的論文）"""
+        if self.checkpoint_dir is None or not path.exists():
+            return {}
+        partial = {paper_key(paper): paper for paper in self.processor.load_papers(path)}
+        if partial:
+            logger.info(f"♻️ 沿用中止前已增強的 {len(partial)} 篇論文")
+        return partial
+
+    def _flush_partial(self, results: Dict[int, Dict], path: Path) -> int:
+        """把已增強（且成功）的論文連同先前的部分結果寫入部分檢查點"""
+        if self.checkpoint_dir is None:
+            return 0
+        merged = dict(self._partial)
+        for seq in sorted(results):
+            paper = results[seq]
+            if (paper.get('AI') or {}).get('tldr') != "Error":
+                merged[paper_key(paper)] = paper
+        if merged:
+            self.processor.save_papers(list(merged.values()), path)
+        return len(merged)
+
+    # ---- 佇列工具：停止旗標設定後不再阻塞 ----
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _drain(self, q: queue.Queue) -> Iterator[Any]:
+        while True:
+            item = self._get(q)
+            if item is _DONE:
+                return
+            yield item
+
+    def _checkpoint(self, papers, name: str, paths: Dict[str, Path]):
+        if self.checkpoint_dir is None:
+            return papers
+        return self.processor.tee_papers(papers, paths[name])
+
+    def _stage(self, name: str, target: Callable, *args) -> threading.Thread:
+        """在執行緒中執行階段，例外記錄下來並通知其他階段停止"""
+        def runner():
+            try:
+                target(*args)
+            except Exception as e:
+                logger.error(f"❌ 階段 {name} 失敗: {e}")
+                self._errors.append((name, e))
+                self._stop.set()
+
+        thread = threading.Thread(target=runner, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    # ---- 各階段 ----
+
+    def _crawl(self, target_date: str, replay: bool, q_raw: queue.Queue, paths: Dict[str, Path]):
+        try:
+            if replay:
+                source = self.metrics.timed_iter('crawl', self.processor.load_papers(paths['raw']))
+            else:
+                source = self.metrics.timed_iter(
+                    'crawl', self._checkpoint(self.crawler.iter_papers(target_date), 'raw', paths)
+                )
+            for paper in source:
+                self._mark('first_crawled')
+                self._counts['crawled'] += 1
+                if not self._put(q_raw, paper):
+                    return
+            if not replay:
+                self._stage_done('crawl')
+        finally:
+            self._put(q_raw, _DONE)
+
+    def _filter(self, target_date: str, force: bool, replay: bool, q_raw: queue.Queue,
+                q_new: queue.Queue, paths: Dict[str, Path], readers: int):
+        unique_keys: List[str] = []
+
+        def record(papers):
+            for paper in papers:
+                unique_keys.append(paper_key(paper))
+                yield paper
+
+        try:
+            if replay:
+                for seq, paper in enumerate(self.processor.load_papers(paths['new'])):
+                    self._counts['new'] += 1
+                    if not self._put(q_new, (seq, paper)):
+                        return
+                return
+
+            # 等待上游的時間不計入任何階段
+            raw = self.metrics.timed_iter(None, self._drain(q_raw))
+            unique = record(self.metrics.timed_iter(
+                'dedup', self._checkpoint(self.processor.deduplicate_papers(raw), 'unique', paths)
+            ))
+            if force or self.seen_index is None:
+                # 強制更新時所有去重後的論文都重新增強
+                new = unique
+            else:
+                # 每 FILTER_BATCH_SIZE 篇論文查詢一次索引，不等待整批
+                new = self.processor.filter_new_papers(
+                    unique, seen_index=self.seen_index, as_of=target_date, batch_size=FILTER_BATCH_SIZE
+                )
+            new = self.metrics.timed_iter('filter', self._checkpoint(new, 'new', paths))
+            for seq, paper in enumerate(new):
+                self._counts['new'] += 1
+                if not self._put(q_new, (seq, paper)):
+                    return
+            self._counts['unique'] = len(unique_keys)
+            self.metrics.count('dedup', items_in=self._counts['crawled'])
+            self.metrics.count('filter', items_in=self._counts['unique'])
+
+            # 記錄今日所有去重後的 ID；同一天重跑時仍會被視為新論文
+            if self.seen_index is not None and not self._stop.is_set():
+                with self.metrics.measure('filter'):
+                    self.seen_index.add_many(unique_keys, target_date)
+            self._stage_done('filter')
+        finally:
+            for _ in range(readers):
+                self._put(q_new, _DONE)
+
+    def _fulltext(self, q_new: queue.Queue, q_text: queue.Queue):
+        try:
+            # 等待上游的時間不計入全文階段
+            papers = self.metrics.timed_iter(None, self._drain(q_new))
+            for item in self.metrics.timed_iter('fulltext', self.fulltext.attach(papers)):
+                if not self._put(q_text, item):
+                    return
+        finally:
+            for _ in range(self.enhance_workers):
+                self._put(q_text, _DONE)
+
+    def _enhance(self, q_new: queue.Queue, q_out: queue.Queue):
+        try:
+            for seq, paper in self._drain(q_new):
+                enhanced = self._partial.get(paper_key(paper))
+                if enhanced is None:
+                    with self.metrics.measure('enhance', items_in=1, items_out=1):
+                        enhanced = self.enhancer.enhance_paper(paper)
+                if (enhanced.get('AI') or {}).get('tldr') == "Error":
+                    self.metrics.error('enhance')
+                self._mark('first_enhanced')
+                if not self._put(q_out, (seq, enhanced)):
+                    if self._cancelled:
+                        # 已付出模型呼叫的結果仍寫入部分檢查點
+                        with self._lock:
+                            self._unsent[seq] = enhanced
+                    return
+        finally:
+            self._put(q_out, _DONE)
+
+    def _stage_done(self, stage: str):
+        if self._on_stage_done is not None and not self._stop.is_set():
+            self._on_stage_done(stage)
+
+    def _mark(self, event: str):
+        if event not in self._timings:
+            with self._lock:
+                self._timings.setdefault(event, round(time.perf_counter() - self._t0, 3))
+
+    # ---- 執行 ----
+
+    def run(self, target_date: str, force: bool = False,
+            render: Optional[Callable[[List[Dict]], Any]] = None,
+            resume_from: str = 'crawl',
+            on_stage_done: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        執行完整串流流程
+
+        Args:
+            target_date: 目標日期（YYYY-MM-DD）
+            force: 強制更新，所有去重後的論文都視為新論文
+            render: 收到全部增強結果後呼叫的渲染函數
+            resume_from: 從哪個階段開始執行，之前的階段由檢查點重播（需要 checkpoint_dir）
+            on_stage_done: 階段完成且檢查點已寫入時呼叫，參數為階段名稱
+
+        Returns:
+            統計資料：各階段論文數、首篇爬取/增強完成時間、渲染耗時與總耗時（秒）
+
+        Raises:
+            PipelineError: 任一階段失敗
+            PipelineCancelled: 執行中呼叫了 cancel()
+        """
+        if resume_from not in STAGES:
+            raise ValueError(f"未知的階段: {resume_from}")
+        if resume_from != 'crawl' and self.checkpoint_dir is None:
+            raise ValueError("從中間階段繼續執行需要檢查點目錄")
+        start = STAGES.index(resume_from)
+
+        self._t0 = time.perf_counter()
+        self.metrics.reset()
+        self._on_stage_done = on_stage_done
+        self._stop = threading.Event()
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._unsent: Dict[int, Dict] = {}
+        self._errors: List = []
+        self._timings: Dict[str, float] = {}
+        self._counts = {'crawled': 0, 'unique': 0, 'new': 0, 'enhanced': 0}
+        paths = self.checkpoint_paths(target_date)
+        if self.checkpoint_dir is not None:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._partial = self._load_partial(paths['partial'])
+
+        q_raw: queue.Queue = queue.Queue(self.queue_size)
+        q_new: queue.Queue = queue.Queue(self.queue_size)
+        q_out: queue.Queue = queue.Queue(self.queue_size)
+        q_text: queue.Queue = queue.Queue(self.queue_size) if self.fulltext is not None else q_new
+
+        threads = []
+        if start <= STAGES.index('filter'):
+            threads.append(self._stage('crawl', self._crawl, target_date, start > 0, q_raw, paths))
+        if start <= STAGES.index('enhance'):
+            readers = 1 if self.fulltext is not None else self.enhance_workers
+            threads.append(self._stage('filter', self._filter, target_date, force,
+                                       start > STAGES.index('filter'), q_raw, q_new, paths, readers))
+            if self.fulltext is not None:
+                threads.append(self._stage('fulltext', self._fulltext, q_new, q_text))
+            threads += [
+                self._stage(f'enhance-{i}', self._enhance, q_text, q_out)
+                for i in range(self.enhance_workers)
+            ]
+
+        # 收集增強結果，依進入增強階段的順序排列，報告內容與執行緒排程無關
+        results: Dict[int, Dict] = {}
+        if start == STAGES.index('render'):
+            results = dict(enumerate(self.processor.load_papers(paths['enhanced'])))
+            self._counts['new'] = self._counts['enhanced'] = len(results)
+        finished = 0 if threads else self.enhance_workers
+        while finished < self.enhance_workers:
+            item = self._get(q_out)
+            if item is _DONE:
+                finished += 1
+                continue
+            seq, paper = item
+            results[seq] = paper
+            self._counts['enhanced'] += 1
+            if self._counts['enhanced'] % 10 == 0:
+                logger.info(f"🧠 已增強 {self._counts['enhanced']}/{self._counts['new']} 篇論文")
+
+        for thread in threads:
+            thread.join()
+        if self._cancelled:
+            flushed = self._flush_partial({**results, **self._unsent}, paths['partial'])
+            raise PipelineCancelled(f"流程已中止，{flushed} 篇已增強的論文寫入 {paths['partial']}")
+        if self._errors:
+            name, error = self._errors[0]
+            raise PipelineError(f"階段 {name} 失敗: {error}") from error
+
+        enhanced = [results[seq] for seq in sorted(results)]
+        paths['partial'].unlink(missing_ok=True)
+        self._timings['enhance_done'] = round(time.perf_counter() - self._t0, 3)
+        if enhanced and self.checkpoint_dir is not None and threads:
+            self.processor.save_papers(enhanced, paths['enhanced'])
+            self._stage_done('enhance')
+
+        if render is not None and enhanced:
+            t_render = time.perf_counter()
+            with self.metrics.measure('render', items_in=len(enhanced), items_out=len(enhanced)):
+                render(enhanced)
+            self._timings['render'] = round(time.perf_counter() - t_render, 3)
+            self._stage_done('render')
+
+        stats = {
+            **self._counts,
+            'resumed_from': resume_from,
+            'time_to_first_enhanced': self._timings.get('first_enhanced'),
+            'time_to_first_crawled': self._timings.get('first_crawled'),
+            'enhance_done': self._timings['enhance_done'],
+            'render': self._timings.get('render'),
+            'wall_clock': round(time.perf_counter() - self._t0, 3),
+            'metrics': self.metrics.summary(),
+            'papers': enhanced,
+        }
+        logger.info(
+            f"⏱️ 串流流程完成: 爬取 {stats['crawled']} → 去重 {stats['unique']} → 新論文 {stats['new']} "
+            f"→ 增強 {stats['enhanced']}；首篇增強完成 {stats['time_to_first_enhanced']} 秒，"
+            f"總耗時 {stats['wall_clock']} 秒"
+        )
+        return stats
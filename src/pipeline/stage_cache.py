@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+階段快取
+每個階段記錄指紋（上游輸出雜湊 + 設定片段 + 程式碼版本）與自身輸出的雜湊，
+重跑時指紋相同且輸出檔仍存在的階段直接沿用先前的輸出（類似 Make）
+
+下游指紋使用上游「完成當下」記錄的輸出雜湊，而非重新讀取檔案，
+因此後續階段就地改寫檔案（例如在增強結果加上本地關鍵詞）不會讓上游失效。
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.atomic import atomic_open
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def digest_files(paths: Iterable[Path]) -> str:
+    """多個檔案內容的雜湊（依路徑排序，不存在的檔案記為空）"""
+    h = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        h.update(path.name.encode('utf-8') + b"\0")
+        if path.is_file():
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def digest_config(config: Any) -> str:
+    """設定片段的雜湊"""
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+class StageCache:
+    """階段指紋紀錄"""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 紀錄檔路徑（通常為 data/stage_cache.json，隨資料一起提交）
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.records = data.get('stages', {})
+
+    @staticmethod
+    def _key(date: str, stage: str) -> str:
+        return f"{date}/{stage}"
+
+    @staticmethod
+    def fingerprint(stage: str, upstream: Optional[str], config: Any, code: Iterable[Path]) -> str:
+        """
+        計算階段指紋
+
+        Args:
+            stage: 階段名稱
+            upstream: 上游階段的輸出雜湊（第一個階段為 None）
+            config: 影響此階段輸出的設定片段
+            code: 此階段的程式碼與範本檔案
+        """
+        h = hashlib.sha256(f"{CACHE_VERSION}\0{stage}\0{upstream or ''}\0".encode('utf-8'))
+        h.update(digest_config(config).encode('utf-8'))
+        h.update(digest_files(code).encode('utf-8'))
+        return h.hexdigest()
+
+    def output_digest(self, date: str, stage: str) -> Optional[str]:
+        """階段完成時記錄的輸出雜湊"""
+        record = self.records.get(self._key(date, stage))
+        return record['output_digest'] if record else None
+
+    def check(self, date: str, stage: str, fingerprint: str, outputs: List[Path]) -> Optional[str]:
+        """
+        檢查階段是否可以略過
+
+        Returns:
+            None 表示可沿用快取；否則回傳需要執行的原因
+        """
+        record = self.records.get(self._key(date, stage))
+        if record is None:
+            return "沒有快取紀錄"
+        if record['fingerprint'] != fingerprint:
+            return "輸入、設定或程式碼已改變"
+        missing = [p.name for p in outputs if not Path(p).exists()]
+        if missing:
+            return f"輸出檔不存在: {', '.join(missing)}"
+        return None
+
+    def record(self, date: str, stage: str, fingerprint: str, outputs: List[Path]) -> str:
+        """
+        記錄階段完成（立即寫入紀錄檔）
+
+        Returns:
+            輸出雜湊，供下游階段計算指紋
+        """
+        output_digest = digest_files(outputs)
+        with self._lock:
+            self.records[self._key(date, stage)] = {
+                'fingerprint': fingerprint,
+                'output_digest': output_digest,
+                'outputs': [Path(p).name for p in outputs],
+            }
+            self._save()
+        return output_digest
+
+    def _save(self):
+        with atomic_open(self.path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'stages': self.records}, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
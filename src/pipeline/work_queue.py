@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+租約式工作佇列
+AI 增強是整個流程的瓶頸，單一 enhance.py 行程只能使用一把 API 金鑰、一台機器。
+協調者把當天的論文放入 SQLite 佇列，任意數量的工作行程（同一台或共用同一個檔案系統的多台機器）
+各自領取論文、增強後寫回結果，全部完成後依原始順序合併成 `_AI_enhanced_*.jsonl`
+
+    coordinator ──enqueue──▶ jobs (pending) ──claim──▶ leased ──complete──▶ done ──merge──▶ *_AI_enhanced_*.jsonl
+                                   ▲                     │
+                                   └──── 租約到期回收 ─────┘
+
+- 領取在 BEGIN IMMEDIATE 交易中完成，同一篇論文同時只租給一個工作行程；租約（visibility timeout）
+  到期仍未完成時（工作行程當機、被終止）由其他工作行程重新領取
+- 完成時以第一份結果為準；已完成的論文再送來的結果直接丟棄，不會覆蓋
+- 模型回傳錯誤（各欄位為 "Error"）時放回佇列重試，累計 max_attempts 次後保留錯誤結果，
+  與 enhance.py 的輸出相同
+- 每個工作行程讀取自己的 GOOGLE_API_KEY；協調者啟動本機工作行程時依序分配 GOOGLE_API_KEYS 中的金鑰
+
+多台機器共用時，資料庫必須放在支援 POSIX 檔案鎖的共用檔案系統上（SQLite 不建議放在 NFS），
+且各機器的時鐘需同步（租約以牆鐘時間計算）。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m pipeline.work_queue run --data data/2026-01-01.jsonl --workers 4
+    PYTHONPATH=src python -m pipeline.work_queue enqueue --data data/2026-01-01.jsonl
+    GOOGLE_API_KEY=... PYTHONPATH=src python -m pipeline.work_queue work          # 在任何一台機器上
+    PYTHONPATH=src python -m pipeline.work_queue merge --batch 2026-01-01 --wait
+    PYTHONPATH=src python -m pipeline.work_queue status
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import sqlite3
+import argparse
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# src 放在最前面，避免在專案根目錄以 python -m 執行時被舊版 ai/ 套件遮蔽 src/ai
+SRC_DIR = Path(__file__).resolve().parent.parent
+if sys.path[0] != str(SRC_DIR):
+    sys.path.insert(0, str(SRC_DIR))
+
+from utils.jsonl_codec import dumps, loads, iter_jsonl, write_jsonl_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = Path("data/.cache/work_queue.sqlite")
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+def default_owner() -> str:
+    """工作行程的識別名稱（主機名稱:PID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_error(paper: Dict) -> bool:
+    return (paper.get('AI') or {}).get('tldr') == "Error"
+
+
+class WorkQueue:
+    """SQLite 租約式工作佇列（可由多個行程同時開啟）"""
+
+    def __init__(self, db_path: Path, max_attempts: int = 3):
+        """
+        開啟（或建立）佇列
+
+        Args:
+            db_path: SQLite 檔案路徑
+            max_attempts: 每篇論文最多領取的次數（含租約到期）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        # 自動提交模式，交易以 BEGIN IMMEDIATE 明確開始；其他行程持有寫入鎖時最多等待 30 秒
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " batch TEXT PRIMARY KEY, output TEXT NOT NULL, total INTEGER NOT NULL,"
+            " created REAL NOT NULL, merged REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " batch TEXT NOT NULL, seq INTEGER NOT NULL, paper TEXT NOT NULL,"
+            " state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT, lease_expires REAL, result TEXT, error TEXT, updated REAL NOT NULL,"
+            " paper_id TEXT, PRIMARY KEY (batch, seq))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, batch, seq)")
+        # 同一批次內以論文 ID 去重；舊版資料庫補上欄位並由已存的論文內容回填
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if 'paper_id' not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN paper_id TEXT")
+            self.conn.execute("UPDATE jobs SET paper_id = json_extract(paper, '$.id')")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_paper ON jobs (batch, paper_id)")
+
+    def __enter__(self) -> 'WorkQueue':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """寫入交易：BEGIN IMMEDIATE 立即取得寫入鎖，讀取與更新之間不會被其他行程插入"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # ---- 協調者 ----
+
+    def enqueue(self, batch: str, papers: Iterable[Dict], output: Path) -> int:
+        """
+        放入一批論文（以論文 ID 去重：批次中已有的論文略過，新的論文接在目前最後一篇之後）
+
+        Args:
+            batch: 批次名稱（通常是日期）
+            papers: 論文，依 id 去重後保留第一次出現的順序
+            output: 合併結果的輸出檔
+
+        Returns:
+            新增的工作數
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            seen = {row[0] for row in conn.execute("SELECT paper_id FROM jobs WHERE batch = ?", (batch,))}
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM jobs WHERE batch = ?", (batch,)
+            ).fetchone()[0]
+            rows = []
+            for paper in papers:
+                key = paper.get('id')
+                if key in seen:
+                    continue
+                seen.add(key)
+                rows.append((batch, next_seq + len(rows), key, dumps(paper).decode('utf-8'), PENDING, now))
+            conn.executemany(
+                "INSERT INTO jobs (batch, seq, paper_id, paper, state, updated) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            total = len(seen)
+            conn.execute(
+                "INSERT INTO batches (batch, output, total, created) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(batch) DO UPDATE SET output = excluded.output, total = excluded.total",
+                (batch, str(output), total, now)
+            )
+        logger.info(f"📥 批次 {batch}: 新增 {len(rows)} 篇論文（共 {total} 篇）")
+        return len(rows)
+
+    def reclaim(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        回收到期的租約：還有嘗試次數的放回佇列，否則標記為失敗
+
+        領取時也會直接領取到期的租約，這裡讓狀態與進度即時反映
+
+        Returns:
+            {'requeued': 放回佇列數, 'failed': 失敗數}
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            failed = conn.execute(
+                "UPDATE jobs SET state = ?, owner = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "租約到期", now, LEASED, now, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET state = ?, owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE state = ? AND lease_expires < ?",
+                (PENDING, now, LEASED, now)
+            ).rowcount
+        if requeued or failed:
+            logger.warning(f"♻️ 回收到期租約: {requeued} 篇放回佇列, {failed} 篇失敗")
+        return {'requeued': requeued, 'failed': failed}
+
+    def progress(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """各狀態的工作數"""
+        sql = "SELECT state, COUNT(*) FROM jobs"
+        params: List = []
+        if batch is not None:
+            sql += " WHERE batch = ?"
+            params.append(batch)
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(self.conn.execute(sql + " GROUP BY state", params).fetchall()))
+        return counts
+
+    def finished(self, batch: Optional[str] = None) -> bool:
+        """沒有等待中或租用中的工作"""
+        counts = self.progress(batch)
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def batches(self) -> List[Dict]:
+        rows = self.conn.execute("SELECT batch, output, total, created, merged FROM batches ORDER BY created")
+        return [dict(zip(('batch', 'output', 'total', 'created', 'merged'), row)) for row in rows]
+
+    def merge(self, batch: str, output: Optional[Path] = None) -> int:
+        """
+        依放入順序把一批的結果原子寫入輸出檔；失敗且沒有結果的論文各欄位為 "Error"
+
+        Args:
+            batch: 批次名稱
+            output: 輸出檔，預設為放入時指定的檔案
+
+        Returns:
+            寫入的論文數
+
+        Raises:
+            ValueError: 批次不存在或尚未全部完成
+        """
+        from ai.gemini_enhancer import AI_FIELDS
+
+        row = self.conn.execute("SELECT output FROM batches WHERE batch = ?", (batch,)).fetchone()
+        if row is None:
+            raise ValueError(f"批次不存在: {batch}")
+        if not self.finished(batch):
+            raise ValueError(f"批次 {batch} 尚未完成: {self.progress(batch)}")
+        output = Path(output or row[0])
+
+        def records():
+            rows = self.conn.execute(
+                "SELECT paper, result FROM jobs WHERE batch = ? ORDER BY seq", (batch,)
+            )
+            for paper, result in rows:
+                if result is not None:
+                    yield loads(result)
+                else:
+                    yield {**loads(paper), 'AI': {field: "Error" for field in AI_FIELDS}}
+
+        count = write_jsonl_atomic(output, records())
+        with self._transaction() as conn:
+            conn.execute("UPDATE batches SET merged = ? WHERE batch = ?", (time.time(), batch))
+        logger.info(f"💾 批次 {batch}: 合併 {count} 篇論文到 {output}")
+        return count
+
+    # ---- 工作行程 ----
+
+    def claim(self, owner: str, lease_seconds: float, batch: Optional[str] = None, limit: int = 1) -> List[Dict]:
+        """
+        領取工作（等待中，或租約已到期且還有嘗試次數）
+
+        Args:
+            owner: 工作行程識別名稱
+            lease_seconds: 租約長度（秒），到期未完成時可被其他工作行程領取
+            batch: 只領取這個批次，None 表示任何批次（依批次名稱與放入順序）
+            limit: 最多領取幾篇
+
+        Returns:
+            [{'batch', 'seq', 'paper', 'attempts'}]
+        """
+        now = time.time()
+        sql = ("SELECT batch, seq, paper, attempts FROM jobs "
+               "WHERE (state = ? OR (state = ? AND lease_expires < ?)) AND attempts < ?")
+        params: List = [PENDING, LEASED, now, self.max_attempts]
+        if batch is not None:
+            sql += " AND batch = ?"
+            params.append(batch)
+        sql += " ORDER BY batch, seq LIMIT ?"
+        params.append(limit)
+        with self._transaction() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ? "
+                "WHERE batch = ? AND seq = ?",
+                [(LEASED, owner, now + lease_seconds, now, b, s) for b, s, _, _ in rows]
+            )
+        return [
+            {'batch': b, 'seq': s, 'paper': loads(paper), 'attempts': attempts + 1}
+            for b, s, paper, attempts in rows
+        ]
+
+    def complete(self, job: Dict, result: Dict) -> bool:
+        """
+        寫回結果（第一份結果為準）
+
+        Returns:
+            是否採用（已由其他工作行程完成時為 False）
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, owner = NULL, lease_expires = NULL, error = NULL, updated = ? "
+                "WHERE batch = ? AND seq = ? AND state NOT IN (?, ?)",
+                (DONE, dumps(result).decode('utf-8'), time.time(), job['batch'], job['seq'], DONE, FAILED)
+            ).rowcount == 1
+
+    def retry(self, job: Dict, owner: str, error: str, result: Optional[Dict] = None) -> str:
+        """
+        增強失敗：還有嘗試次數時放回佇列，否則保留錯誤結果並標記為失敗
+
+        Returns:
+            工作的新狀態
+        """
+        state = PENDING if job['attempts'] < self.max_attempts else FAILED
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, owner = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE batch = ? AND seq = ? AND state = ? AND owner = ?",
+                (state, dumps(result).decode('utf-8') if result is not None and state == FAILED else None,
+                 error, time.time(), job['batch'], job['seq'], LEASED, owner)
+            )
+        return state
+
+    def release(self, owner: str) -> int:
+        """工作行程結束時歸還尚未完成的租約（不計入嘗試次數）"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = ?, owner = NULL, lease_expires = NULL, attempts = attempts - 1, updated = ? "
+                "WHERE state = ? AND owner = ?",
+                (PENDING, time.time(), LEASED, owner)
+            ).rowcount
+
+
+def run_worker(queue: WorkQueue, enhancer, owner: Optional[str] = None, batch: Optional[str] = None,
+               lease_seconds: float = 600.0, poll_interval: float = 2.0, exit_when_empty: bool = True,
+               stop: Optional[threading.Event] = None) -> Dict[str, int]:
+    """
+    工作行程主迴圈：領取 → 增強 → 寫回
+
+    Args:
+        queue: 工作佇列
+        enhancer: 提供 enhance_paper(paper) 的增強器
+        owner: 工作行程識別名稱，預設為 主機名稱:PID
+        batch: 只處理這個批次
+        lease_seconds: 每篇論文的租約長度（需大於一次增強的最長時間，含路由升級）
+        poll_interval: 佇列暫時沒有可領取的工作時，等待多久再查詢
+        exit_when_empty: 沒有等待中與租用中的工作時結束；否則持續等待新批次
+        stop: 設定後處理完目前的論文就結束
+
+    Returns:
+        {'completed', 'retried', 'failed', 'discarded'}
+    """
+    owner = owner or default_owner()
+    stop = stop or threading.Event()
+    stats = {'completed': 0, 'retried': 0, 'failed': 0, 'discarded': 0}
+    logger.info(f"👷 工作行程 {owner} 開始")
+    try:
+        while not stop.is_set():
+            jobs = queue.claim(owner, lease_seconds, batch=batch)
+            if not jobs:
+                # 其他工作行程持有的租約可能到期，全部完成前持續等待；嘗試次數用完的到期租約在此標記為失敗
+                queue.reclaim()
+                if exit_when_empty and queue.finished(batch):
+                    break
+                stop.wait(poll_interval)
+                continue
+            for job in jobs:
+                enhanced = enhancer.enhance_paper(job['paper'])
+                if _is_error(enhanced):
+                    state = queue.retry(job, owner, "模型回傳錯誤", result=enhanced)
+                    stats['retried' if state == PENDING else 'failed'] += 1
+                elif queue.complete(job, enhanced):
+                    stats['completed'] += 1
+                else:
+                    stats['discarded'] += 1
+                done = stats['completed'] + stats['failed']
+                if done and done % 10 == 0:
+                    logger.info(f"🧠 {owner} 已完成 {done} 篇論文")
+    finally:
+        released = queue.release(owner)
+        if released:
+            logger.info(f"↩️ 歸還 {released} 個未完成的租約")
+    logger.info(f"👷 工作行程 {owner} 結束: {json.dumps(stats, ensure_ascii=False)}")
+    return stats
+
+
+def spawn_workers(db_path: Path, count: int, batch: Optional[str] = None,
+                  lease_seconds: float = 600.0) -> List[subprocess.Popen]:
+    """
+    啟動本機工作行程；GOOGLE_API_KEYS（逗號分隔）有設定時依序分配給各行程
+
+    Returns:
+        子行程列表
+    """
+    keys = [k.strip() for k in os.environ.get('GOOGLE_API_KEYS', '').split(',') if k.strip()]
+    src = str(SRC_DIR)
+    processes = []
+    for i in range(count):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [src, env.get('PYTHONPATH')]))
+        if keys:
+            env['GOOGLE_API_KEY'] = keys[i % len(keys)]
+        command = [sys.executable, '-m', 'pipeline.work_queue', '--db', str(db_path), 'work',
+                   '--lease', str(lease_seconds)]
+        if batch is not None:
+            command += ['--batch', batch]
+        processes.append(subprocess.Popen(command, env=env))
+    logger.info(f"🚀 啟動 {count} 個工作行程" + (f"，{len(keys)} 把 API 金鑰輪流使用" if keys else ""))
+    return processes
+
+
+def wait_for_batch(queue: WorkQueue, batch: str, poll_interval: float = 5.0,
+                   workers: Optional[List[subprocess.Popen]] = None) -> bool:
+    """
+    協調者等待批次完成，期間回收到期租約並回報進度
+
+    Returns:
+        是否完成（本機工作行程全部結束但仍有未完成的工作時為 False）
+    """
+    last = None
+    while True:
+        queue.reclaim()
+        counts = queue.progress(batch)
+        if counts[PENDING] == 0 and counts[LEASED] == 0:
+            return True
+        if counts != last:
+            logger.info(f"⏳ 批次 {batch}: {json.dumps(counts, ensure_ascii=False)}")
+            last = counts
+        if workers and all(p.poll() is not None for p in workers):
+            logger.error("❌ 所有工作行程都已結束，但批次尚未完成")
+            return False
+        time.sleep(poll_interval)
+
+
+def batch_for(data: Path) -> str:
+    """資料檔對應的批次名稱（檔名主幹）"""
+    return Path(data).stem
+
+
+def output_for(data: Path) -> Path:
+    """與 enhance.py 相同的輸出檔名：<資料檔>_AI_enhanced_<LANGUAGE>.jsonl"""
+    language = os.environ.get('LANGUAGE', 'English')
+    return Path(data).with_name(f"{Path(data).stem}_AI_enhanced_{language}.jsonl")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """工作佇列命令列工具"""
+    parser = argparse.ArgumentParser(description="租約式 AI 增強工作佇列")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="佇列資料庫")
+    parser.add_argument("--max-attempts", type=int, default=3, help="每篇論文最多嘗試次數")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = sub.add_parser("enqueue", help="放入一個 JSONL 檔案的論文")
+    enqueue.add_argument("--data", type=Path, required=True)
+    enqueue.add_argument("--batch", help="批次名稱，預設為檔名主幹")
+    enqueue.add_argument("--output", type=Path, help="合併輸出檔，預設與 enhance.py 相同")
+
+    work = sub.add_parser("work", help="執行工作行程")
+    work.add_argument("--batch", help="只處理這個批次")
+    work.add_argument("--owner", help="工作行程識別名稱")
+    work.add_argument("--lease", type=float, default=600.0, help="租約長度（秒）")
+    work.add_argument("--forever", action="store_true", help="佇列清空後繼續等待新批次")
+
+    merge = sub.add_parser("merge", help="合併批次結果")
+    merge.add_argument("--batch", required=True)
+    merge.add_argument("--output", type=Path)
+    merge.add_argument("--wait", action="store_true", help="等待批次完成後再合併")
+
+    run = sub.add_parser("run", help="放入、啟動本機工作行程、等待並合併")
+    run.add_argument("--data", type=Path, required=True)
+    run.add_argument("--workers", type=int, default=2, help="本機工作行程數（0 表示只等待其他機器）")
+    run.add_argument("--lease", type=float, default=600.0, help="租約長度（秒）")
+    run.add_argument("--output", type=Path)
+
+    sub.add_parser("reclaim", help="回收到期的租約")
+    sub.add_parser("status", help="各批次進度")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    queue = WorkQueue(args.db, max_attempts=args.max_attempts)
+
+    if args.command == "enqueue":
+        queue.enqueue(args.batch or batch_for(args.data), iter_jsonl(args.data), args.output or output_for(args.data))
+    elif args.command == "work":
+        from ai.gemini_enhancer import GeminiEnhancer
+        stop = threading.Event()
+        # 收到 SIGTERM 時處理完目前的論文、歸還租約後結束
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        run_worker(queue, GeminiEnhancer(), owner=args.owner, batch=args.batch, lease_seconds=args.lease,
+                   exit_when_empty=not args.forever, stop=stop)
+    elif args.command == "merge":
+        if args.wait and not wait_for_batch(queue, args.batch):
+            return 1
+        queue.merge(args.batch, args.output)
+    elif args.command == "run":
+        batch = batch_for(args.data)
+        queue.enqueue(batch, iter_jsonl(args.data), args.output or output_for(args.data))
+        workers = spawn_workers(args.db, args.workers, batch=batch, lease_seconds=args.lease)
+        try:
+            if not wait_for_batch(queue, batch, workers=workers):
+                return 1
+        finally:
+            for process in workers:
+                process.wait()
+        queue.merge(batch)
+    elif args.command == "reclaim":
+        print(json.dumps(queue.reclaim(), ensure_ascii=False))
+    else:
+        print(json.dumps([
+            {**info, 'progress': queue.progress(info['batch'])} for info in queue.batches()
+        ], ensure_ascii=False, indent=2))
+    queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
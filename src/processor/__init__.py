@@ -1,4 +1,8 @@
 """
 資料處理模組
 負責論文資料的去重、過濾和處理
-"""
\ No newline at end of file
+"""
+
+from .data_processor import DataProcessor, paper_key
+
+__all__ = ['DataProcessor', 'paper_key']
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+資料封存模組
+將每日的 JSONL 檔案壓縮成每月一個封存包，並以偏移索引支援隨機讀取
+
+封存包由多個獨立壓縮的區塊（zstd frame 或 gzip member）串接而成，本身即為合法的壓縮串流；
+索引記錄每個原始檔案的區塊位置與每篇論文所在的區塊，讀取單篇論文或單日資料時只需解壓少數區塊。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.archive compact            # 封存所有已結束的月份
+    PYTHONPATH=src python -m processor.archive compact --month 2025-06
+    PYTHONPATH=src python -m processor.archive get 2506.01234
+    PYTHONPATH=src python -m processor.archive list "*.jsonl"     # 列出所有檔案（含已封存）
+"""
+
+import re
+import sys
+import gzip
+import json
+import fnmatch
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from processor.data_processor import paper_key
+from utils.atomic import write_bytes_atomic
+from utils.jsonl_codec import loads
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DAILY_FILE = re.compile(r'^(\d{4}-\d{2})-\d{2}.*\.jsonl$')
+INDEX_VERSION = 1
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("此封存包使用 zstd 壓縮，需要安裝 zstandard 套件")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class DataArchive:
+    """同時涵蓋封存包與未封存檔案的資料目錄讀取器"""
+
+    def __init__(self, data_dir: Path, frame_lines: int = 200):
+        """
+        初始化讀取器
+
+        Args:
+            data_dir: 資料目錄（封存包位於其下的 archive/）
+            frame_lines: 封存時每個壓縮區塊包含的行數
+        """
+        self.data_dir = Path(data_dir)
+        self.archive_dir = self.data_dir / "archive"
+        self.frame_lines = frame_lines
+        self._indexes: Dict[str, Dict] = {}
+        self._names: Optional[Dict[str, str]] = None
+
+    # ---- 索引 ----
+
+    def _index_path(self, month: str) -> Path:
+        return self.archive_dir / f"{month}.index.json.gz"
+
+    def months(self) -> List[str]:
+        """已封存的月份"""
+        if not self.archive_dir.exists():
+            return []
+        return sorted(p.name[:7] for p in self.archive_dir.glob("*.index.json.gz"))
+
+    def _index(self, month: str) -> Dict:
+        if month not in self._indexes:
+            with gzip.open(self._index_path(month), 'rb') as f:
+                self._indexes[month] = json.loads(f.read())
+        return self._indexes[month]
+
+    def _packed_names(self) -> Dict[str, str]:
+        """封存包中的檔案名稱 → 月份"""
+        if self._names is None:
+            self._names = {}
+            for month in self.months():
+                for name in self._index(month)['files']:
+                    self._names[name] = month
+        return self._names
+
+    # ---- 讀取 ----
+
+    def glob(self, pattern: str) -> List[str]:
+        """列出符合樣式的檔案名稱（未封存檔案與封存包合併）"""
+        names = {p.name for p in self.data_dir.glob(pattern) if p.is_file()}
+        names.update(name for name in self._packed_names() if fnmatch.fnmatch(name, pattern))
+        return sorted(names)
+
+    def exists(self, name: str) -> bool:
+        return (self.data_dir / name).is_file() or name in self._packed_names()
+
+    def _read_frame(self, month: str, offset: int, length: int) -> bytes:
+        index = self._index(month)
+        with open(self.archive_dir / index['pack'], 'rb') as f:
+            f.seek(offset)
+            return _decompress(index['codec'], f.read(length))
+
+    def iter_raw_lines(self, name: str) -> Iterator[bytes]:
+        """逐行讀取檔案原始內容，未封存的檔案優先"""
+        loose = self.data_dir / name
+        if loose.is_file():
+            with open(loose, 'rb') as f:
+                yield from f
+            return
+
+        month = self._packed_names().get(name)
+        if month is None:
+            raise FileNotFoundError(name)
+        for offset, length, _ in self._index(month)['files'][name]:
+            yield from self._read_frame(month, offset, length).splitlines(keepends=True)
+
+    def iter_records(self, name: str) -> Iterator[Dict]:
+        """逐筆讀取 JSONL 檔案"""
+        for line in self.iter_raw_lines(name):
+            if line.strip():
+                yield loads(line)
+
+    def iter_day(self, date: str, pattern: str = "{date}*.jsonl") -> Iterator[Tuple[str, Dict]]:
+        """逐筆讀取某一天的所有 JSONL 檔案，回傳 (檔名, 論文)"""
+        for name in self.glob(pattern.format(date=date)):
+            for record in self.iter_records(name):
+                yield name, record
+
+    def get_paper(self, paper_id: str, name: Optional[str] = None) -> Optional[Dict]:
+        """
+        從封存包中隨機讀取單篇論文，只解壓其所在的區塊
+
+        Args:
+            paper_id: arXiv ID（忽略版本後綴）
+            name: 限定來源檔案名稱，預設優先取 AI 增強結果
+
+        Returns:
+            論文資料，找不到時回傳 None
+        """
+        key = paper_key({'id': paper_id})
+        for month in reversed(self.months()):
+            index = self._index(month)
+            names = index['file_names']
+            locations = [(names[n], frame, line) for n, frame, line in index['papers'].get(key, [])]
+            if name is not None:
+                locations = [loc for loc in locations if loc[0] == name]
+            if not locations:
+                continue
+            enhanced = [loc for loc in locations if '_AI_enhanced' in loc[0]]
+            file_name, frame, line = (enhanced or locations)[-1]
+            offset, length, _ = index['files'][file_name][frame]
+            lines = self._read_frame(month, offset, length).splitlines()
+            return loads(lines[line])
+        return None
+
+    # ---- 封存 ----
+
+    def loose_months(self) -> Dict[str, List[Path]]:
+        """尚未封存的每日檔案，依月份分組"""
+        months: Dict[str, List[Path]] = {}
+        for path in sorted(self.data_dir.glob("*.jsonl")):
+            match = DAILY_FILE.match(path.name)
+            if match:
+                months.setdefault(match.group(1), []).append(path)
+        return months
+
+    def compact(self, month: str, remove_loose: bool = True) -> Dict:
+        """
+        將指定月份的每日檔案合併進該月封存包
+
+        已存在的封存包會與新的未封存檔案合併重寫（同名時以未封存檔案為準）
+
+        Args:
+            month: 月份（YYYY-MM）
+            remove_loose: 驗證成功後刪除未封存檔案
+
+        Returns:
+            封存統計
+        """
+        loose = {p.name: p for p in self.loose_months().get(month, [])}
+        existing: Dict[str, List[bytes]] = {}
+        if self._index_path(month).exists():
+            for name in self._index(month)['files']:
+                if name not in loose:
+                    existing[name] = list(self.iter_raw_lines(name))
+
+        sources: Dict[str, List[bytes]] = dict(existing)
+        for name, path in loose.items():
+            with open(path, 'rb') as f:
+                sources[name] = [line if line.endswith(b"\n") else line + b"\n" for line in f]
+
+        if not sources:
+            return {'month': month, 'files': 0, 'papers': 0}
+
+        codec = 'zstd' if zstandard is not None else 'gzip'
+        pack_name = f"{month}.jsonl.{'zst' if codec == 'zstd' else 'gz'}"
+        file_names = sorted(sources)
+        index = {'version': INDEX_VERSION, 'month': month, 'codec': codec, 'pack': pack_name,
+                 'file_names': file_names, 'files': {}, 'papers': {}}
+        raw_size = 0
+        frames: List[bytes] = []
+        offset = 0
+
+        for file_no, name in enumerate(file_names):
+            lines = sources[name]
+            index['files'][name] = []
+            for frame_start in range(0, len(lines), self.frame_lines):
+                chunk = lines[frame_start:frame_start + self.frame_lines]
+                data = b"".join(chunk)
+                raw_size += len(data)
+                compressed = _compress(codec, data)
+                frame_idx = len(index['files'][name])
+                index['files'][name].append([offset, len(compressed), len(chunk)])
+                frames.append(compressed)
+                offset += len(compressed)
+
+                for line_idx, line in enumerate(chunk):
+                    if not line.strip():
+                        continue
+                    key = paper_key(loads(line))
+                    if key:
+                        index['papers'].setdefault(key, []).append([file_no, frame_idx, line_idx])
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        # 刪除原始檔案前內容必須已寫入磁碟
+        write_bytes_atomic(self.archive_dir / pack_name, frames, fsync=True)
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        write_bytes_atomic(self._index_path(month), gzip.compress(index_bytes, mtime=0), fsync=True)
+        self._indexes[month] = index
+        self._names = None
+
+        # 舊封存包使用不同壓縮格式時移除
+        for old in self.archive_dir.glob(f"{month}.jsonl.*"):
+            if old.name != pack_name:
+                old.unlink()
+
+        # 從磁碟讀回封存包並比對內容後才刪除原始檔案
+        if remove_loose and loose:
+            self._verify(month, {name: sources[name] for name in loose})
+            for path in loose.values():
+                path.unlink()
+
+        stats = {'month': month, 'files': len(sources), 'papers': len(index['papers']),
+                 'raw_bytes': raw_size, 'packed_bytes': offset, 'codec': codec}
+        logger.info(f"📦 封存 {month}: {stats['files']} 個檔案, {raw_size} → {offset} bytes ({codec})")
+        return stats
+
+
+    def _verify(self, month: str, sources: Dict[str, List[bytes]]):
+        """
+        重新讀取磁碟上的索引與封存包，解壓每個區塊並與原始內容逐位元組比對
+
+        Raises:
+            RuntimeError: 任一檔案的行數或內容不符
+        """
+        self._indexes.pop(month, None)
+        index = self._index(month)
+        with open(self.archive_dir / index['pack'], 'rb') as f:
+            for name, lines in sources.items():
+                packed = []
+                for offset, length, count in index['files'].get(name, []):
+                    f.seek(offset)
+                    data = _decompress(index['codec'], f.read(length))
+                    if data.count(b"\n") != count:
+                        raise RuntimeError(f"封存驗證失敗: {name} 的區塊行數不符")
+                    packed.append(data)
+                if b"".join(packed) != b"".join(lines):
+                    raise RuntimeError(f"封存驗證失敗: {name} 的內容與原始檔案不符")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """封存命令列工具"""
+    parser = argparse.ArgumentParser(description="將每日 JSONL 檔案封存為每月壓縮包")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser("compact", help="封存每日檔案")
+    compact.add_argument("--month", action="append", help="要封存的月份 (YYYY-MM)，預設為所有已結束的月份")
+    compact.add_argument("--keep-loose", action="store_true", help="封存後保留原始檔案")
+
+    get = sub.add_parser("get", help="讀取封存中的單篇論文")
+    get.add_argument("paper_id")
+    get.add_argument("--file", help="限定來源檔案名稱")
+
+    listing = sub.add_parser("list", help="列出符合樣式的檔案名稱（未封存檔案與封存包合併）")
+    listing.add_argument("pattern", nargs="?", default="*.jsonl")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    archive = DataArchive(args.data_dir)
+
+    if args.command == "compact":
+        current_month = datetime.now().strftime('%Y-%m')
+        months = args.month or [m for m in archive.loose_months() if m < current_month]
+        for month in months:
+            print(json.dumps(archive.compact(month, remove_loose=not args.keep_loose), ensure_ascii=False))
+        return 0
+
+    if args.command == "list":
+        for name in archive.glob(args.pattern):
+            print(name)
+        return 0
+
+    paper = archive.get_paper(args.paper_id, args.file)
+    if paper is None:
+        print(f"找不到論文: {args.paper_id}", file=sys.stderr)
+        return 1
+    print(json.dumps(paper, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
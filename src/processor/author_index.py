@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+作者索引
+以 SQLite 持久保存正規化作者名 → 論文的對應，每次爬取後寫入當天的論文
+
+資料表（data/author_index.sqlite）:
+    author_papers    (正規化作者名, 論文 ID, 首次出現日期)
+    author_names     (姓氏與首字母, 正規化作者名, 原始寫法)：同一位作者的不同寫法，縮寫查詢時使用
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.author_index lookup "Yann LeCun"
+    PYTHONPATH=src python -m processor.author_index lookup "Y. LeCun"     # 所有姓 LeCun、名字以 Y 開頭的作者
+    PYTHONPATH=src python -m processor.author_index rebuild
+"""
+
+import re
+import sys
+import json
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from processor.archive import DataArchive
+from processor.data_processor import paper_key
+from utils.authors import initial_key, is_abbreviated, normalize_author
+
+logger = logging.getLogger(__name__)
+
+DAY_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})_unique\.jsonl$')
+
+
+class AuthorIndex:
+    """持久化的作者 → 論文索引"""
+
+    def __init__(self, db_path: Path):
+        """
+        開啟（或建立）索引
+
+        Args:
+            db_path: SQLite 檔案路徑
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS author_papers ("
+            " author TEXT NOT NULL, paper TEXT NOT NULL, first_seen TEXT NOT NULL,"
+            " PRIMARY KEY (author, paper)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS author_names ("
+            " initials TEXT NOT NULL, author TEXT NOT NULL, name TEXT NOT NULL,"
+            " PRIMARY KEY (initials, author, name)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        """不同作者的數量"""
+        return self.conn.execute("SELECT COUNT(DISTINCT author) FROM author_papers").fetchone()[0]
+
+    def __enter__(self) -> 'AuthorIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def add_papers(self, papers: Iterable[Dict], date: str) -> int:
+        """
+        記錄一批論文的作者，已存在的對應保留最早的日期
+
+        Args:
+            papers: 論文（需含 id 與 authors）
+            date: 爬取日期（YYYY-MM-DD）
+
+        Returns:
+            新增（或提前首次出現日期）的作者與論文對應數量
+        """
+        links, names = [], []
+        for paper in papers:
+            authors = paper.get('authors') or []
+            if isinstance(authors, str):
+                authors = [a.strip() for a in authors.split(',') if a.strip()]
+            key = paper_key(paper)
+            for name in authors:
+                author = normalize_author(name)
+                if not author:
+                    continue
+                links.append((author, key, date))
+                names.append((initial_key(author) or author, author, name))
+
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO author_papers (author, paper, first_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(author, paper) DO UPDATE SET first_seen = min(first_seen, excluded.first_seen) "
+                "WHERE excluded.first_seen < first_seen",
+                links
+            )
+            added = self.conn.total_changes - before
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO author_names (initials, author, name) VALUES (?, ?, ?)", names
+            )
+        return added
+
+    def resolve(self, name: str) -> List[str]:
+        """
+        名稱對應到的正規化作者名
+
+        全名只對應自己；只寫名字首字母（"Y. LeCun"）時對應所有姓氏與首字母相同的作者
+        """
+        author = normalize_author(name)
+        if not author:
+            return []
+        if not is_abbreviated(author):
+            return [author]
+        rows = self.conn.execute(
+            "SELECT DISTINCT author FROM author_names WHERE initials = ? ORDER BY author", (initial_key(author),)
+        )
+        return [row[0] for row in rows]
+
+    def lookup(self, name: str, limit: Optional[int] = None) -> Dict:
+        """
+        作者的論文與不同寫法
+
+        Returns:
+            {'authors': 對應的正規化作者名, 'names': 原始寫法, 'papers': [{'id', 'date'}]（由新到舊）}
+        """
+        authors = self.resolve(name)
+        if not authors:
+            return {'authors': [], 'names': [], 'papers': []}
+        marks = ','.join('?' * len(authors))
+        names = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT name FROM author_names WHERE author IN ({marks}) ORDER BY name", authors
+        )]
+        sql = (f"SELECT paper, MIN(first_seen) AS day FROM author_papers WHERE author IN ({marks})"
+               f" GROUP BY paper ORDER BY day DESC, paper DESC")
+        params: List = list(authors)
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        papers = [{'id': paper, 'date': day} for paper, day in self.conn.execute(sql, params)]
+        return {'authors': authors, 'names': names, 'papers': papers}
+
+    def rebuild(self, data_dir: Path) -> int:
+        """由資料目錄（含封存包）的 `YYYY-MM-DD_unique.jsonl` 重新匯入所有論文"""
+        archive = DataArchive(data_dir)
+        with self.conn:
+            self.conn.execute("DELETE FROM author_papers")
+            self.conn.execute("DELETE FROM author_names")
+        added = 0
+        for name in archive.glob("*_unique.jsonl"):
+            match = DAY_FILE.match(name)
+            if match:
+                added += self.add_papers(archive.iter_records(name), match.group(1))
+        return added
+
+    def bootstrap(self, data_dir: Path) -> bool:
+        """索引為空時，一次性匯入資料目錄中的所有歷史檔案"""
+        if self.conn.execute("SELECT 1 FROM author_papers LIMIT 1").fetchone():
+            return False
+        added = self.rebuild(data_dir)
+        logger.info(f"👥 建立作者索引: {len(self)} 位作者, {added} 個對應")
+        return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """作者索引命令列工具"""
+    parser = argparse.ArgumentParser(description="作者索引")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="由資料目錄重建索引")
+    lookup = sub.add_parser("lookup", help="查詢作者的論文")
+    lookup.add_argument("name")
+    lookup.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    with AuthorIndex(args.data_dir / "author_index.sqlite") as index:
+        if args.command == "rebuild":
+            index.rebuild(args.data_dir)
+            print(f"✅ 重建完成: {len(index)} 位作者")
+            return 0
+        print(json.dumps(index.lookup(args.name, args.limit), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+主題分群
+以 TF-IDF 向量（標題與摘要，文件頻率取自背景語料）的餘弦相似度，對當天的論文做平均連結的
+階層式分群；相似度低於門檻時停止合併。報告依主題分組，AISummarizer 可為每個主題做一次摘要，
+不必為每篇成員重複相同的背景
+
+分群結果寫入 paper['topic'] = {'id', 'label', 'size'}；成員不足 min_size 的論文歸入 id 0（其他）。
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from processor.feature_extractor import tokenize
+
+logger = logging.getLogger(__name__)
+
+OTHER_TOPIC = {'id': 0, 'label': '其他', 'size': 0}
+
+
+class TopicClusterer:
+    """論文主題分群器"""
+
+    def __init__(self, n_docs: int = 0, doc_freq: Optional[Dict[str, int]] = None,
+                 threshold: float = 0.25, min_size: int = 2, max_size: Optional[int] = None,
+                 label_terms: int = 3):
+        """
+        初始化分群器
+
+        Args:
+            n_docs: 背景語料的論文數
+            doc_freq: 背景語料的文件頻率
+            threshold: 兩群的平均餘弦相似度低於此值時不再合併
+            min_size: 成為主題的最少論文數，不足者歸入「其他」
+            max_size: 單一主題的最多論文數，None 表示不限制
+            label_terms: 主題名稱使用的詞彙數
+        """
+        self.n_docs = n_docs
+        self.doc_freq = doc_freq or {}
+        self.threshold = threshold
+        self.min_size = min_size
+        self.max_size = max_size
+        self.label_terms = label_terms
+
+    @classmethod
+    def from_extractor(cls, extractor, **params) -> 'TopicClusterer':
+        """使用 LocalFeatureExtractor 已載入的背景語料統計"""
+        return cls(extractor.n_docs, extractor.doc_freq, **params)
+
+    def vectors(self, papers: List[Dict]):
+        """
+        建立 L2 正規化的 TF-IDF 向量
+
+        Returns:
+            (CSR 矩陣（論文 × 詞彙）, 詞彙陣列)
+        """
+        vocab: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        for paper in papers:
+            for token in tokenize(f"{paper.get('title', '')} {paper.get('summary', '')}"):
+                indices.append(vocab.setdefault(token, len(vocab)))
+            indptr.append(len(indices))
+        counts = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(papers), max(len(vocab), 1))
+        )
+        counts.sum_duplicates()
+
+        terms = np.empty(len(vocab), dtype=object)
+        for term, idx in vocab.items():
+            terms[idx] = term
+        bg_df = np.fromiter((self.doc_freq.get(t, 0) for t in terms), dtype=np.float64, count=len(terms))
+        batch_df = np.bincount(counts.indices, minlength=len(terms))[:len(terms)]
+        idf = np.log((self.n_docs + len(papers) + 1.0) / (bg_df + batch_df + 1.0)) + 1.0
+
+        weighted = counts.multiply(idf[np.newaxis, :]).tocsr() if len(terms) else counts
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ weighted, terms
+
+    def _merge(self, similarity: np.ndarray) -> List[List[int]]:
+        """
+        平均連結的階層式分群（Lance–Williams 更新，每次合併 O(n)，找最大值 O(n²)）
+
+        Args:
+            similarity: 餘弦相似度矩陣
+
+        Returns:
+            各群的成員索引
+        """
+        n = similarity.shape[0]
+        sim = similarity.astype(np.float64, copy=True)
+        np.fill_diagonal(sim, -np.inf)
+        sizes = np.ones(n)
+        members = [[i] for i in range(n)]
+        while n > 1:
+            flat = int(np.argmax(sim))
+            i, j = divmod(flat, sim.shape[1])
+            if sim[i, j] < self.threshold:
+                break
+            if self.max_size and sizes[i] + sizes[j] > self.max_size:
+                # 這一對不能再合併，其餘的配對仍可繼續
+                sim[i, j] = sim[j, i] = -np.inf
+                continue
+            merged = (sizes[i] * sim[i] + sizes[j] * sim[j]) / (sizes[i] + sizes[j])
+            # 任一方已無法合併（-inf）的配對維持無法合併
+            merged[np.isneginf(sim[i]) | np.isneginf(sim[j])] = -np.inf
+            sim[i], sim[:, i] = merged, merged
+            sim[i, i] = -np.inf
+            sim[j, :] = -np.inf
+            sim[:, j] = -np.inf
+            sizes[i] += sizes[j]
+            members[i].extend(members[j])
+            members[j] = []
+        return [sorted(group) for group in members if group]
+
+    def _label(self, weights: np.ndarray, terms: np.ndarray) -> List[str]:
+        """主題中權重最高的詞彙（雙詞取代其組成單詞）"""
+        selected: List[str] = []
+        for idx in np.argsort(-weights)[:self.label_terms * 4]:
+            if weights[idx] <= 0:
+                break
+            term = terms[idx]
+            if ' ' in term:
+                parts = term.split(' ')
+                selected = [chosen for chosen in selected if chosen not in parts]
+            elif any(term in chosen.split(' ') for chosen in selected if ' ' in chosen):
+                continue
+            selected.append(term)
+        # 候選依權重走訪，雙詞取代單詞後順序仍依權重
+        return selected[:self.label_terms]
+
+    def cluster(self, papers: List[Dict]) -> List[Dict]:
+        """
+        將論文分群
+
+        Args:
+            papers: 論文列表（需含 title 與 summary）
+
+        Returns:
+            主題列表 [{'id', 'label', 'terms', 'members'}]，依論文數由多到少、id 由 1 起算；
+            不含「其他」
+        """
+        if len(papers) < max(self.min_size, 2):
+            return []
+        matrix, terms = self.vectors(papers)
+        similarity = (matrix @ matrix.T).toarray()
+        groups = [g for g in self._merge(similarity) if len(g) >= self.min_size]
+        groups.sort(key=lambda g: (-len(g), g[0]))
+
+        topics = []
+        for topic_id, group in enumerate(groups, 1):
+            weights = np.asarray(matrix[group].sum(axis=0)).ravel()
+            label_terms = self._label(weights, terms)
+            topics.append({
+                'id': topic_id,
+                'label': ", ".join(label_terms) or f"主題 {topic_id}",
+                'terms': label_terms,
+                'members': group,
+            })
+        return topics
+
+    def annotate(self, papers: List[Dict]) -> List[Dict]:
+        """
+        分群並寫入 paper['topic']（原地修改）
+
+        Returns:
+            主題列表（同 cluster）
+        """
+        topics = self.cluster(papers)
+        assigned = set()
+        for topic in topics:
+            info = {'id': topic['id'], 'label': topic['label'], 'size': len(topic['members'])}
+            for i in topic['members']:
+                papers[i]['topic'] = dict(info)
+                assigned.add(i)
+        others = len(papers) - len(assigned)
+        for i, paper in enumerate(papers):
+            if i not in assigned:
+                paper['topic'] = {**OTHER_TOPIC, 'size': others}
+        logger.info(f"🧭 主題分群: {len(papers)} 篇論文 → {len(topics)} 個主題，{others} 篇歸入其他")
+        return topics
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+資料處理器
+以串流產生器處理論文資料的讀寫、去重與新論文過濾
+"""
+
+import re
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.jsonl_codec import AtomicJsonlWriter, iter_jsonl, write_jsonl_atomic
+
+logger = logging.getLogger(__name__)
+
+VERSION_SUFFIX = re.compile(r'v\d+$')
+
+
+def paper_key(paper: Dict) -> str:
+    """
+    取得論文的去重鍵
+
+    Scrapy 流程使用 `id`，API 爬蟲使用 `arxiv_id`；版本後綴（v1、v2…）不影響判斷
+    """
+    paper_id = paper.get('id') or paper.get('arxiv_id') or ''
+    return VERSION_SUFFIX.sub('', str(paper_id))
+
+
+class DataProcessor:
+    """資料處理器類別"""
+
+    def load_papers(self, file_path: Path) -> Iterator[Dict]:
+        """
+        逐行載入 JSONL 檔案中的論文
+
+        檔案已被封存進每月封存包時，改由封存包讀取
+
+        Args:
+            file_path: JSONL 檔案路徑
+
+        Returns:
+            論文產生器
+        """
+        file_path = Path(file_path)
+        if file_path.exists():
+            return iter_jsonl(file_path)
+        # 延遲匯入以避免與 archive 模組循環匯入
+        from processor.archive import DataArchive
+        return DataArchive(file_path.parent).iter_records(file_path.name)
+
+    def save_papers(self, papers: Iterable[Dict], file_path: Path) -> int:
+        """
+        原子寫入論文到 JSONL 檔案
+
+        Args:
+            papers: 論文（可為產生器）
+            file_path: 輸出檔案路徑
+
+        Returns:
+            寫入的論文數量
+        """
+        count = write_jsonl_atomic(file_path, papers)
+        logger.info(f"💾 儲存 {count} 篇論文到 {file_path}")
+        return count
+
+    def tee_papers(self, papers: Iterable[Dict], file_path: Path) -> Iterator[Dict]:
+        """
+        邊寫入檢查點檔案邊把論文往下游傳遞
+
+        只有在上游完整走完時才會把暫存檔改名為 `file_path`，中途中斷不會留下不完整的檔案
+
+        Args:
+            papers: 上游論文串流
+            file_path: 檢查點檔案路徑
+
+        Returns:
+            與輸入相同的論文串流
+        """
+        with AtomicJsonlWriter(file_path) as writer:
+            for paper in papers:
+                writer.write(paper)
+                yield paper
+        logger.info(f"💾 儲存 {writer.count} 篇論文到 {file_path}")
+
+    def deduplicate_papers(self, papers: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        單次走訪去除重複論文，保留第一次出現的版本
+
+        Args:
+            papers: 論文串流
+
+        Returns:
+            去重後的論文串流
+        """
+        seen = set()
+        for paper in papers:
+            key = paper_key(paper)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield paper
+
+    def filter_new_papers(self, papers: Iterable[Dict], previous_files: Optional[List[Path]] = None,
+                          seen_index=None, as_of: Optional[str] = None,
+                          batch_size: int = 5000) -> Iterator[Dict]:
+        """
+        過濾出先前未出現過的新論文
+
+        有提供 `seen_index` 時以持久索引判斷（涵蓋完整歷史，每批一次查詢）；
+        否則讀取 `previous_files` 建立 ID 集合
+
+        Args:
+            papers: 論文串流
+            previous_files: 歷史 JSONL 檔案列表
+            seen_index: SeenIndex 實例
+            as_of: 目標日期，索引中首次出現於此日期（含）之後的論文仍視為新論文
+            batch_size: 每次查詢索引的論文數量
+
+        Returns:
+            新論文串流
+        """
+        if seen_index is not None:
+            yield from self._filter_with_index(papers, seen_index, as_of, batch_size)
+            return
+
+        seen = set()
+        for file_path in previous_files or []:
+            seen.update(paper_key(paper) for paper in self.load_papers(file_path))
+
+        for paper in papers:
+            if paper_key(paper) not in seen:
+                yield paper
+
+    def _filter_with_index(self, papers: Iterable[Dict], seen_index, as_of: Optional[str],
+                           batch_size: int) -> Iterator[Dict]:
+        """分批查詢持久索引"""
+        batch = []
+        for paper in papers:
+            batch.append(paper)
+            if len(batch) >= batch_size:
+                yield from self._unseen(batch, seen_index, as_of)
+                batch = []
+        if batch:
+            yield from self._unseen(batch, seen_index, as_of)
+
+    @staticmethod
+    def _unseen(batch: List[Dict], seen_index, as_of: Optional[str]) -> Iterator[Dict]:
+        seen = seen_index.seen_among((paper_key(p) for p in batch), before=as_of)
+        for paper in batch:
+            if paper_key(paper) not in seen:
+                yield paper
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+本地特徵擷取模組
+以 TF-IDF 與詞彙稀有度計算論文關鍵詞與技術難度，不呼叫任何 LLM
+"""
+
+import re
+import sys
+import json
+import math
+import argparse
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from processor.archive import DataArchive
+from utils.atomic import atomic_open
+from utils.jsonl_codec import iter_jsonl, write_jsonl_atomic
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9\-]*[a-z0-9]|[a-z]")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also although am among an and another any are as at
+be because been before being below between both but by can could did do does doing done down during
+each either et etc even ever every few for from further furthermore had has have having here hence
+how however i if in into is it its itself just less let many may more moreover most much must my
+namely near need neither no nor not now of off often on once one only onto or other our ours out
+over own per rather same several shall she should show shows shown since so some such than that
+the their them then there thereby therefore these they this those though through thus to too
+toward towards under until up upon us use used uses using via was we well were what when where
+whether which while who whose why will with within without would yet you your
+paper propose proposed approach method methods results result based new novel work study task tasks
+present presents model models demonstrate achieve achieves significantly existing different various
+""".split())
+
+DIFFICULTY_LABELS = ("入門", "中等", "進階")
+
+
+def tokenize(text: str) -> List[str]:
+    """將文字切成小寫詞彙，移除停用詞並加入相鄰詞組成的雙詞"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    tokens = []
+    prev = None
+    for word in words:
+        if word in STOPWORDS or len(word) < 3:
+            prev = None
+            continue
+        tokens.append(word)
+        if prev is not None:
+            tokens.append(f"{prev} {word}")
+        prev = word
+    return tokens
+
+
+class LocalFeatureExtractor:
+    """本地關鍵詞與難度擷取器"""
+
+    def __init__(self, cache_path: Optional[Path] = None, top_k: int = 5, min_df: int = 2):
+        """
+        初始化擷取器
+
+        Args:
+            cache_path: 背景語料文件頻率的檔案（通常為 data/background_df.json，隨資料一起提交）
+            top_k: 每篇論文保留的關鍵詞數量
+            min_df: 背景語料中保留的最小文件頻率（降低快取大小）
+        """
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.top_k = top_k
+        self.min_df = min_df
+        self.n_docs = 0
+        self.doc_freq: Dict[str, int] = {}
+        # 背景語料的詞彙總數（BM25 的平均文件長度）與已涵蓋的日期
+        self.total_tokens = 0
+        self.dates: List[str] = []
+
+    def load_background(self) -> bool:
+        """從快取載入背景語料統計"""
+        if not self.cache_path or not self.cache_path.exists():
+            return False
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            self.n_docs = cache['n_docs']
+            self.doc_freq = cache['doc_freq']
+            self.total_tokens = cache.get('total_tokens', 0)
+            self.dates = cache.get('dates', [])
+            logger.info(f"📚 載入背景語料: {self.n_docs} 篇論文, {len(self.doc_freq)} 個詞彙")
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ 背景語料快取無法讀取: {e}")
+            return False
+
+    def build_background(self, papers: Iterable[Dict], dates: Optional[List[str]] = None):
+        """
+        由歷史論文建立背景語料的文件頻率
+
+        Args:
+            papers: 歷史論文（需含 title 與 summary）
+            dates: 這些論文涵蓋的日期（之後 add_documents 遇到相同日期時略過）
+        """
+        df = Counter()
+        n_docs = 0
+        total_tokens = 0
+        for paper in papers:
+            tokens = tokenize(f"{paper.get('title', '')} {paper.get('summary', '')}")
+            df.update(set(tokens))
+            total_tokens += len(tokens)
+            n_docs += 1
+        self.n_docs = n_docs
+        self.total_tokens = total_tokens
+        self.dates = sorted(dates or [])
+        self.doc_freq = {term: count for term, count in df.items() if count >= self.min_df}
+        logger.info(f"📚 建立背景語料: {n_docs} 篇論文, {len(self.doc_freq)} 個詞彙")
+        self._save_background()
+
+    def build_background_from_dir(self, data_dir: Path, pattern: str = "*_unique.jsonl"):
+        """
+        掃描資料目錄中的每日 JSONL 檔案（含封存包）建立背景語料
+
+        Args:
+            data_dir: 資料目錄
+            pattern: 每日檔案的名稱樣式（預設為去重後的檔案；舊版流程使用 AI 增強檔）
+        """
+        archive = DataArchive(data_dir)
+        names = list(archive.glob(pattern))
+
+        def iter_papers():
+            for name in names:
+                yield from archive.iter_records(name)
+
+        self.build_background(iter_papers(), dates=[name[:10] for name in names])
+
+    def add_documents(self, papers: List[Dict], date: str) -> bool:
+        """
+        將一天的論文加入背景語料（每個日期只加入一次，重跑同一天不會重複計算）
+
+        新增的詞彙不套用 min_df，下次完整重建時才會修剪
+
+        Args:
+            papers: 當天去重後的論文
+            date: 日期 (YYYY-MM-DD)
+
+        Returns:
+            是否有更新
+        """
+        if not papers or date in self.dates:
+            return False
+        for paper in papers:
+            tokens = tokenize(f"{paper.get('title', '')} {paper.get('summary', '')}")
+            for term in set(tokens):
+                self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+            self.total_tokens += len(tokens)
+        self.n_docs += len(papers)
+        self.dates = sorted([*self.dates, date])
+        self._save_background()
+        return True
+
+    def _save_background(self):
+        if not self.cache_path:
+            return
+        # 每個詞彙一行且排序，每天的更新在 git 中只是少量的行差異
+        with atomic_open(self.cache_path, 'w') as f:
+            json.dump({
+                'n_docs': self.n_docs,
+                'total_tokens': self.total_tokens,
+                'dates': self.dates,
+                'doc_freq': self.doc_freq,
+            }, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+    def _term_matrix(self, docs: List[List[str]]):
+        """建立整批論文的稀疏詞頻矩陣（論文 × 詞彙，CSR）"""
+        vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, tokens in enumerate(docs):
+            for token in tokens:
+                rows.append(i)
+                cols.append(vocab.setdefault(token, len(vocab)))
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=(len(docs), max(len(vocab), 1)), dtype=np.float32,
+        )
+        counts.sum_duplicates()
+        terms = np.empty(len(vocab), dtype=object)
+        for term, idx in vocab.items():
+            terms[idx] = term
+        return counts, terms
+
+    def annotate(self, papers: List[Dict], keywords: bool = True, difficulty: bool = True) -> List[Dict]:
+        """
+        為整批論文填入 AI.keywords 與 AI.difficulty
+
+        Args:
+            papers: 論文列表（原地修改）
+            keywords: 是否計算關鍵詞
+            difficulty: 是否評估技術難度
+
+        Returns:
+            同一份論文列表
+        """
+        if not papers or not (keywords or difficulty):
+            return papers
+
+        docs = [tokenize(f"{p.get('title', '')} {p.get('summary', '')}") for p in papers]
+        counts, terms = self._term_matrix(docs)
+        if terms.size == 0:
+            return papers
+
+        # 背景語料與本批論文合併計算文件頻率
+        bg_df = np.fromiter((self.doc_freq.get(t, 0) for t in terms), dtype=np.float32, count=terms.size)
+        batch_df = np.bincount(counts.indices, minlength=terms.size).astype(np.float32)
+        total_docs = self.n_docs + len(papers)
+        idf = np.log((total_docs + 1.0) / (bg_df + batch_df + 1.0)) + 1.0
+
+        lengths = np.asarray(counts.sum(axis=1), dtype=np.float32).ravel()
+
+        if keywords:
+            # TF-IDF 只需計算矩陣中的非零項，與 counts 共用同一份稀疏結構
+            row_lengths = np.repeat(lengths, np.diff(counts.indptr))
+            scores = counts.data / row_lengths * idf[counts.indices]
+            self._fill_keywords(papers, counts.indptr, counts.indices, scores, terms)
+        if difficulty:
+            self._fill_difficulty(papers, counts, lengths, idf, bg_df, total_docs)
+        return papers
+
+    def _fill_keywords(self, papers: List[Dict], indptr: np.ndarray, indices: np.ndarray,
+                       scores: np.ndarray, terms: np.ndarray):
+        # 一次排序所有非零項：先依論文、再依分數由高到低
+        rows = np.repeat(np.arange(len(papers)), np.diff(indptr))
+        order = np.lexsort((-scores, rows))
+        ranked = indices[order]
+
+        for i, paper in enumerate(papers):
+            # 多取一些候選，過濾掉被雙詞涵蓋的單詞後再截斷
+            candidates = ranked[indptr[i]:min(indptr[i] + self.top_k * 2, indptr[i + 1])]
+            selected: List[str] = []
+            for term in terms[candidates]:
+                # 已選入雙詞時略過其組成單詞
+                if any(term in chosen.split(' ') for chosen in selected if ' ' in chosen):
+                    continue
+                selected.append(term)
+                if len(selected) == self.top_k:
+                    break
+            paper.setdefault('AI', {})['keywords'] = selected
+
+    def _fill_difficulty(self, papers: List[Dict], counts: sparse.csr_matrix, lengths: np.ndarray,
+                         idf: np.ndarray, bg_df: np.ndarray, total_docs: int):
+        safe_lengths = np.maximum(lengths, 1.0)
+        max_idf = math.log(total_docs + 1.0) + 1.0
+
+        # 詞彙稀有度：以詞頻加權的平均 IDF，正規化到 0~1
+        rarity = (counts @ idf) / safe_lengths / max_idf
+        # 罕見詞比例：背景語料中出現比例低於 0.1% 的詞
+        rare_mask = (bg_df / max(self.n_docs, 1)) < 0.001 if self.n_docs else np.zeros_like(bg_df, dtype=bool)
+        rare_frac = (counts @ rare_mask.astype(np.float32)) / safe_lengths
+
+        summaries = [p.get('summary', '') for p in papers]
+        math_density = np.fromiter(
+            (min((s.count('$') + s.count('\\')) / max(len(s.split()), 1) * 10, 1.0) for s in summaries),
+            dtype=np.float32, count=len(papers)
+        )
+        avg_word_len = np.fromiter(
+            (np.mean([len(w) for w in s.split()]) if s.split() else 0.0 for s in summaries),
+            dtype=np.float32, count=len(papers)
+        )
+        word_len_score = np.clip((avg_word_len - 4.5) / 3.0, 0.0, 1.0)
+
+        score = 0.45 * rarity + 0.25 * rare_frac + 0.15 * math_density + 0.15 * word_len_score
+        levels = np.digitize(score, [0.38, 0.5])
+
+        for paper, level, value in zip(papers, levels, score):
+            ai = paper.setdefault('AI', {})
+            ai['difficulty'] = DIFFICULTY_LABELS[int(level)]
+            ai['difficulty_score'] = round(float(value), 3)
+
+
+def analysis_flags(config_path: Path) -> Dict[str, bool]:
+    """設定檔 ai_analysis 區段的本地關鍵詞與難度開關（預設關閉）"""
+    import yaml
+
+    if not Path(config_path).exists():
+        return {'keywords': False, 'difficulty': False}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    analysis = config.get('ai_analysis') or {}
+    return {
+        'keywords': bool(analysis.get('enable_keyword_scoring', False)),
+        'difficulty': bool(analysis.get('enable_difficulty_assessment', False)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """本地特徵命令列工具（舊版 run.sh 流程在 AI 增強之後、轉成報告之前執行）"""
+    parser = argparse.ArgumentParser(description="本地關鍵詞與難度分析")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄（背景語料存於 background_df.json）")
+    parser.add_argument("--config", type=Path, default=Path("config") / "topics.yaml", help="設定檔")
+    sub = parser.add_subparsers(dest="command", required=True)
+    annotate = sub.add_parser("annotate", help="為 AI 增強檔加上關鍵詞與難度，並將當天的論文併入背景語料")
+    annotate.add_argument("--data", type=Path, required=True, help="AI 增強後的 JSONL（原地改寫）")
+    annotate.add_argument("--date", help="日期 (YYYY-MM-DD)，預設取檔名開頭")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    flags = analysis_flags(args.config)
+    if not any(flags.values()):
+        logger.info("⏭️ 設定檔未啟用本地關鍵詞與難度分析")
+        return 0
+    if not args.data.exists():
+        logger.error(f"❌ 找不到增強檔: {args.data}")
+        return 1
+
+    extractor = LocalFeatureExtractor(args.data_dir / "background_df.json")
+    if not extractor.load_background():
+        # 舊版流程沒有去重檔，以同一語言的 AI 增強檔建立背景語料（例如 *_AI_enhanced_English.jsonl）
+        extractor.build_background_from_dir(args.data_dir, pattern=f"*{args.data.name[10:]}")
+
+    papers = list(iter_jsonl(args.data))
+    extractor.annotate(papers, **flags)
+    write_jsonl_atomic(args.data, papers)
+    extractor.add_documents(papers, args.date or args.data.name[:10])
+    logger.info(f"🔍 本地關鍵詞與難度分析完成: {len(papers)} 篇論文")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""
+論文全文擷取
+在過濾之後、AI 增強之前下載論文 PDF、擷取各章節文字，並依 token 預算挑選段落交給模型
+
+    (seq, paper) ──▶ 下載 × N（每個主機限速）──▶ 內容定址快取 ──▶ 文字擷取（行程池）──▶ 章節分段 ──▶ paper['fulltext']
+
+- 下載以執行緒池並行，同時進行的論文數有上限；同一主機的請求間隔不小於 per_host_interval（arXiv 要求限速），
+  429/503 回應依 Retry-After 延後該主機之後的所有請求
+- PDF 以 SHA-256 存放（data/.cache/fulltext/objects/），URL 對應與最近使用時間記在 index.sqlite，
+  總大小超過上限時刪除最久未使用的檔案；擷取出的章節與 PDF 一起快取，重跑不必重新解析
+- 文字擷取是 CPU 密集工作，在獨立行程中逐頁讀取，累積足夠文字後就停止，不解析整份論文
+- 任何一篇失敗（下載、解析）都只記錄警告，該論文仍以摘要送往模型
+
+PDF 解析需要 pypdf（選用）；未安裝時此階段停用。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.fulltext fetch 2401.00001 2401.00002
+    PYTHONPATH=src python -m processor.fulltext info
+"""
+
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.atomic import write_bytes_atomic
+from utils.lazy_import import lazy_import
+
+# 解析器只在擷取行程中使用；未安裝時為 None
+pypdf = lazy_import('pypdf')
+
+logger = logging.getLogger(__name__)
+
+# 章節擷取的格式版本，改變分段規則時遞增，使快取的章節失效
+EXTRACT_VERSION = 1
+
+USER_AGENT = "daily-arxiv-ai-summary/1.0 (+https://github.com/)"
+
+# 預算不足時依此順序挑選章節（摘要已另外提供）
+SECTION_PRIORITY = ('method', 'results', 'conclusion', 'introduction', 'discussion', 'background', 'other')
+
+# 標準章節標題 → 章節類別
+SECTION_KINDS = {
+    'introduction': 'introduction',
+    'background': 'background',
+    'related work': 'background',
+    'preliminaries': 'background',
+    'method': 'method',
+    'methods': 'method',
+    'methodology': 'method',
+    'approach': 'method',
+    'proposed method': 'method',
+    'model': 'method',
+    'experiments': 'results',
+    'experiment': 'results',
+    'experimental results': 'results',
+    'experimental setup': 'results',
+    'evaluation': 'results',
+    'results': 'results',
+    'discussion': 'discussion',
+    'limitations': 'discussion',
+    'conclusion': 'conclusion',
+    'conclusions': 'conclusion',
+    'conclusion and future work': 'conclusion',
+    'conclusions and future work': 'conclusion',
+}
+
+# 章節之後不再需要的內容
+STOP_SECTIONS = ('references', 'bibliography', 'acknowledgments', 'acknowledgements', 'appendix')
+
+HEADING = re.compile(r'^\s*(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+)?([A-Za-z][A-Za-z ]{2,40}?)\s*$')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數（英文約每 4 個字元一個 token）"""
+    return (len(text) + 3) // 4
+
+
+def pdf_url_for(paper: Dict) -> Optional[str]:
+    """論文的 PDF 網址：爬取時的 pdf_url，沒有時由 arXiv ID 組成"""
+    url = paper.get('pdf_url')
+    if url:
+        return url
+    arxiv_id = paper.get('arxiv_id') or paper.get('id')
+    return f"https://arxiv.org/pdf/{arxiv_id}" if arxiv_id else None
+
+
+def split_sections(text: str) -> List[Dict]:
+    """
+    依章節標題把全文分段
+
+    標題是獨立一行、可帶編號（"3 Method"、"III. EXPERIMENTS"）的標準章節名稱；
+    參考文獻、致謝與附錄之後的內容捨棄，第一個標題之前（標題、作者、摘要）也捨棄
+
+    Returns:
+        [{'title': 原始標題, 'kind': 章節類別, 'text': 內容}]，依文件順序
+    """
+    # 行尾連字號斷字接回
+    text = re.sub(r'(\w)-\n(\w)', r'\1\2', text)
+    sections: List[Dict] = []
+    current: Optional[Dict] = None
+    lines: List[str] = []
+
+    def close():
+        if current is not None:
+            body = _reflow(lines)
+            if body:
+                current['text'] = body
+                sections.append(current)
+
+    for line in text.splitlines():
+        match = HEADING.match(line)
+        name = match.group(1).strip().lower() if match else None
+        if name in STOP_SECTIONS:
+            break
+        if name in SECTION_KINDS:
+            close()
+            current = {'title': match.group(1).strip(), 'kind': SECTION_KINDS[name]}
+            lines = []
+        elif current is not None:
+            lines.append(line)
+    close()
+    return sections
+
+
+def _reflow(lines: List[str]) -> str:
+    """PDF 的硬換行合併成段落，空行為段落分隔"""
+    paragraphs, buffer = [], []
+    for line in lines:
+        line = line.strip()
+        if line:
+            buffer.append(line)
+        elif buffer:
+            paragraphs.append(' '.join(buffer))
+            buffer = []
+    if buffer:
+        paragraphs.append(' '.join(buffer))
+    return '\n\n'.join(paragraphs)
+
+
+def _split_text(text: str, max_tokens: int) -> List[str]:
+    """段落（過長時再依句子、最後硬切）組成不超過 max_tokens 的片段"""
+    max_chars = max_tokens * 4
+    pieces: List[str] = []
+    for paragraph in text.split('\n\n'):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks, buffer = [], ''
+    for piece in pieces:
+        if buffer and len(buffer) + len(piece) + 2 > max_chars:
+            chunks.append(buffer)
+            buffer = ''
+        buffer = f"{buffer}\n\n{piece}" if buffer else piece
+    if buffer:
+        chunks.append(buffer)
+    return chunks
+
+
+def chunk_sections(sections: List[Dict], budget_tokens: int, chunk_tokens: int = 400,
+                   priority: Iterable[str] = SECTION_PRIORITY) -> List[Dict]:
+    """
+    把章節切成片段，在 token 預算內挑選要交給模型的部分
+
+    先依優先順序取每個章節的第一個片段（涵蓋面），預算還有剩時再依相同順序補上後續片段；
+    輸出依文件順序排列
+
+    Args:
+        sections: split_sections 的結果
+        budget_tokens: 所有片段的 token 總預算
+        chunk_tokens: 單一片段的 token 上限
+        priority: 章節類別的優先順序，未列出的類別排在最後
+
+    Returns:
+        [{'section': 章節標題, 'text': 內容, 'tokens': 估計 token 數}]
+    """
+    order = {kind: i for i, kind in enumerate(priority)}
+    ranked = sorted(range(len(sections)), key=lambda i: (order.get(sections[i]['kind'], len(order)), i))
+    chunked = {i: _split_text(sections[i]['text'], chunk_tokens) for i in ranked}
+
+    chosen: Dict[Tuple[int, int], str] = {}
+    remaining = budget_tokens
+    depth = 0
+    while remaining > 0 and any(depth < len(chunks) for chunks in chunked.values()):
+        for i in ranked:
+            if depth < len(chunked[i]):
+                text = chunked[i][depth]
+                tokens = estimate_tokens(text)
+                if tokens <= remaining:
+                    chosen[(i, depth)] = text
+                    remaining -= tokens
+        depth += 1
+
+    return [
+        {'section': sections[i]['title'], 'text': text, 'tokens': estimate_tokens(text)}
+        for (i, _), text in sorted(chosen.items())
+    ]
+
+
+def extract_sections(path: str, max_chars: int = 60000, max_pages: int = 20) -> List[Dict]:
+    """
+    擷取 PDF 的章節（在擷取行程中執行）
+
+    逐頁讀取，累積 max_chars 個字元或 max_pages 頁就停止，長論文不必整份解析
+
+    Args:
+        path: PDF 檔案路徑
+        max_chars: 最多擷取的字元數
+        max_pages: 最多讀取的頁數
+
+    Returns:
+        split_sections 的結果
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    texts: List[str] = []
+    total = 0
+    for number, page in enumerate(reader.pages):
+        if number >= max_pages or total >= max_chars:
+            break
+        text = page.extract_text() or ''
+        texts.append(text)
+        total += len(text)
+    return split_sections('\n'.join(texts))
+
+
+class HostRateLimiter:
+    """每個主機的最小請求間隔；等待時不持有鎖，不同主機互不影響"""
+
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval: 同一主機兩次請求的最小間隔（秒）
+        """
+        self.interval = interval
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        """預約該主機的下一個請求時段並等到該時段"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, host: str, seconds: float):
+        """伺服器要求稍後再試：該主機的所有後續請求延後"""
+        with self._lock:
+            self._next[host] = max(self._next.get(host, 0.0), time.monotonic() + seconds)
+
+
+class PdfCache:
+    """內容定址的 PDF 與章節快取，超過大小上限時刪除最久未使用的項目"""
+
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            root: 快取目錄
+            max_bytes: PDF 與章節檔的總大小上限
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " digest TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS objects_last_used ON objects (last_used)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def pdf_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.pdf"
+
+    def sections_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.v{EXTRACT_VERSION}.json"
+
+    def lookup(self, url: str) -> Optional[str]:
+        """URL 已快取時回傳內容雜湊並更新最近使用時間"""
+        with self._lock:
+            row = self.conn.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            digest = row[0]
+            if not self.pdf_path(digest).exists():
+                with self.conn:
+                    self.conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                    self.conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE objects SET last_used = ? WHERE digest = ?", (time.time(), digest))
+            return digest
+
+    def put(self, url: str, data: bytes) -> str:
+        """
+        存入下載的 PDF（內容相同的檔案只存一份）
+
+        Returns:
+            內容雜湊
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.pdf_path(digest)
+        if not path.exists():
+            write_bytes_atomic(path, data)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO urls (url, digest) VALUES (?, ?)", (url, digest))
+            self.conn.execute(
+                "INSERT INTO objects (digest, size, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used",
+                (digest, len(data), time.time())
+            )
+        self.evict()
+        return digest
+
+    def load_sections(self, digest: str) -> Optional[List[Dict]]:
+        """已擷取過的章節"""
+        path = self.sections_path(digest)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_sections(self, digest: str, sections: List[Dict]):
+        """快取擷取出的章節，大小計入該 PDF"""
+        data = json.dumps(sections, ensure_ascii=False).encode('utf-8')
+        write_bytes_atomic(self.sections_path(digest), data)
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE objects SET size = size + ? WHERE digest = ?", (len(data), digest))
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        刪除最久未使用的項目直到總大小低於上限的 90%
+
+        Returns:
+            刪除的項目數
+        """
+        with self._lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = self.max_bytes * 0.9
+            victims = []
+            for digest, size in self.conn.execute("SELECT digest, size FROM objects ORDER BY last_used"):
+                if total <= target:
+                    break
+                victims.append(digest)
+                total -= size
+            with self.conn:
+                for digest in victims:
+                    self.pdf_path(digest).unlink(missing_ok=True)
+                    for path in self.pdf_path(digest).parent.glob(f"{digest}.v*.json"):
+                        path.unlink(missing_ok=True)
+                    self.conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                    self.conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+        if victims:
+            logger.info(f"🧹 全文快取淘汰 {len(victims)} 份 PDF")
+        return len(victims)
+
+
+class FullTextExtractor:
+    """論文全文擷取階段"""
+
+    def __init__(self, cache_dir: Path, max_cache_bytes: int = 512 * 1024 * 1024,
+                 fetch_workers: int = 4, per_host_interval: float = 1.0, extract_workers: int = 2,
+                 token_budget: int = 3000, chunk_tokens: int = 400, max_pages: int = 20,
+                 timeout: float = 30.0, max_retries: int = 3, max_pdf_bytes: int = 50 * 1024 * 1024):
+        """
+        初始化擷取器
+
+        Args:
+            cache_dir: PDF 與章節快取目錄
+            max_cache_bytes: 快取大小上限
+            fetch_workers: 同時處理的論文數（下載並等待擷取）
+            per_host_interval: 同一主機兩次請求的最小間隔（秒）
+            extract_workers: 擷取行程數
+            token_budget: 每篇論文交給模型的全文 token 預算
+            chunk_tokens: 單一片段的 token 上限
+            max_pages: 每篇論文最多解析的頁數
+            timeout: 單次下載逾時（秒）
+            max_retries: 下載的嘗試次數
+            max_pdf_bytes: 超過此大小的 PDF 放棄下載
+        """
+        self.cache = PdfCache(cache_dir, max_cache_bytes)
+        self.fetch_workers = max(1, fetch_workers)
+        self.extract_workers = max(1, extract_workers)
+        self.limiter = HostRateLimiter(per_host_interval)
+        self.token_budget = token_budget
+        self.chunk_tokens = chunk_tokens
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.max_retries = max(1, max_retries)
+        self.max_pdf_bytes = max_pdf_bytes
+        self._local = threading.local()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {'fetched': 0, 'cached': 0, 'extracted': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """是否能解析 PDF（需要 pypdf）"""
+        return pypdf is not None
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _session(self):
+        """每個下載執行緒各自的 HTTP 連線（requests.Session 不保證執行緒安全）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def fetch(self, url: str) -> str:
+        """
+        取得 PDF（先查快取）
+
+        Returns:
+            內容雜湊
+
+        Raises:
+            IOError: 重試後仍無法下載，或內容不是 PDF
+        """
+        digest = self.cache.lookup(url)
+        if digest is not None:
+            self._count('cached')
+            return digest
+
+        host = urlsplit(url).netloc
+        session = self._session()
+        error: Optional[Exception] = None
+        for attempt in range(self.max_retries):
+            self.limiter.wait(host)
+            try:
+                response = session.get(url, timeout=self.timeout, stream=True)
+                with response:
+                    if response.status_code in (429, 503):
+                        retry_after = response.headers.get('Retry-After', '')
+                        delay = float(retry_after) if retry_after.isdigit() else 2.0 ** (attempt + 1)
+                        self.limiter.defer(host, delay)
+                        raise IOError(f"HTTP {response.status_code}，{delay:.0f} 秒後重試")
+                    response.raise_for_status()
+                    data = bytearray()
+                    for block in response.iter_content(64 * 1024):
+                        data += block
+                        if len(data) > self.max_pdf_bytes:
+                            raise ValueError(f"PDF 超過 {self.max_pdf_bytes} 位元組")
+            except ValueError:
+                raise
+            except Exception as e:
+                error = e
+                logger.debug(f"下載失敗 (嘗試 {attempt + 1}/{self.max_retries}) {url}: {e}")
+                continue
+            if not data.startswith(b'%PDF'):
+                raise ValueError("內容不是 PDF")
+            self._count('fetched')
+            return self.cache.put(url, bytes(data))
+        raise IOError(f"無法下載 {url}: {error}")
+
+    def _sections(self, digest: str) -> List[Dict]:
+        """PDF 的章節（先查快取，否則交給擷取行程）"""
+        sections = self.cache.load_sections(digest)
+        if sections is not None:
+            return sections
+        future = self._pool.submit(
+            extract_sections, str(self.cache.pdf_path(digest)),
+            max_chars=self.token_budget * 4 * 5, max_pages=self.max_pages
+        )
+        sections = future.result()
+        self._count('extracted')
+        self.cache.save_sections(digest, sections)
+        return sections
+
+    def process(self, paper: Dict) -> Optional[List[Dict]]:
+        """
+        一篇論文的全文片段（在下載執行緒中執行）
+
+        Returns:
+            chunk_sections 的結果；沒有 PDF 網址、失敗或找不到任何章節時為 None
+        """
+        url = pdf_url_for(paper)
+        if not url:
+            return None
+        try:
+            sections = self._sections(self.fetch(url))
+        except Exception as e:
+            self._count('failed')
+            logger.warning(f"⚠️ {paper.get('id', url)} 全文擷取失敗，改用摘要: {e}")
+            return None
+        if not sections:
+            return None
+        return chunk_sections(sections, self.token_budget, self.chunk_tokens) or None
+
+    def attach(self, items: Iterable[Tuple[int, Dict]]) -> Iterator[Tuple[int, Dict]]:
+        """
+        串流處理 (序號, 論文)，完成的論文附上 'fulltext' 欄位後依完成順序輸出
+
+        同時處理的論文數不超過 fetch_workers 的兩倍，上游不會被整批讀完；
+        輸出結束（或提前關閉）時停止下載執行緒與擷取行程
+
+        Args:
+            items: (序號, 論文) 串流
+
+        Yields:
+            (序號, 論文)；擷取失敗的論文原樣輸出
+        """
+        self.stats = dict.fromkeys(self.stats, 0)
+        # 以 spawn 建立擷取行程：fork 多執行緒的行程並不安全
+        self._pool = ProcessPoolExecutor(self.extract_workers, mp_context=multiprocessing.get_context('spawn'))
+        threads = ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="fulltext")
+        pending = {}
+        window = self.fetch_workers * 2
+        try:
+            source = iter(items)
+            exhausted = False
+            while not exhausted or pending:
+                while not exhausted and len(pending) < window:
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[threads.submit(self.process, item[1])] = item
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seq, paper = pending.pop(future)
+                    chunks = future.result()
+                    if chunks:
+                        paper = {**paper, 'fulltext': chunks}
+                    yield seq, paper
+        finally:
+            threads.shutdown(wait=True, cancel_futures=True)
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info(
+                f"📄 全文擷取: 下載 {self.stats['fetched']}、快取命中 {self.stats['cached']}、"
+                f"解析 {self.stats['extracted']}、失敗 {self.stats['failed']}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """全文擷取命令列工具"""
+    parser = argparse.ArgumentParser(description="論文全文擷取")
+    parser.add_argument("--cache-dir", type=Path, default=Path("data/.cache/fulltext"), help="快取目錄")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fetch = sub.add_parser("fetch", help="下載並擷取論文全文")
+    fetch.add_argument("ids", nargs="+", help="arXiv ID 或 PDF 網址")
+    fetch.add_argument("--budget", type=int, default=3000, help="每篇論文的 token 預算")
+    sub.add_parser("info", help="快取大小")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.command == "info":
+        cache = PdfCache(args.cache_dir)
+        count = cache.conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        print(json.dumps({'objects': count, 'bytes': cache.total_bytes()}, ensure_ascii=False, indent=2))
+        cache.close()
+        return 0
+
+    extractor = FullTextExtractor(args.cache_dir, token_budget=args.budget)
+    if not extractor.available:
+        print("❌ 需要安裝 pypdf")
+        return 1
+    papers = [
+        {'id': value, 'pdf_url': value} if value.startswith(('http://', 'https://')) else {'id': value}
+        for value in args.ids
+    ]
+    results = [paper for _, paper in sorted(extractor.attach(enumerate(papers)), key=lambda item: item[0])]
+    print(json.dumps([
+        {'id': paper['id'], 'fulltext': paper.get('fulltext')} for paper in results
+    ], ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+欄位式歷史資料庫
+以 NumPy 陣列保存所有爬取與增強過的論文，類別與作者採字典編碼、依月份分區，
+跨日統計（類別趨勢、作者數量等）可直接以向量化運算完成
+
+目錄結構（data/history/）:
+    dictionaries.json         類別與作者字典（只增不減，編碼即為列表位置）
+    YYYY-MM/                  月份分區，每個欄位一個 .npy 檔
+        date.npy              int32，1970-01-01 起算的天數（分區內已排序）
+        id.npy                S24，arXiv ID（去除版本後綴）
+        primary.npy           int32，主要類別編碼
+        cat_offsets.npy       int64，categories 的 CSR 偏移
+        cat_codes.npy         int32，categories 編碼
+        author_offsets.npy    int64，authors 的 CSR 偏移
+        author_codes.npy      int32，authors 編碼
+        enhanced.npy          bool，是否已經過 AI 增強
+        difficulty.npy        float32，本地難度分數（無則為 NaN）
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.history_store rebuild
+    PYTHONPATH=src python -m processor.history_store stats --start 2025-04-01 --end 2025-06-30
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import logging
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from processor.archive import DataArchive
+from processor.data_processor import paper_key
+from utils.atomic import atomic_open
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+COLUMNS = ('date', 'id', 'primary', 'cat_offsets', 'cat_codes',
+           'author_offsets', 'author_codes', 'enhanced', 'difficulty')
+DAY_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})_unique\.jsonl$')
+
+
+def to_day(value: str) -> int:
+    """YYYY-MM-DD → 1970-01-01 起算的天數"""
+    return (datetime.strptime(value, '%Y-%m-%d').date() - EPOCH).days
+
+
+class _Dictionary:
+    """只增不減的字串字典"""
+
+    def __init__(self, values: List[str]):
+        self.values = list(values)
+        self.codes = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class HistoryStore:
+    """欄位式歷史資料庫"""
+
+    def __init__(self, root: Path):
+        """
+        開啟資料庫
+
+        Args:
+            root: 資料庫目錄（通常為 data/history）
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._dict_path = self.root / "dictionaries.json"
+        if self._dict_path.exists():
+            with open(self._dict_path, 'r', encoding='utf-8') as f:
+                dicts = json.load(f)
+        else:
+            dicts = {'categories': [], 'authors': []}
+        self.categories = _Dictionary(dicts['categories'])
+        self.authors = _Dictionary(dicts['authors'])
+
+    # ---- 寫入 ----
+
+    def partitions(self) -> List[str]:
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and re.match(r'^\d{4}-\d{2}$', p.name))
+
+    def _load_partition(self, month: str, mmap: bool = True) -> Optional[Dict[str, np.ndarray]]:
+        part = self.root / month
+        if not (part / "date.npy").exists():
+            return None
+        mode = 'r' if mmap else None
+        return {col: np.load(part / f"{col}.npy", mmap_mode=mode) for col in COLUMNS}
+
+    def _encode(self, day: int, papers: Iterable[Dict]) -> Dict[str, np.ndarray]:
+        ids, primary, cat_codes, author_codes, enhanced, difficulty = [], [], [], [], [], []
+        cat_offsets, author_offsets = [0], [0]
+        for paper in papers:
+            cats = paper.get('categories') or []
+            authors = paper.get('authors') or []
+            if isinstance(authors, str):
+                authors = [a.strip() for a in authors.split(',') if a.strip()]
+            ai = paper.get('AI') or {}
+
+            ids.append(paper_key(paper))
+            primary.append(self.categories.encode(cats[0]) if cats else -1)
+            cat_codes.extend(self.categories.encode(c) for c in cats)
+            cat_offsets.append(len(cat_codes))
+            author_codes.extend(self.authors.encode(a) for a in authors)
+            author_offsets.append(len(author_codes))
+            enhanced.append(bool(ai))
+            difficulty.append(ai.get('difficulty_score', np.nan))
+
+        return {
+            'date': np.full(len(ids), day, dtype=np.int32),
+            'id': np.array(ids, dtype='S24'),
+            'primary': np.array(primary, dtype=np.int32),
+            'cat_offsets': np.array(cat_offsets, dtype=np.int64),
+            'cat_codes': np.array(cat_codes, dtype=np.int32),
+            'author_offsets': np.array(author_offsets, dtype=np.int64),
+            'author_codes': np.array(author_codes, dtype=np.int32),
+            'enhanced': np.array(enhanced, dtype=bool),
+            'difficulty': np.array(difficulty, dtype=np.float32),
+        }
+
+    @staticmethod
+    def _slice(part: Dict[str, np.ndarray], lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """取出 [lo, hi) 列，重新基準化 CSR 偏移"""
+        out = {col: np.asarray(part[col][lo:hi]) for col in ('date', 'id', 'primary', 'enhanced', 'difficulty')}
+        for prefix in ('cat', 'author'):
+            offsets = np.asarray(part[f'{prefix}_offsets'][lo:hi + 1])
+            out[f'{prefix}_codes'] = np.asarray(part[f'{prefix}_codes'][offsets[0]:offsets[-1]])
+            out[f'{prefix}_offsets'] = offsets - offsets[0]
+        return out
+
+    @staticmethod
+    def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        out = {col: np.concatenate([p[col] for p in parts]) for col in ('date', 'id', 'primary', 'enhanced', 'difficulty')}
+        for prefix in ('cat', 'author'):
+            codes = [p[f'{prefix}_codes'] for p in parts]
+            offsets = [np.zeros(1, dtype=np.int64)]
+            base = 0
+            for p in parts:
+                offsets.append(p[f'{prefix}_offsets'][1:] + base)
+                base += len(p[f'{prefix}_codes'])
+            out[f'{prefix}_codes'] = np.concatenate(codes).astype(np.int32)
+            out[f'{prefix}_offsets'] = np.concatenate(offsets).astype(np.int64)
+        return out
+
+    def append_day(self, day_str: str, papers: Iterable[Dict]) -> int:
+        """
+        寫入（或覆寫）某一天的論文；只重寫該月份分區
+
+        Args:
+            day_str: 日期（YYYY-MM-DD）
+            papers: 當天的論文
+
+        Returns:
+            寫入的論文數量
+        """
+        day = to_day(day_str)
+        month = day_str[:7]
+        new = self._encode(day, papers)
+
+        parts = []
+        existing = self._load_partition(month, mmap=False)
+        if existing is not None:
+            dates = existing['date']
+            lo = int(np.searchsorted(dates, day, side='left'))
+            hi = int(np.searchsorted(dates, day, side='right'))
+            if lo > 0:
+                parts.append(self._slice(existing, 0, lo))
+            parts.append(new)
+            if hi < len(dates):
+                parts.append(self._slice(existing, hi, len(dates)))
+        else:
+            parts.append(new)
+
+        # 先寫字典（只增不減，多出的項目無害），再寫分區
+        self._save_dictionaries()
+        self._write_partition(month, self._concat(parts))
+        logger.info(f"🗄️ 歷史資料庫寫入 {day_str}: {len(new['id'])} 篇論文")
+        return len(new['id'])
+
+    def _write_partition(self, month: str, data: Dict[str, np.ndarray]):
+        tmp = Path(tempfile.mkdtemp(prefix=f".{month}.", dir=self.root))
+        try:
+            for col in COLUMNS:
+                np.save(tmp / f"{col}.npy", data[col])
+            final = self.root / month
+            if final.exists():
+                old = self.root / f".{month}.old"
+                shutil.rmtree(old, ignore_errors=True)
+                os.replace(final, old)
+                os.replace(tmp, final)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(tmp, final)
+            os.chmod(final, 0o755)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _save_dictionaries(self):
+        with atomic_open(self._dict_path, 'w') as f:
+            json.dump({'categories': self.categories.values, 'authors': self.authors.values},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+    def rebuild(self, data_dir: Path) -> int:
+        """由資料目錄（含封存包）重建整個資料庫；AI 增強結果覆蓋同 ID 的原始資料"""
+        archive = DataArchive(data_dir)
+        total = 0
+        for name in archive.glob("*_unique.jsonl"):
+            match = DAY_FILE.match(name)
+            if not match:
+                continue
+            day_str = match.group(1)
+            enhanced = {}
+            for enhanced_name in archive.glob(f"{day_str}*_AI_enhanced*.jsonl"):
+                enhanced.update((paper_key(p), p) for p in archive.iter_records(enhanced_name))
+            papers = (enhanced.get(paper_key(p), p) for p in archive.iter_records(name))
+            total += self.append_day(day_str, papers)
+        return total
+
+    # ---- 查詢 ----
+
+    def scan(self, start: str, end: str) -> Dict[str, np.ndarray]:
+        """
+        讀取日期區間 [start, end] 內的所有欄位（以記憶體映射讀取，只複製需要的列）
+        """
+        lo_day, hi_day = to_day(start), to_day(end)
+        parts = []
+        for month in self.partitions():
+            if month < start[:7] or month > end[:7]:
+                continue
+            part = self._load_partition(month)
+            if part is None:
+                continue
+            dates = part['date']
+            lo = int(np.searchsorted(dates, lo_day, side='left'))
+            hi = int(np.searchsorted(dates, hi_day, side='right'))
+            if hi > lo:
+                parts.append(self._slice(part, lo, hi))
+        if not parts:
+            return self._encode(0, [])
+        return self._concat(parts)
+
+    def _top(self, codes: np.ndarray, values: List[str], top: Optional[int]) -> List[Tuple[str, int]]:
+        codes = codes[codes >= 0]
+        if codes.size == 0:
+            return []
+        counts = np.bincount(codes, minlength=len(values))
+        order = np.argsort(-counts, kind='stable')
+        if top:
+            order = order[:top]
+        return [(values[i], int(counts[i])) for i in order if counts[i] > 0]
+
+    def category_counts(self, start: str, end: str, top: Optional[int] = None) -> List[Tuple[str, int]]:
+        """區間內各類別（含次要類別）的論文數量"""
+        return self._top(self.scan(start, end)['cat_codes'], self.categories.values, top)
+
+    def author_counts(self, start: str, end: str, top: Optional[int] = 20) -> List[Tuple[str, int]]:
+        """區間內各作者的論文數量"""
+        return self._top(self.scan(start, end)['author_codes'], self.authors.values, top)
+
+    def category_trend(self, start: str, end: str, categories: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        各主要類別的每月論文數量
+
+        Returns:
+            {類別: {YYYY-MM: 數量}}
+        """
+        data = self.scan(start, end)
+        if data['date'].size == 0:
+            return {}
+        row_months = data['date'].astype('datetime64[D]').astype('datetime64[M]')
+        month_labels, row_month = np.unique(row_months, return_inverse=True)
+        month_labels = [str(m) for m in month_labels]
+
+        primary = data['primary']
+        valid = primary >= 0
+        grid = np.zeros((len(self.categories.values), len(month_labels)), dtype=np.int64)
+        np.add.at(grid, (primary[valid], row_month[valid]), 1)
+
+        wanted = categories or [self.categories.values[i] for i in np.flatnonzero(grid.sum(axis=1))]
+        result = {}
+        for cat in wanted:
+            code = self.categories.codes.get(cat)
+            if code is None:
+                continue
+            result[cat] = {m: int(c) for m, c in zip(month_labels, grid[code])}
+        return result
+
+    def statistics(self, start: str, end: str) -> Dict:
+        """與 ReportGenerator._extract_statistics 相同格式的區間統計"""
+        data = self.scan(start, end)
+        total = int(data['id'].size)
+        if not total:
+            return {'total_papers': 0, 'main_categories': [], 'avg_authors': 0}
+        main_categories = [cat for cat, _ in self._top(data['cat_codes'], self.categories.values, 5)]
+        avg_authors = float(np.diff(data['author_offsets']).mean())
+        return {
+            'total_papers': total,
+            'main_categories': main_categories,
+            'avg_authors': avg_authors,
+            'enhanced_papers': int(data['enhanced'].sum()),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """歷史資料庫命令列工具"""
+    parser = argparse.ArgumentParser(description="欄位式歷史資料庫")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="由資料目錄重建資料庫")
+    for name in ("stats", "categories", "authors", "trend"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--start", required=True, help="起始日期 (YYYY-MM-DD)")
+        cmd.add_argument("--end", required=True, help="結束日期 (YYYY-MM-DD)")
+        cmd.add_argument("--top", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    store = HistoryStore(args.data_dir / "history")
+
+    if args.command == "rebuild":
+        print(f"✅ 重建完成: {store.rebuild(args.data_dir)} 篇論文")
+        return 0
+    if args.command == "stats":
+        result = store.statistics(args.start, args.end)
+    elif args.command == "categories":
+        result = store.category_counts(args.start, args.end, args.top)
+    elif args.command == "authors":
+        result = store.author_counts(args.start, args.end, args.top)
+    else:
+        result = store.category_trend(args.start, args.end)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
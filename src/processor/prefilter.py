@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+相關性預過濾
+以雜湊的單詞與雙詞特徵訓練邏輯迴歸，在關鍵字過濾之後、AI 增強之前丟棄不太可能被收錄的論文
+
+訓練資料來自每次執行：進入報告的論文為正例，被關鍵字、數量限制或相關性排序淘汰的候選為負例；
+列在 flagged.txt 中的論文 ID（人工標記為不相關）一律為負例。每天只以當天的資料更新一次（增量 SGD），
+權重存成 .npy，載入只需讀一個小檔案。正負例都還不足時不過濾任何論文。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.prefilter info
+    PYTHONPATH=src python -m processor.prefilter bootstrap --data-dir data   # 以歷史報告與 flagged.txt 訓練
+"""
+
+import sys
+import json
+import zlib
+import random
+import argparse
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from processor.feature_extractor import tokenize
+from utils.atomic import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+
+
+class RelevancePrefilter:
+    """雜湊特徵的邏輯迴歸預過濾器"""
+
+    def __init__(self, model_dir: Path, n_features: int = 1 << 16, threshold: float = 0.2,
+                 min_examples: int = 50, learning_rate: float = 0.5, l2: float = 1e-6, epochs: int = 3):
+        """
+        初始化預過濾器（有模型檔時載入）
+
+        Args:
+            model_dir: 模型目錄（weights.npy、model.json 與人工標記的 flagged.txt）
+            n_features: 雜湊特徵數（2 的次方）
+            threshold: 預測機率低於此值的論文被丟棄
+            min_examples: 正例與負例都至少累積這麼多篇後才開始過濾
+            learning_rate: SGD 學習率
+            l2: L2 正則化係數
+            epochs: 每次更新走訪資料的次數
+        """
+        self.model_dir = Path(model_dir)
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.epochs = epochs
+        self.n_features = n_features
+        self.weights = np.zeros(n_features, dtype=np.float32)
+        self.bias = 0.0
+        self.n_positive = 0
+        self.n_negative = 0
+        self.dates: List[str] = []
+        self.bootstrapped: Optional[str] = None
+        self._load()
+
+    @property
+    def weights_path(self) -> Path:
+        return self.model_dir / "weights.npy"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.model_dir / "model.json"
+
+    @property
+    def flagged_path(self) -> Path:
+        return self.model_dir / "flagged.txt"
+
+    @property
+    def ready(self) -> bool:
+        """正例與負例是否都已足夠（不足時不過濾）"""
+        return self.n_positive >= self.min_examples and self.n_negative >= self.min_examples
+
+    def _load(self):
+        if not self.meta_path.exists() or not self.weights_path.exists():
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != MODEL_VERSION:
+                logger.warning("⚠️ 預過濾模型版本不同，重新訓練")
+                return
+            weights = np.load(self.weights_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 預過濾模型無法讀取: {e}")
+            return
+        self.n_features = len(weights)
+        self.weights = weights.astype(np.float32, copy=False)
+        self.bias = meta['bias']
+        self.n_positive = meta['n_positive']
+        self.n_negative = meta['n_negative']
+        self.dates = meta.get('dates', [])
+        self.bootstrapped = meta.get('bootstrapped')
+
+    def save(self):
+        """寫出權重與中繼資料"""
+        with tempfile.TemporaryFile() as buffer:
+            np.save(buffer, self.weights)
+            buffer.seek(0)
+            write_bytes_atomic(self.weights_path, buffer.read())
+        meta = {
+            'version': MODEL_VERSION,
+            'n_features': self.n_features,
+            'bias': self.bias,
+            'n_positive': self.n_positive,
+            'n_negative': self.n_negative,
+            'dates': self.dates,
+            'bootstrapped': self.bootstrapped,
+        }
+        write_bytes_atomic(self.meta_path, json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def flagged_ids(self) -> Set[str]:
+        """人工標記為不相關的論文 ID（flagged.txt，每行一個，# 開頭為註解）"""
+        if not self.flagged_path.exists():
+            return set()
+        with open(self.flagged_path, 'r', encoding='utf-8') as f:
+            return {line.split('#')[0].strip() for line in f if line.split('#')[0].strip()}
+
+    def features(self, paper: Dict):
+        """
+        論文的雜湊特徵（出現與否，以 1/sqrt(詞彙數) 正規化）
+
+        Returns:
+            (特徵索引, 特徵值)
+        """
+        tokens = set(tokenize(f"{paper.get('title', '')} {paper.get('summary', '')}"))
+        mask = self.n_features - 1
+        hashed = np.fromiter(
+            (zlib.crc32(token.encode('utf-8')) & mask for token in tokens), dtype=np.int64, count=len(tokens)
+        )
+        indices, counts = np.unique(hashed, return_counts=True)
+        return indices, counts.astype(np.float32) / np.float32(max(len(tokens), 1) ** 0.5)
+
+    def predict_proba(self, papers: List[Dict]) -> np.ndarray:
+        """每篇論文被收錄的機率"""
+        logits = np.empty(len(papers), dtype=np.float64)
+        for i, paper in enumerate(papers):
+            indices, values = self.features(paper)
+            logits[i] = float(self.weights[indices] @ values) + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def keep(self, papers: List[Dict]) -> List[bool]:
+        """
+        每篇論文是否通過預過濾（模型還不足以判斷時全部通過）
+
+        通過的論文寫入 paper['prefilter_score']
+        """
+        if not self.ready or not papers:
+            return [True] * len(papers)
+        probabilities = self.predict_proba(papers)
+        for paper, p in zip(papers, probabilities):
+            paper['prefilter_score'] = round(float(p), 4)
+        return [bool(p >= self.threshold) for p in probabilities]
+
+    def partial_fit(self, positives: Iterable[Dict], negatives: Iterable[Dict], seed: int = 0) -> int:
+        """
+        以一批正例與負例更新模型（SGD，依類別比例加權，避免負例遠多於正例時全部判為負）
+
+        Args:
+            positives: 被收錄的論文
+            negatives: 被淘汰或人工標記的論文
+            seed: 打亂順序的亂數種子
+
+        Returns:
+            訓練的樣本數
+        """
+        examples = [(self.features(p), 1.0) for p in positives]
+        n_pos = len(examples)
+        examples += [(self.features(p), 0.0) for p in negatives]
+        n_neg = len(examples) - n_pos
+        if not examples:
+            return 0
+        class_weight = {
+            1.0: len(examples) / (2.0 * n_pos) if n_pos else 0.0,
+            0.0: len(examples) / (2.0 * n_neg) if n_neg else 0.0,
+        }
+
+        rng = random.Random(seed)
+        weights = self.weights
+        for _ in range(self.epochs):
+            rng.shuffle(examples)
+            for (indices, values), label in examples:
+                logit = float(weights[indices] @ values) + self.bias
+                p = 1.0 / (1.0 + np.exp(-max(min(logit, 30.0), -30.0)))
+                gradient = (p - label) * class_weight[label] * self.learning_rate
+                weights[indices] -= gradient * values + self.learning_rate * self.l2 * weights[indices]
+                self.bias -= gradient
+        self.n_positive += n_pos
+        self.n_negative += n_neg
+        return len(examples)
+
+    def update_day(self, date: str, selected: List[Dict], rejected: List[Dict]) -> bool:
+        """
+        以一天的結果更新並儲存模型（每個日期只訓練一次）
+
+        Args:
+            date: 日期 (YYYY-MM-DD)
+            selected: 進入報告的論文
+            rejected: 被淘汰的候選論文
+
+        Returns:
+            是否有更新
+        """
+        if date in self.dates or not (selected or rejected):
+            return False
+        flagged = self.flagged_ids()
+        positives = [p for p in selected if p.get('id') not in flagged]
+        negatives = list(rejected) + [p for p in selected if p.get('id') in flagged]
+        self.partial_fit(positives, negatives, seed=zlib.crc32(date.encode('utf-8')))
+        self.dates = sorted([*self.dates, date])
+        self.save()
+        logger.info(f"🎯 預過濾模型更新: +{len(positives)} 正例, +{len(negatives)} 負例"
+                    f"（累計 {self.n_positive}/{self.n_negative}）")
+        return True
+
+    def bootstrap(self, data_dir: Path, force: bool = False) -> int:
+        """
+        以歷史報告訓練：AI 增強檔中的論文為正例，flagged.txt 中的論文為負例
+
+        歷史資料不含被淘汰的候選，負例只有人工標記；之後每天的執行會補上淘汰的候選。
+        已由 update_day 訓練過的日期跳過，訓練過的日期記錄在模型中
+
+        Args:
+            data_dir: 資料目錄
+            force: 模型已經以歷史資料訓練過時仍再訓練一次
+
+        Returns:
+            訓練的樣本數
+
+        Raises:
+            ValueError: 模型已經以歷史資料訓練過且未指定 force
+        """
+        from processor.archive import DataArchive
+        from processor.data_processor import paper_key
+
+        if self.bootstrapped and not force:
+            raise ValueError(f"預過濾模型已於 {self.bootstrapped} 以歷史資料訓練過，再訓練一次請加上 --force")
+
+        archive = DataArchive(data_dir)
+        flagged = self.flagged_ids()
+        trained_dates = set(self.dates)
+        positives, negatives = [], []
+        dates = set()
+        seen = set()
+        for name in archive.glob("*_AI_enhanced*.jsonl"):
+            date = name[:10]
+            if date in trained_dates:
+                continue
+            dates.add(date)
+            for paper in archive.iter_records(name):
+                key = paper_key(paper)
+                if key in seen:
+                    continue
+                seen.add(key)
+                (negatives if paper.get('id') in flagged else positives).append(paper)
+        trained = self.partial_fit(positives, negatives)
+        self.dates = sorted(trained_dates | dates)
+        self.bootstrapped = datetime.now().isoformat(timespec='seconds')
+        self.save()
+        logger.info(f"🎯 預過濾模型以歷史資料訓練: {len(positives)} 正例, {len(negatives)} 負例")
+        return trained
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="相關性預過濾模型")
+    parser.add_argument("command", choices=["info", "bootstrap"])
+    parser.add_argument("--model-dir", type=Path, default=Path("data/prefilter"))
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--force", action="store_true", help="已訓練過仍以歷史資料再訓練一次")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    model = RelevancePrefilter(args.model_dir)
+    if args.command == "bootstrap":
+        try:
+            model.bootstrap(args.data_dir, force=args.force)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    print(json.dumps({
+        'ready': model.ready,
+        'n_features': model.n_features,
+        'n_positive': model.n_positive,
+        'n_negative': model.n_negative,
+        'threshold': model.threshold,
+        'dates': len(model.dates),
+        'bootstrapped': model.bootstrapped,
+        'flagged': len(model.flagged_ids()),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+本地論文查詢服務
+以 SQLite（含 FTS5 全文索引）保存所有爬取與增強過的論文，依日期區間、類別、作者與關鍵字
+篩選歷史資料，支援分頁；每次執行後只寫入當天的論文
+
+資料表（data/query_index.sqlite）:
+    papers              每篇論文一列：ID 與日期（只有整數與短字串，計數時掃描很快）
+    paper_records       查詢結果使用的精簡 JSON 與壓縮的全文（刪除全文索引時使用）
+    paper_categories    (類別, 論文)，含次要類別
+    paper_authors       (姓氏, 正規化作者名, 論文)
+    papers_fts          標題、摘要與 AI 關鍵字的 FTS5 全文索引（不另存原文，rowid 與 papers 相同）
+    meta                索引版本與世代編號（每次寫入加一，查詢快取依此失效）
+
+論文的 rowid 為 (1970-01-01 起算的天數 << 20) | 當天序號，因此 rowid 順序即日期順序，
+日期區間就是 rowid 區間：全文索引與 (值, 論文) 索引表都能直接在區間內查找。查詢由最具選擇性的
+條件（作者 > 關鍵字 > 類別）依 rowid 由新到舊走訪，其餘條件以主鍵逐筆檢查，
+查詢成本取決於區間內符合條件的論文數，而不是歷史資料的長度。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m processor.query_index build
+    PYTHONPATH=src python -m processor.query_index query --keyword "diffusion model" --author "Jane Doe" \\
+        --start 2025-05-01 --end 2025-05-31
+    PYTHONPATH=src python -m processor.query_index serve --port 8765
+    # GET http://127.0.0.1:8765/papers?keyword=diffusion&category=cs.CV&page=2
+"""
+
+import re
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import logging
+from collections import OrderedDict
+from datetime import date as Date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from processor.archive import DataArchive
+from processor.data_processor import paper_key
+from utils.authors import normalize_author, surname
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DAY_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})_unique\.jsonl$')
+DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+MAX_PAGE_SIZE = 200
+DAY_SHIFT = 20
+# 查詢結果保留的 AI 欄位（完整資料仍在 data/ 中）
+RESULT_AI_FIELDS = ('tldr', 'keywords', 'difficulty')
+
+
+def match_expression(keyword: str) -> str:
+    """
+    將關鍵字查詢轉成 FTS5 MATCH 運算式
+
+    以雙引號包住的部分為片語，其餘每個詞都必須出現（AND）；最後加上 * 的詞做前綴比對。
+    使用者輸入一律以引號包住，FTS5 的運算子不會被解讀
+
+    Args:
+        keyword: 例如 'diffusion "policy learning" robot*'
+
+    Returns:
+        MATCH 運算式；沒有任何詞時為空字串
+    """
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', keyword):
+        text = phrase if phrase else word
+        prefix = not phrase and text.endswith('*')
+        text = text.rstrip('*') if prefix else text
+        if not re.search(r'\w', text):
+            continue
+        parts.append('"' + text.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(parts)
+
+
+def _day_range(start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+    """日期區間 [start, end] 對應的 rowid 區間（含兩端）"""
+    lo = (Date.fromisoformat(start) - Date(1970, 1, 1)).days << DAY_SHIFT if start else 0
+    hi = (((Date.fromisoformat(end) - Date(1970, 1, 1)).days + 1) << DAY_SHIFT) - 1 if end else 2 ** 63 - 1
+    return lo, hi
+
+
+def _authors(paper: Dict) -> List[str]:
+    authors = paper.get('authors') or []
+    if isinstance(authors, str):
+        authors = [a.strip() for a in authors.split(',') if a.strip()]
+    return authors
+
+
+def _record(date: str, paper: Dict) -> Dict:
+    """查詢結果的精簡紀錄（不含摘要全文）"""
+    ai = paper.get('AI') or {}
+    record = {
+        'id': paper_key(paper),
+        'date': date,
+        'title': paper.get('title', ''),
+        'authors': _authors(paper),
+        'categories': paper.get('categories') or [],
+        'published': paper.get('published', ''),
+        'pdf_url': paper.get('pdf_url', ''),
+    }
+    record.update({field: ai[field] for field in RESULT_AI_FIELDS if ai.get(field)})
+    return record
+
+
+class PaperIndex:
+    """可篩選、分頁的論文查詢索引"""
+
+    def __init__(self, db_path: Path, cache_size: int = 256):
+        """
+        開啟（或建立）索引
+
+        Args:
+            db_path: SQLite 檔案路徑
+            cache_size: 查詢結果 LRU 快取的項目數（0 表示不快取）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # HTTP 伺服器在工作執行緒中查詢；寫入只在每日流程中進行
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self.cache_hits = 0
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row and row[0] != INDEX_VERSION:
+                logger.warning("⚠️ 查詢索引版本不同，清除後重建")
+                for table in ('papers', 'paper_records', 'paper_categories', 'paper_authors', 'papers_fts'):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,)
+            )
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                " rowid INTEGER PRIMARY KEY,"
+                " id TEXT NOT NULL UNIQUE,"
+                " date TEXT NOT NULL"
+                ")"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS paper_records ("
+                " paper INTEGER PRIMARY KEY,"
+                " record TEXT NOT NULL,"
+                " source BLOB NOT NULL"
+                ")"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS paper_categories ("
+                " category TEXT NOT NULL, paper INTEGER NOT NULL,"
+                " PRIMARY KEY (category, paper)"
+                ") WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS paper_authors ("
+                " surname TEXT NOT NULL, author TEXT NOT NULL, paper INTEGER NOT NULL,"
+                " PRIMARY KEY (surname, author, paper)"
+                ") WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+                " title, summary, keywords, content = '', tokenize = 'unicode61 remove_diacritics 2'"
+                ")"
+            )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def __enter__(self) -> 'PaperIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def generation(self) -> int:
+        """每次寫入後遞增；查詢快取的鍵包含此值，其他程序寫入後舊結果自然失效"""
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def dates(self) -> List[str]:
+        """已寫入的日期"""
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT date FROM papers ORDER BY date")]
+
+    # ---- 寫入 ----
+
+    def _delete_rows(self, where: str, params: Sequence):
+        """
+        刪除符合條件的論文
+
+        不存原文的全文索引必須以原本的內容刪除；類別與作者依紀錄中的值以主鍵刪除
+        """
+        rows = self.conn.execute(
+            f"SELECT p.rowid, r.record, r.source FROM papers p JOIN paper_records r ON r.paper = p.rowid WHERE {where}",
+            params
+        ).fetchall()
+        for rowid, record, source in rows:
+            record = json.loads(record)
+            self.conn.execute(
+                "INSERT INTO papers_fts (papers_fts, rowid, title, summary, keywords) VALUES ('delete', ?, ?, ?, ?)",
+                (rowid, *json.loads(zlib.decompress(source)))
+            )
+            self.conn.executemany(
+                "DELETE FROM paper_categories WHERE category = ? AND paper = ?",
+                ((c, rowid) for c in record['categories'])
+            )
+            self.conn.executemany(
+                "DELETE FROM paper_authors WHERE surname = ? AND author = ? AND paper = ?",
+                ((surname(n), n, rowid) for n in map(normalize_author, record['authors']) if n)
+            )
+            self.conn.execute("DELETE FROM paper_records WHERE paper = ?", (rowid,))
+            self.conn.execute("DELETE FROM papers WHERE rowid = ?", (rowid,))
+
+    def add_day(self, date: str, papers: Iterable[Dict]) -> int:
+        """
+        寫入（或覆寫）某一天的論文；同一 ID 出現在其他日期時以較新的寫入為準
+
+        Args:
+            date: 日期（YYYY-MM-DD）
+            papers: 當天的論文
+
+        Returns:
+            寫入的論文數量
+        """
+        first, last = _day_range(date, date)
+        written = 0
+        with self.conn:
+            self._delete_rows("p.rowid BETWEEN ? AND ?", (first, last))
+            for rowid, paper in enumerate(papers, first):
+                if rowid > last:
+                    raise ValueError(f"{date} 的論文超過 {1 << DAY_SHIFT} 篇")
+                record = _record(date, paper)
+                self._delete_rows("p.id = ?", (record['id'],))
+                source = [record['title'], paper.get('summary', ''), ' '.join((paper.get('AI') or {}).get('keywords') or [])]
+                self.conn.execute("INSERT INTO papers (rowid, id, date) VALUES (?, ?, ?)", (rowid, record['id'], date))
+                self.conn.execute(
+                    "INSERT INTO paper_records (paper, record, source) VALUES (?, ?, ?)",
+                    (rowid, json.dumps(record, ensure_ascii=False, separators=(',', ':')),
+                     zlib.compress(json.dumps(source, ensure_ascii=False).encode('utf-8')))
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO paper_categories (category, paper) VALUES (?, ?)",
+                    ((c, rowid) for c in record['categories'])
+                )
+                names = [normalize_author(a) for a in record['authors']]
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO paper_authors (surname, author, paper) VALUES (?, ?, ?)",
+                    ((surname(n), n, rowid) for n in names if n)
+                )
+                self.conn.execute(
+                    "INSERT INTO papers_fts (rowid, title, summary, keywords) VALUES (?, ?, ?, ?)", (rowid, *source)
+                )
+                written += 1
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        self._cache.clear()
+        logger.info(f"🔎 查詢索引寫入 {date}: {written} 篇論文")
+        return written
+
+    def sync(self, data_dir: Path, rebuild: bool = False) -> int:
+        """
+        由資料目錄（含封存包）寫入尚未索引的日期；AI 增強結果覆蓋同 ID 的原始資料
+
+        Args:
+            data_dir: 資料目錄
+            rebuild: 是否重新寫入所有日期
+
+        Returns:
+            寫入的論文數量
+        """
+        archive = DataArchive(data_dir)
+        indexed = set() if rebuild else set(self.dates())
+        total = 0
+        for name in archive.glob("*_unique.jsonl"):
+            match = DAY_FILE.match(name)
+            if not match or match.group(1) in indexed:
+                continue
+            day = match.group(1)
+            enhanced = {}
+            for enhanced_name in archive.glob(f"{day}*_AI_enhanced*.jsonl"):
+                enhanced.update((paper_key(p), p) for p in archive.iter_records(enhanced_name))
+            total += self.add_day(day, (enhanced.get(paper_key(p), p) for p in archive.iter_records(name)))
+        return total
+
+    # ---- 查詢 ----
+
+    @staticmethod
+    def _plan(lo: int, hi: int, categories: Sequence[str], authors: Sequence[str],
+              keyword: Optional[str], relevance: bool) -> Tuple[str, str, List, bool]:
+        """
+        組出查詢：由最具選擇性的條件依 rowid 走訪，其餘條件逐筆以主鍵檢查
+
+        Args:
+            lo, hi: rowid 區間
+            categories: 類別（符合任一個即可）
+            authors: 已正規化的作者名
+            keyword: FTS5 MATCH 運算式
+            relevance: 是否依 BM25 排序（必須由全文索引走訪）
+
+        Returns:
+            (FROM 與 WHERE 子句, 論文 rowid 的運算式, 參數, 走訪結果是否可能重複)
+        """
+        def author_filter(name: str, alias: str = '') -> Tuple[str, List]:
+            # 只有一個詞時比對姓氏
+            if ' ' in name:
+                return f"{alias}surname = ? AND {alias}author = ?", [surname(name), name]
+            return f"{alias}surname = ?", [name]
+
+        category_marks = ','.join('?' * len(categories))
+        # 只比對姓氏時，同一篇論文可能因多位同姓作者走訪兩次
+        distinct = False
+        if keyword and (relevance or not authors):
+            source, key, params = "papers_fts", "papers_fts.rowid", [keyword, lo, hi]
+            clauses = ["papers_fts MATCH ? AND papers_fts.rowid BETWEEN ? AND ?"]
+            keyword = None
+        elif authors:
+            condition, values = author_filter(authors[0], "d.")
+            source, key, params = "paper_authors d", "d.paper", [*values, lo, hi]
+            clauses = [f"{condition} AND d.paper BETWEEN ? AND ?"]
+            distinct = ' ' not in authors[0]
+            authors = authors[1:]
+        elif len(categories) == 1:
+            source, key, params = "paper_categories d", "d.paper", [categories[0], lo, hi]
+            clauses = ["d.category = ? AND d.paper BETWEEN ? AND ?"]
+            categories = []
+        else:
+            source, key, params = "papers d", "d.rowid", [lo, hi]
+            clauses = ["d.rowid BETWEEN ? AND ?"]
+
+        for name in authors:
+            condition, values = author_filter(name)
+            clauses.append(f"EXISTS (SELECT 1 FROM paper_authors WHERE {condition} AND paper = {key})")
+            params.extend(values)
+        if categories:
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM paper_categories WHERE category IN ({category_marks}) AND paper = {key})"
+            )
+            params.extend(categories)
+        if keyword:
+            clauses.append(f"EXISTS (SELECT 1 FROM papers_fts WHERE papers_fts MATCH ? AND rowid = {key})")
+            params.append(keyword)
+        return f" FROM {source} WHERE " + " AND ".join(clauses), key, params, distinct
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              categories: Sequence[str] = (), authors: Sequence[str] = (),
+              keyword: Optional[str] = None, page: int = 1, page_size: int = 20,
+              sort: str = 'date') -> Dict:
+        """
+        篩選論文（所有條件皆需符合）
+
+        Args:
+            start: 起始日期（YYYY-MM-DD，含）
+            end: 結束日期（YYYY-MM-DD，含）
+            categories: 類別（符合任一個即可，含次要類別）
+            authors: 作者（每位都必須出現；只有一個詞時比對姓氏）
+            keyword: 標題、摘要與 AI 關鍵字的全文查詢（語法見 match_expression）
+            page: 頁碼（由 1 起算）
+            page_size: 每頁筆數（上限 MAX_PAGE_SIZE）
+            sort: 'date'（由新到舊）或 'relevance'（全文查詢的 BM25，沒有關鍵字時同 date）
+
+        Returns:
+            {'total', 'page', 'page_size', 'pages', 'results'}
+
+        Raises:
+            ValueError: 日期格式、頁碼或排序方式無效
+        """
+        for value in (start, end):
+            if value and not DATE.match(value):
+                raise ValueError(f"日期格式無效: {value}（應為 YYYY-MM-DD）")
+        if page < 1 or page_size < 1:
+            raise ValueError("頁碼與每頁筆數必須為正整數")
+        if sort not in ('date', 'relevance'):
+            raise ValueError(f"不支援的排序方式: {sort}")
+        page_size = min(page_size, MAX_PAGE_SIZE)
+        expression = match_expression(keyword) if keyword else ''
+        categories = sorted(set(categories))
+        authors = sorted({normalize_author(a) for a in authors} - {''})
+
+        cache_key = (self.generation, start, end, tuple(categories), tuple(authors), expression, page, page_size, sort)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            return self._cache[cache_key]
+
+        relevance = sort == 'relevance' and bool(expression)
+        lo, hi = _day_range(start, end)
+        body, key, params, distinct = self._plan(lo, hi, categories, authors, expression, relevance)
+        distinct = 'DISTINCT ' if distinct else ''
+        total = self.conn.execute(f"SELECT COUNT({distinct}{key}){body}", params).fetchone()[0]
+        order = "bm25(papers_fts, 3.0, 1.0, 2.0), papers_fts.rowid DESC" if relevance else f"{key} DESC"
+        page_ids = [row[0] for row in self.conn.execute(
+            f"SELECT {distinct}{key}{body} ORDER BY {order} LIMIT ? OFFSET ?",
+            [*params, page_size, (page - 1) * page_size]
+        )]
+        records = dict(self.conn.execute(
+            f"SELECT paper, record FROM paper_records WHERE paper IN ({','.join('?' * len(page_ids))})", page_ids
+        )) if page_ids else {}
+        result = {
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': (total + page_size - 1) // page_size,
+            'results': [json.loads(records[i]) for i in page_ids],
+        }
+
+        if self.cache_size:
+            self._cache[cache_key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+def serve(index: PaperIndex, host: str = "127.0.0.1", port: int = 8765):
+    """
+    以標準函式庫的 HTTP 伺服器提供查詢（只讀，預設只接受本機連線）
+
+    GET /papers?start=&end=&category=&author=&keyword=&page=&page_size=&sort=
+        category 與 author 可重複；回傳 PaperIndex.query 的 JSON
+    GET /health
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                with lock:
+                    self._send(200, {'status': 'ok', 'papers': len(index), 'generation': index.generation})
+                return
+            if url.path != '/papers':
+                self._send(404, {'error': f"not found: {url.path}"})
+                return
+            params = parse_qs(url.query)
+            first = lambda name, default=None: params.get(name, [default])[0]
+            try:
+                with lock:
+                    result = index.query(
+                        start=first('start'), end=first('end'),
+                        categories=params.get('category', []), authors=params.get('author', []),
+                        keyword=first('keyword'), page=int(first('page', 1)),
+                        page_size=int(first('page_size', 20)), sort=first('sort', 'date'),
+                    )
+            except (ValueError, sqlite3.OperationalError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(200, result)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    logger.info(f"🌐 查詢服務啟動: http://{host}:{port}/papers（{len(index)} 篇論文）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """查詢索引命令列工具"""
+    parser = argparse.ArgumentParser(description="本地論文查詢服務")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="資料目錄")
+    parser.add_argument("--db", type=Path, help="索引檔案（預設為 <data-dir>/query_index.sqlite）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="寫入尚未索引的日期")
+    build.add_argument("--rebuild", action="store_true", help="重新寫入所有日期")
+    query = sub.add_parser("query", help="查詢論文")
+    query.add_argument("--start", help="起始日期 (YYYY-MM-DD)")
+    query.add_argument("--end", help="結束日期 (YYYY-MM-DD)")
+    query.add_argument("--category", action="append", default=[], help="類別（可重複）")
+    query.add_argument("--author", action="append", default=[], help="作者（可重複）")
+    query.add_argument("--keyword", help="全文查詢")
+    query.add_argument("--page", type=int, default=1)
+    query.add_argument("--page-size", type=int, default=20)
+    query.add_argument("--sort", choices=["date", "relevance"], default="date")
+    query.add_argument("--json", action="store_true", help="輸出 JSON")
+    server = sub.add_parser("serve", help="啟動 HTTP 查詢服務")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    index = PaperIndex(args.db or args.data_dir / "query_index.sqlite")
+
+    if args.command == "build":
+        print(f"✅ 寫入 {index.sync(args.data_dir, rebuild=args.rebuild)} 篇論文到查詢索引")
+        return 0
+    if args.command == "serve":
+        serve(index, args.host, args.port)
+        return 0
+
+    started = time.perf_counter()
+    try:
+        result = index.query(args.start, args.end, args.category, args.author, args.keyword,
+                             args.page, args.page_size, args.sort)
+    except (ValueError, sqlite3.OperationalError) as e:
+        print(f"查詢失敗: {e}", file=sys.stderr)
+        return 1
+    elapsed = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    for paper in result['results']:
+        authors = ', '.join(paper['authors'][:3]) + (' et al.' if len(paper['authors']) > 3 else '')
+        print(f"{paper['date']}  {paper['id']:<12} {paper['title']}\n{'':24}{authors}")
+    print(f"第 {result['page']}/{max(result['pages'], 1)} 頁，共 {result['total']} 篇（{elapsed:.1f} ms）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+BM25 相關性排序
+以設定檔的 include 關鍵字為查詢，對每天的論文（標題與摘要）計算 BM25 分數；
+文件頻率與平均長度取自歷史論文的背景語料（LocalFeatureExtractor），再合併當天的論文
+
+詞頻矩陣只保留查詢詞彙的欄位（scipy.sparse CSR），多個查詢（設定檔）共用同一次斷詞與同一個矩陣，
+分數為一次稀疏矩陣乘法。
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from processor.feature_extractor import STOPWORDS, TOKEN_PATTERN, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def query_terms(keywords: Iterable[str]) -> List[str]:
+    """
+    將關鍵字轉成查詢詞彙（與論文使用相同的斷詞）
+
+    多字關鍵字取其雙詞（"deep learning" → "deep learning"），避免只出現其中一個字的論文得分；
+    單字關鍵字取單詞
+
+    Args:
+        keywords: 關鍵字列表
+
+    Returns:
+        不重複的查詢詞彙，保留順序
+    """
+    terms: List[str] = []
+    for keyword in keywords:
+        tokens = tokenize(keyword)
+        bigrams = [t for t in tokens if ' ' in t]
+        for term in bigrams or tokens:
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+# 位元組 → 空白（TOKEN_PATTERN 以外的字元），非 ASCII 字元編碼時先換成 '?'
+_SEPARATORS = bytes(c if chr(c) in 'abcdefghijklmnopqrstuvwxyz0123456789-' else 32 for c in range(256))
+
+
+def _word_ids(texts: Sequence[str]):
+    """
+    將每篇論文切成 TOKEN_PATTERN 的字詞並轉成編號
+
+    以 bytes.translate 與 split 切出連續字元（C 層級），每段連續字元最多對應一個字詞
+    （去掉開頭的數字、連字號與結尾的連字號；純數字沒有字詞），只有不同的字元段才以正規表示式比對
+
+    Returns:
+        (字詞編號陣列, 各字詞所屬的論文, 不同字詞列表)
+    """
+    runs: List[bytes] = []
+    n_runs = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        doc_runs = text.lower().encode('ascii', 'replace').translate(_SEPARATORS).split()
+        n_runs[i] = len(doc_runs)
+        runs.extend(doc_runs)
+
+    # 與 CountVectorizer 相同的編號方式：每段不同的字元段依第一次出現的順序編號，再對應到字詞
+    run_id: Dict[bytes, int] = defaultdict()
+    run_id.default_factory = run_id.__len__
+    run_ids = np.fromiter(map(run_id.__getitem__, runs), dtype=np.int32, count=len(runs))
+    words: Dict[str, int] = {}
+    run_word = np.full(len(run_id), -1, dtype=np.int32)
+    for run, i in run_id.items():
+        match = TOKEN_PATTERN.search(run.decode('ascii'))
+        if match:
+            run_word[i] = words.setdefault(match.group(), len(words))
+    ids = run_word[run_ids]
+    doc_of = np.repeat(np.arange(len(texts), dtype=np.int32), n_runs)
+    keep = ids >= 0
+    return ids[keep], doc_of[keep], list(words)
+
+
+class BM25Ranker:
+    """BM25 相關性排序器"""
+
+    def __init__(self, n_docs: int = 0, doc_freq: Optional[Dict[str, int]] = None,
+                 total_tokens: int = 0, k1: float = 1.5, b: float = 0.75):
+        """
+        初始化排序器
+
+        Args:
+            n_docs: 背景語料的論文數
+            doc_freq: 背景語料的文件頻率
+            total_tokens: 背景語料的詞彙總數（計算平均文件長度）
+            k1: 詞頻飽和參數
+            b: 文件長度正規化參數
+        """
+        self.n_docs = n_docs
+        self.doc_freq = doc_freq or {}
+        self.total_tokens = total_tokens
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def from_extractor(cls, extractor, **params) -> 'BM25Ranker':
+        """使用 LocalFeatureExtractor 已載入的背景語料統計"""
+        return cls(extractor.n_docs, extractor.doc_freq, extractor.total_tokens, **params)
+
+    def term_matrix(self, texts: Sequence[str], vocab: Dict[str, int]):
+        """
+        建立詞頻矩陣，只保留 vocab 中的詞彙（單詞或雙詞）
+
+        與 tokenize 的結果相同，但整批論文一起處理：停用詞、單詞與相鄰雙詞的比對都是 NumPy 陣列運算
+
+        Args:
+            texts: 論文文字（標題與摘要）
+            vocab: 詞彙 → 欄位
+
+        Returns:
+            (CSR 詞頻矩陣（論文 × 詞彙）, 各論文的詞彙數（含雙詞，與 tokenize 的長度相同）)
+        """
+        ids, doc_of, words = _word_ids(texts)
+        word_id = {word: i for i, word in enumerate(words)}
+        valid = np.fromiter((w not in STOPWORDS and len(w) >= 3 for w in words), dtype=bool, count=len(words))
+
+        # 雙詞：同一篇論文中相鄰且都不是停用詞的兩個字詞
+        word_valid = valid[ids]
+        pair = word_valid[:-1] & word_valid[1:] & (doc_of[:-1] == doc_of[1:])
+        pair_doc = doc_of[:-1][pair]
+        lengths = (np.bincount(doc_of[word_valid], minlength=len(texts))
+                   + np.bincount(pair_doc, minlength=len(texts))).astype(np.float64)
+
+        # 單詞以字詞編號查表，雙詞以 (開頭字詞, 結尾字詞) 在稀疏矩陣中查表（欄位 + 1，0 表示不是查詢詞彙）
+        unigram_col = np.full(len(words), -1, dtype=np.int32)
+        heads, tails, bigram_cols = [], [], []
+        for term, col in vocab.items():
+            parts = term.split(' ')
+            if not all(part in word_id for part in parts):
+                continue
+            if len(parts) == 1:
+                unigram_col[word_id[term]] = col
+            elif len(parts) == 2:
+                heads.append(word_id[parts[0]])
+                tails.append(word_id[parts[1]])
+                bigram_cols.append(col + 1)
+        unigram_col[~valid] = -1
+
+        cols = unigram_col[ids]
+        hit = cols >= 0
+        rows, cols = [doc_of[hit]], [cols[hit]]
+        if heads:
+            bigram_col = sparse.csr_matrix((bigram_cols, (heads, tails)), shape=(len(words), len(words)))
+            found = np.asarray(bigram_col[ids[:-1][pair], ids[1:][pair]]).ravel()
+            hit = found > 0
+            rows.append(pair_doc[hit])
+            cols.append(found[hit] - 1)
+
+        # 同一篇論文的重複詞彙合併計數：以 論文 × 欄位數 + 欄位 的鍵排序後直接組成 CSR（放得下時用 32 位元，排序較快）
+        n_cols = max(len(vocab), 1)
+        key_type = np.uint32 if len(texts) * n_cols < 2 ** 32 else np.int64
+        keys = np.concatenate(rows).astype(key_type) * key_type(n_cols) + np.concatenate(cols).astype(key_type)
+        keys, tf = np.unique(keys, return_counts=True)
+        indptr = np.searchsorted(keys, np.arange(len(texts) + 1, dtype=np.int64) * n_cols)
+        counts = sparse.csr_matrix((tf.astype(np.float64), keys % n_cols, indptr), shape=(len(texts), n_cols))
+        return counts, lengths
+
+    def score_queries(self, papers: List[Dict], queries: List[List[str]]) -> np.ndarray:
+        """
+        對多個查詢計算 BM25 分數
+
+        Args:
+            papers: 論文列表（需含 title 與 summary）
+            queries: 各查詢的關鍵字
+
+        Returns:
+            分數矩陣（論文 × 查詢）；沒有查詢詞彙的查詢整欄為 0
+        """
+        scores = np.zeros((len(papers), len(queries)))
+        query_vocab = [query_terms(keywords) for keywords in queries]
+        vocab: Dict[str, int] = {}
+        for terms in query_vocab:
+            for term in terms:
+                vocab.setdefault(term, len(vocab))
+        if not papers or not vocab:
+            return scores
+
+        texts = [f"{p.get('title', '')} {p.get('summary', '')}" for p in papers]
+        counts, lengths = self.term_matrix(texts, vocab)
+
+        # 背景語料與本批論文合併計算文件頻率與平均長度
+        terms = sorted(vocab, key=vocab.get)
+        bg_df = np.fromiter((self.doc_freq.get(t, 0) for t in terms), dtype=np.float64, count=len(terms))
+        batch_df = np.bincount(counts.indices, minlength=len(terms))[:len(terms)]
+        total_docs = self.n_docs + len(papers)
+        df = bg_df + batch_df
+        idf = np.log1p((total_docs - df + 0.5) / (df + 0.5))
+        avg_len = max((self.total_tokens + lengths.sum()) / total_docs, 1.0)
+
+        # 只對非零項計算詞頻飽和
+        rows = np.repeat(np.arange(len(papers)), np.diff(counts.indptr))
+        tf = counts.data
+        norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / avg_len)
+        weights = counts.copy()
+        weights.data = tf * (self.k1 + 1.0) / (tf + norm)
+
+        # 查詢 × 詞彙的指示矩陣乘上 IDF
+        q_rows = [vocab[t] for terms_ in query_vocab for t in terms_]
+        q_cols = [j for j, terms_ in enumerate(query_vocab) for _ in terms_]
+        query_matrix = sparse.csr_matrix(
+            (idf[q_rows], (q_rows, q_cols)), shape=(counts.shape[1], len(queries))
+        )
+        return np.asarray((weights @ query_matrix).todense())
+
+    def score(self, papers: List[Dict], keywords: Iterable[str]) -> np.ndarray:
+        """以一組關鍵字計算每篇論文的 BM25 分數"""
+        return self.score_queries(papers, [list(keywords)])[:, 0]
+
+    @staticmethod
+    def rank(papers: List[Dict], scores: np.ndarray) -> List[int]:
+        """依分數由高到低排序（同分時較新的論文在前），回傳索引"""
+        order = sorted(range(len(papers)), key=lambda i: papers[i].get('published', ''), reverse=True)
+        order.sort(key=lambda i: -scores[i])
+        return order
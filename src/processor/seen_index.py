@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+已處理論文 ID 索引
+以 SQLite 持久保存所有看過的 arXiv ID，整批論文只需一次查詢即可判斷是否為新論文
+"""
+
+import re
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Set, Tuple
+
+from processor.archive import DataArchive
+from processor.data_processor import paper_key
+
+logger = logging.getLogger(__name__)
+
+DATE_PREFIX = re.compile(r'^(\d{4}-\d{2}-\d{2})_unique$')
+
+
+class SeenIndex:
+    """持久化、只增不減的已處理 ID 索引"""
+
+    def __init__(self, db_path: Path):
+        """
+        開啟（或建立）索引
+
+        Args:
+            db_path: SQLite 檔案路徑（通常為 data/seen_ids.sqlite，隨資料一起提交）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 串流流程中由過濾階段的執行緒使用；同一時間只有一個執行緒存取
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " id TEXT PRIMARY KEY,"
+            " first_seen TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch (id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        """索引是否為空（只讀一列，成本與歷史大小無關）"""
+        return self.conn.execute("SELECT 1 FROM seen LIMIT 1").fetchone() is None
+
+    def __enter__(self) -> 'SeenIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def seen_among(self, ids: Iterable[str], before: Optional[str] = None) -> Set[str]:
+        """
+        以單次查詢找出一批 ID 中已出現過的部分
+
+        Args:
+            ids: 要查詢的 ID
+            before: 只計入首次出現日期早於此日期（YYYY-MM-DD）的紀錄，
+                    讓同一天重跑時不會把當天的論文當成舊論文
+
+        Returns:
+            已出現過的 ID 集合
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM batch")
+            self.conn.executemany("INSERT OR IGNORE INTO batch (id) VALUES (?)", ((i,) for i in ids))
+            if before:
+                rows = self.conn.execute(
+                    "SELECT b.id FROM batch b JOIN seen s ON s.id = b.id WHERE s.first_seen < ?",
+                    (before,)
+                )
+            else:
+                rows = self.conn.execute("SELECT b.id FROM batch b JOIN seen s ON s.id = b.id")
+            found = {row[0] for row in rows}
+            self.conn.execute("DELETE FROM batch")
+        return found
+
+    def add_many(self, ids: Iterable[str], date: str) -> int:
+        """
+        記錄一批 ID，已存在者保留最早的首次出現日期
+
+        Args:
+            ids: 論文 ID
+            date: 首次出現日期（YYYY-MM-DD）
+
+        Returns:
+            新增的 ID 數量
+        """
+        ids = list(ids)
+        with self.conn:
+            # 以 total_changes 的差值計算新增數量，不必 COUNT(*) 掃描整個索引
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (id, first_seen) VALUES (?, ?)", ((i, date) for i in ids)
+            )
+            added = self.conn.total_changes - before
+            if added < len(ids):
+                self.conn.executemany(
+                    "UPDATE seen SET first_seen = ? WHERE id = ? AND first_seen > ?",
+                    ((date, i, date) for i in ids)
+                )
+        return added
+
+    def import_files(self, archive: DataArchive, names: Iterable[str]) -> Tuple[int, int]:
+        """
+        從既有的 `YYYY-MM-DD_unique.jsonl` 檔案（未封存或已封存）匯入 ID
+
+        Returns:
+            (匯入的檔案數, 新增的 ID 數)
+        """
+        n_files = 0
+        added = 0
+        for name in names:
+            match = DATE_PREFIX.match(Path(name).stem)
+            if not match:
+                continue
+            added += self.add_many((paper_key(p) for p in archive.iter_records(name)), match.group(1))
+            n_files += 1
+        return n_files, added
+
+    def bootstrap(self, data_dir: Path) -> bool:
+        """索引為空時，一次性匯入資料目錄中的所有歷史檔案"""
+        if not self.is_empty():
+            return False
+        archive = DataArchive(data_dir)
+        n_files, added = self.import_files(archive, archive.glob("*_unique.jsonl"))
+        logger.info(f"📇 建立已處理 ID 索引: {n_files} 個歷史檔案, {added} 個 ID")
+        return True
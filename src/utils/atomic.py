@@ -0,0 +1,66 @@
+"""
+原子寫入工具
+在目標檔案所在目錄寫入暫存檔，完成後以 os.replace 改名；寫入失敗時刪除暫存檔，目標檔案保持原狀
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Union
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = 'wb', fsync: bool = False) -> Iterator[IO]:
+    """
+    開啟暫存檔供寫入，區塊正常結束時改名為目標檔案
+
+    Args:
+        path: 目標檔案（上層目錄不存在時建立）
+        mode: 'wb' 或 'w'（文字模式使用 UTF-8）
+        fsync: 改名前是否將內容寫入磁碟（資料檔在刪除原始來源前需要）
+
+    Yields:
+        暫存檔的檔案物件
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp 建立的檔案權限為 0600，改為一般資料檔權限
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path: Path, chunks: Iterable[str]):
+    """邊產生邊寫入文字，完成後再改名，不在記憶體中組出整份內容"""
+    with atomic_open(path, 'w') as f:
+        f.writelines(chunks)
+
+
+def write_bytes_atomic(path: Path, data: Union[bytes, Iterable[bytes]], fsync: bool = False) -> int:
+    """
+    原子寫入位元組
+
+    Args:
+        path: 目標檔案
+        data: 完整內容，或依序寫入的多個區塊
+        fsync: 改名前是否將內容寫入磁碟
+
+    Returns:
+        寫入的位元組數
+    """
+    chunks = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+    size = 0
+    with atomic_open(path, 'wb', fsync=fsync) as f:
+        for chunk in chunks:
+            size += f.write(chunk)
+    return size
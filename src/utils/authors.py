@@ -0,0 +1,102 @@
+"""
+作者名稱正規化與追蹤作者比對
+arXiv 的作者名稱寫法不一（重音符號、「姓, 名」、名字縮寫），以正規化後的名稱作為索引鍵；
+追蹤名單預先建成雜湊表，每位作者的比對為 O(1)
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+
+def normalize_author(name: str) -> str:
+    """
+    作者名稱正規化：去除重音符號與標點、轉小寫、合併空白，「姓, 名」改為「名 姓」
+
+    "José  García-López" → "jose garcia lopez"，"LeCun, Yann" → "yann lecun"
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    ascii_name = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    if ascii_name.count(',') == 1:
+        last, first = ascii_name.split(',')
+        ascii_name = f"{first} {last}"
+    return ' '.join(re.sub(r'[^\w]+', ' ', ascii_name.lower()).split())
+
+
+def surname(normalized: str) -> str:
+    """正規化名稱的姓氏（最後一個詞）"""
+    return normalized.rsplit(' ', 1)[-1]
+
+
+def initial_key(normalized: str) -> Optional[str]:
+    """姓氏加名字首字母（"yann lecun" → "lecun y"）；只有一個詞時為 None"""
+    parts = normalized.split(' ')
+    if len(parts) < 2:
+        return None
+    return f"{parts[-1]} {parts[0][0]}"
+
+
+def is_abbreviated(normalized: str) -> bool:
+    """名字是否只寫首字母（"y lecun"）"""
+    parts = normalized.split(' ')
+    return len(parts) >= 2 and len(parts[0]) == 1
+
+
+class FollowedAuthors:
+    """
+    追蹤作者名單
+
+    全名只比對相同的全名，或只寫名字首字母的作者（"Yann LeCun" 比對 "Y. LeCun"）；
+    名單中寫成縮寫的項目比對所有同姓且首字母相同的作者（"Y. LeCun" 比對 "Yann LeCun"）
+    """
+
+    def __init__(self, names: Iterable[str]):
+        """
+        Args:
+            names: 設定檔中的作者名稱
+        """
+        self.by_name: Dict[str, str] = {}
+        # 名單中的縮寫項目：任何同姓、首字母相同的作者
+        self.by_initial: Dict[str, str] = {}
+        # 名單中的全名項目：只比對縮寫的作者
+        self.by_full_initial: Dict[str, str] = {}
+        for name in names:
+            key = normalize_author(name)
+            if not key:
+                continue
+            initials = initial_key(key)
+            if is_abbreviated(key):
+                self.by_initial[initials] = name
+            else:
+                self.by_name[key] = name
+                if initials:
+                    self.by_full_initial.setdefault(initials, name)
+
+    def __bool__(self) -> bool:
+        return bool(self.by_name or self.by_initial)
+
+    def __len__(self) -> int:
+        return len(self.by_name) + len(self.by_initial)
+
+    def match(self, authors: Iterable[str]) -> List[str]:
+        """
+        找出論文作者中的追蹤作者
+
+        Args:
+            authors: 論文的作者名稱
+
+        Returns:
+            符合的追蹤名單項目（設定檔中的寫法），不重複、依作者順序
+        """
+        found: List[str] = []
+        for author in authors:
+            key = normalize_author(author)
+            hit = self.by_name.get(key)
+            if hit is None and (self.by_initial or self.by_full_initial):
+                initials = initial_key(key)
+                hit = self.by_initial.get(initials)
+                if hit is None and is_abbreviated(key):
+                    hit = self.by_full_initial.get(initials)
+            if hit is not None and hit not in found:
+                found.append(hit)
+        return found
@@ -0,0 +1,103 @@
+"""
+JSONL 編解碼工具
+優先使用 orjson，未安裝時退回標準函式庫 json；寫入採用暫存檔加改名的原子操作
+"""
+
+import json
+import logging
+from contextlib import ExitStack
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, Union
+
+from utils.atomic import atomic_open
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+    """處理 JSON 不支援的型別"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if isinstance(obj, Path):
+        return str(obj)
+    raise TypeError(f"無法序列化的型別: {type(obj).__name__}")
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """序列化為單行 JSON（UTF-8 位元組，不含換行）"""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        """序列化為單行 JSON（UTF-8 位元組，不含換行）"""
+        return json.dumps(obj, ensure_ascii=False, default=_default, separators=(',', ':')).encode('utf-8')
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """解析單行 JSON"""
+        return json.loads(data)
+
+
+def iter_lines(stream: IO) -> Iterator[Dict]:
+    """逐行解析已開啟的 JSONL 串流（文字或位元組皆可），略過空行與損毀的行"""
+    for lineno, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError as e:
+            logger.warning(f"⚠️ 第 {lineno} 行 JSON 解析失敗，已略過: {e}")
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    """逐行讀取 JSONL 檔案"""
+    with open(path, 'rb') as f:
+        yield from iter_lines(f)
+
+
+class AtomicJsonlWriter:
+    """原子寫入的 JSONL 寫入器：在同目錄寫暫存檔，成功結束時才改名為目標檔案"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+        self._stack = ExitStack()
+
+    def __enter__(self) -> 'AtomicJsonlWriter':
+        self._file = self._stack.enter_context(atomic_open(self.path, 'wb', fsync=True))
+        return self
+
+    def write(self, record: Dict):
+        self._file.write(dumps(record))
+        self._file.write(b"\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._stack.__exit__(exc_type, exc, tb)
+
+
+def write_jsonl_atomic(path: Path, records: Iterable[Dict]) -> int:
+    """
+    原子寫入 JSONL 檔案
+
+    Args:
+        path: 目標檔案
+        records: 要寫入的資料（可為產生器）
+
+    Returns:
+        寫入的筆數
+    """
+    with AtomicJsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
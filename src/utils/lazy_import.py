@@ -0,0 +1,38 @@
+"""
+延遲載入工具
+大型 SDK（google.generativeai 等）在模組載入時只確認是否已安裝，第一次存取屬性時才真正匯入，
+`--help`、dry-run 或沒有新論文的執行不必付出載入成本
+"""
+
+import sys
+import importlib.util
+from types import ModuleType
+from typing import Optional
+
+
+def lazy_import(name: str) -> Optional[ModuleType]:
+    """
+    延遲匯入模組
+
+    Args:
+        name: 模組名稱（可含點號）
+
+    Returns:
+        第一次存取屬性時才執行的模組；未安裝時回傳 None，
+        因此 `if module is None` / `if not module` 的判斷與 try/except ImportError 的寫法相同
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        # 父套件不存在
+        return None
+    if spec is None or spec.loader is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,129 @@
+"""
+報告清單
+以只增不減的 JSONL 記錄每份產生的報告，README 更新只需讀取檔案尾端，不必掃描整個 data/
+"""
+
+import os
+import re
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+REPORT_NAME = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:_.+)?\.md$')
+
+
+class ReportManifest:
+    """報告清單類別"""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 清單檔案路徑（通常為 data/manifest.jsonl）
+        """
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _iter_reverse_lines(self, block_size: int = 8192) -> Iterator[bytes]:
+        """從檔案尾端往前逐行讀取"""
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                block = f.read(read_size) + remainder
+                lines = block.split(b"\n")
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line
+            if remainder.strip():
+                yield remainder
+
+    def last(self) -> Optional[Dict]:
+        """最後一筆紀錄"""
+        if not self.exists():
+            return None
+        for line in self._iter_reverse_lines():
+            return json.loads(line)
+        return None
+
+    def latest(self, n: int = 10) -> List[Dict]:
+        """
+        最近 n 個日期的報告（同一日期重新產生時取最新的紀錄），依日期由新到舊排序
+
+        只讀取檔案尾端，成本與歷史長度無關
+        """
+        if not self.exists():
+            return []
+        by_date: Dict[str, Dict] = {}
+        for line in self._iter_reverse_lines():
+            record = json.loads(line)
+            by_date.setdefault(record['date'], record)
+            # 報告通常依日期遞增寫入；多讀一些以涵蓋補跑的舊日期
+            if len(by_date) >= n * 2:
+                break
+        return sorted(by_date.values(), key=lambda r: r['date'], reverse=True)[:n]
+
+    def _has_date(self, date: str) -> bool:
+        if not self.exists():
+            return False
+        needle = f'"date": "{date}"'.encode('utf-8')
+        with open(self.path, 'rb') as f:
+            return any(needle in line for line in f)
+
+    def append(self, date: str, paper_count: int, categories: List[str], report_path: str,
+               **extra) -> Dict:
+        """
+        新增一筆報告紀錄
+
+        Args:
+            date: 報告日期（YYYY-MM-DD）
+            paper_count: 論文數量
+            categories: 報告涵蓋的類別
+            report_path: 報告相對於專案根目錄的路徑
+            extra: 其他欄位
+
+        Returns:
+            寫入的紀錄
+        """
+        previous = self.last()
+        total = previous['total_reports'] if previous else 0
+        # 新日期晚於最後一筆時必為新報告；否則（重跑或補跑）才需要確認是否已存在
+        if previous is None or date > previous['date'] or not self._has_date(date):
+            total += 1
+
+        record = {
+            'date': date,
+            'papers': paper_count,
+            'categories': list(categories),
+            'path': report_path,
+            'generated_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            'total_reports': total,
+            **extra,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    def rebuild(self, data_dir: Path, path_prefix: str = "data") -> int:
+        """
+        一次性由既有的 Markdown 報告建立清單（僅在清單不存在時使用）
+
+        Returns:
+            建立的紀錄數量
+        """
+        reports = sorted(
+            (match.group(1), md_file)
+            for md_file in Path(data_dir).glob("*.md")
+            if (match := REPORT_NAME.match(md_file.name))
+        )
+        for date, md_file in reports:
+            self.append(date, -1, [], f"{path_prefix}/{md_file.name}", backfilled=True)
+        return len(reports)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+流程階段指標
+記錄每個階段（crawl、parse、dedup、filter、fulltext、enhance、render）的牆鐘時間、CPU 時間、
+峰值 RSS、輸入/輸出數量與錯誤數，輸出 Prometheus textfile 與 JSON 摘要，並可與上一次執行比較
+
+串流階段以產生器串接在同一個執行緒中，量測採「獨佔時間」：巢狀量測（上游產生器、
+佇列等待）的時間會從外層扣除，因此各階段的時間加總不會重複計算。
+每篇論文只多幾次時鐘讀取，累加值留在區域變數，階段結束時才加鎖寫回。
+
+使用方式（於專案根目錄）:
+    PYTHONPATH=src python -m utils.metrics show data/metrics/last_run.json
+    PYTHONPATH=src python -m utils.metrics compare old.json new.json --threshold 0.5
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.atomic import write_atomic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 1
+STAGE_ORDER = ('crawl', 'parse', 'dedup', 'filter', 'fulltext', 'enhance', 'render')
+PREFIX = "daily_arxiv"
+
+# 指標名稱 → (Prometheus 名稱, 說明)
+PROM_METRICS = {
+    'wall_seconds': ('stage_wall_seconds', 'Exclusive wall-clock time spent in the stage'),
+    'cpu_seconds': ('stage_cpu_seconds', 'Exclusive CPU time spent in the stage'),
+    'peak_rss_bytes': ('stage_peak_rss_bytes', 'Process peak RSS when the stage finished'),
+    'items_in': ('stage_items_in', 'Items consumed by the stage'),
+    'items_out': ('stage_items_out', 'Items produced by the stage'),
+    'errors': ('stage_errors', 'Errors raised or recorded in the stage'),
+}
+
+# 比較時使用的指標與最小絕對差（避免微小波動被視為退步）
+REGRESSION_METRICS = {
+    'wall_seconds': 0.05,
+    'cpu_seconds': 0.05,
+    'peak_rss_bytes': 16 * 1024 * 1024,
+}
+
+
+def peak_rss() -> Optional[int]:
+    """行程目前為止的峰值 RSS（位元組）；不支援的平台回傳 None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 為單位，macOS 以位元組為單位
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class StageStats:
+    """單一階段的累計指標"""
+
+    __slots__ = ('wall', 'cpu', 'items_in', 'items_out', 'errors', 'peak_rss')
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.peak_rss: Optional[int] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            'wall_seconds': round(self.wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            'peak_rss_bytes': self.peak_rss,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'errors': self.errors,
+        }
+
+
+class PipelineMetrics:
+    """流程指標收集器（執行緒安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stages: Dict[str, StageStats] = {}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+
+    def reset(self):
+        """清除所有階段，開始新的一次執行"""
+        with self._lock:
+            self.stages = {}
+            self.started_at = datetime.now().isoformat(timespec='seconds')
+
+    def _stage(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def _nested(self):
+        """目前執行緒中巢狀量測累計的 (牆鐘, CPU) 時間"""
+        local = self._local
+        if not hasattr(local, 'wall'):
+            local.wall = 0.0
+            local.cpu = 0.0
+        return local
+
+    def _commit(self, name: Optional[str], wall: float, cpu: float,
+                items_in: int = 0, items_out: int = 0, errors: int = 0):
+        if name is None:
+            return
+        rss = peak_rss()
+        with self._lock:
+            stats = self._stage(name)
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.items_in += items_in
+            stats.items_out += items_out
+            stats.errors += errors
+            if rss is not None:
+                stats.peak_rss = max(stats.peak_rss or 0, rss)
+
+    def count(self, name: str, items_in: int = 0, items_out: int = 0):
+        """累加階段的輸入/輸出數量"""
+        self._commit(name, 0.0, 0.0, items_in=items_in, items_out=items_out)
+
+    def error(self, name: str, count: int = 1):
+        """記錄階段錯誤（不拋出例外的失敗，例如網路錯誤回傳空結果）"""
+        self._commit(name, 0.0, 0.0, errors=count)
+
+    @contextmanager
+    def measure(self, name: Optional[str], items_in: int = 0, items_out: int = 0):
+        """
+        量測一段程式碼的獨佔時間；區塊拋出例外時記一次錯誤
+
+        Args:
+            name: 階段名稱；None 表示只從外層扣除、不記錄（例如等待佇列）
+            items_in: 此區塊處理的輸入數量
+            items_out: 此區塊產生的輸出數量
+        """
+        local = self._nested()
+        before_wall, before_cpu = local.wall, local.cpu
+        t0, c0 = time.perf_counter(), time.thread_time()
+        errors = 0
+        try:
+            yield
+        except BaseException:
+            errors = 1
+            raise
+        finally:
+            wall = time.perf_counter() - t0
+            cpu = time.thread_time() - c0
+            child_wall, child_cpu = local.wall - before_wall, local.cpu - before_cpu
+            local.wall, local.cpu = before_wall + wall, before_cpu + cpu
+            self._commit(name, wall - child_wall, cpu - child_cpu, items_in, items_out, errors)
+
+    def timed_iter(self, name: Optional[str], iterable: Iterable) -> Iterator:
+        """
+        包裝串流階段：量測產生每個項目的獨佔時間並計算輸出數量
+
+        Args:
+            name: 階段名稱；None 表示只從外層扣除、不記錄
+            iterable: 階段的輸出串流
+
+        Yields:
+            與輸入相同的項目
+        """
+        local = self._nested()
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+        produced = errors = 0
+        perf, thread_time = time.perf_counter, time.thread_time
+        try:
+            while True:
+                before_wall, before_cpu = local.wall, local.cpu
+                t0, c0 = perf(), thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                except BaseException:
+                    errors += 1
+                    raise
+                finally:
+                    dw, dc = perf() - t0, thread_time() - c0
+                    wall += dw - (local.wall - before_wall)
+                    cpu += dc - (local.cpu - before_cpu)
+                    local.wall, local.cpu = before_wall + dw, before_cpu + dc
+                produced += 1
+                yield item
+        finally:
+            self._commit(name, wall, cpu, items_out=produced, errors=errors)
+
+    def summary(self, **extra) -> Dict:
+        """
+        JSON 摘要
+
+        Args:
+            extra: 額外的執行資訊（日期、總耗時等）
+        """
+        with self._lock:
+            names = sorted(self.stages, key=lambda n: (
+                STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER), n
+            ))
+            stages = {name: self.stages[name].as_dict() for name in names}
+        return {
+            'version': SUMMARY_VERSION,
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            **extra,
+            'stages': stages,
+        }
+
+
+def compare(current: Dict, previous: Dict, threshold: float = 0.5) -> List[Dict]:
+    """
+    與上一次執行比較，找出退步的階段
+
+    時間以每個項目的平均值比較（論文數不同的兩天仍可比較）；峰值 RSS 直接比較。
+    增幅超過 threshold 且絕對差超過 REGRESSION_METRICS 的下限才視為退步。
+
+    Args:
+        current: 本次的 JSON 摘要
+        previous: 上一次的 JSON 摘要
+        threshold: 允許的相對增幅（0.5 表示 +50%）
+
+    Returns:
+        [{'stage', 'metric', 'previous', 'current', 'ratio'}]
+    """
+    regressions = []
+    for name, now in current.get('stages', {}).items():
+        before = previous.get('stages', {}).get(name)
+        if not before:
+            continue
+        for metric, floor in REGRESSION_METRICS.items():
+            new_value, old_value = now.get(metric), before.get(metric)
+            if new_value is None or not old_value:
+                continue
+            if metric != 'peak_rss_bytes':
+                new_items = now.get('items_in') or now.get('items_out') or 1
+                old_items = before.get('items_in') or before.get('items_out') or 1
+                if new_value - old_value * new_items / old_items <= floor:
+                    continue
+                new_value, old_value = new_value / new_items, old_value / old_items
+            elif new_value - old_value <= floor:
+                continue
+            ratio = new_value / old_value
+            if ratio > 1 + threshold:
+                regressions.append({
+                    'stage': name,
+                    'metric': metric,
+                    'previous': old_value,
+                    'current': new_value,
+                    'ratio': round(ratio, 3),
+                })
+    return regressions
+
+
+def to_prometheus(summary: Dict) -> str:
+    """
+    轉為 Prometheus textfile 格式（node_exporter textfile collector）
+
+    Args:
+        summary: JSON 摘要（可含 regressions）
+    """
+    lines = []
+    stages = summary.get('stages', {})
+    for key, (name, help_text) in PROM_METRICS.items():
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} gauge")
+        for stage, values in sorted(stages.items()):
+            if values.get(key) is not None:
+                lines.append(f'{PREFIX}_{name}{{stage="{stage}"}} {values[key]}')
+
+    lines.append(f"# HELP {PREFIX}_stage_regression Metric regressed against the previous run")
+    lines.append(f"# TYPE {PREFIX}_stage_regression gauge")
+    flagged = {(r['stage'], r['metric']) for r in summary.get('regressions', [])}
+    for stage in sorted(stages):
+        for metric in REGRESSION_METRICS:
+            lines.append(
+                f'{PREFIX}_stage_regression{{stage="{stage}",metric="{metric}"}} '
+                f'{1 if (stage, metric) in flagged else 0}'
+            )
+
+    if summary.get('wall_clock') is not None:
+        lines.append(f"# HELP {PREFIX}_run_wall_seconds Wall-clock time of the whole run")
+        lines.append(f"# TYPE {PREFIX}_run_wall_seconds gauge")
+        lines.append(f"{PREFIX}_run_wall_seconds {summary['wall_clock']}")
+    lines.append(f"# HELP {PREFIX}_run_timestamp_seconds Unix time the run finished")
+    lines.append(f"# TYPE {PREFIX}_run_timestamp_seconds gauge")
+    lines.append(f"{PREFIX}_run_timestamp_seconds {int(time.time())}")
+    return "\n".join(lines) + "\n"
+
+
+def write_run_metrics(metrics: PipelineMetrics, output_dir: Path, threshold: float = 0.5,
+                      **extra) -> Dict:
+    """
+    寫出本次執行的 JSON 摘要與 Prometheus textfile，並與上一次執行比較
+
+    Args:
+        metrics: 本次執行的指標
+        output_dir: 輸出目錄；寫出 last_run.json 與 pipeline.prom
+        threshold: 退步判定的相對增幅
+        extra: 額外的執行資訊
+
+    Returns:
+        JSON 摘要（含 regressions）
+    """
+    output_dir = Path(output_dir)
+    summary_file = output_dir / "last_run.json"
+    summary = metrics.summary(**extra)
+
+    summary['regressions'] = []
+    if summary_file.exists():
+        try:
+            with open(summary_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            summary['previous_started_at'] = previous.get('started_at')
+            summary['regressions'] = compare(summary, previous, threshold)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 無法讀取上一次的指標: {e}")
+    for r in summary['regressions']:
+        logger.warning(
+            f"⚠️ 效能退步: {r['stage']} {r['metric']} {r['previous']:.4g} → {r['current']:.4g}"
+            f"（{r['ratio']:.2f} 倍）"
+        )
+
+    write_atomic(summary_file, [json.dumps(summary, ensure_ascii=False, indent=2), "\n"])
+    write_atomic(output_dir / "pipeline.prom", [to_prometheus(summary)])
+    logger.info(f"📈 階段指標已寫入 {output_dir}")
+    return summary
+
+
+def format_table(summary: Dict) -> str:
+    """以表格列出各階段指標"""
+    rows = [f"{'stage':<10}{'wall(s)':>10}{'cpu(s)':>10}{'rss(MiB)':>10}{'in':>8}{'out':>8}{'err':>6}"]
+    for name, s in summary.get('stages', {}).items():
+        rss = f"{s['peak_rss_bytes'] / 2**20:.1f}" if s.get('peak_rss_bytes') else "-"
+        rows.append(
+            f"{name:<10}{s['wall_seconds']:>10.3f}{s['cpu_seconds']:>10.3f}{rss:>10}"
+            f"{s['items_in']:>8}{s['items_out']:>8}{s['errors']:>6}"
+        )
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """階段指標命令列工具"""
+    parser = argparse.ArgumentParser(description="檢視與比較流程階段指標")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("show", help="列出一次執行的階段指標")
+    show.add_argument("summary", type=Path)
+
+    cmp_parser = sub.add_parser("compare", help="比較兩次執行，有退步時回傳 1")
+    cmp_parser.add_argument("previous", type=Path)
+    cmp_parser.add_argument("current", type=Path)
+    cmp_parser.add_argument("--threshold", type=float, default=0.5, help="允許的相對增幅")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        with open(args.summary, 'r', encoding='utf-8') as f:
+            print(format_table(json.load(f)))
+        return 0
+
+    with open(args.previous, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    regressions = compare(current, previous, args.threshold)
+    print(json.dumps(regressions, ensure_ascii=False, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+多設定檔（profile）
+每個團隊一份 topics.yaml 形式的設定（類別、關鍵字、數量限制）。爬取時以所有設定檔的類別聯集
+查詢一次，每篇論文只增強一次；各設定檔的過濾條件與報告以「視圖」方式套用在同一份結果上
+
+論文通過哪些設定檔記錄在 `paper['profiles']`，寫入檢查點後重播或重新渲染時不必重新判斷。
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import yaml
+
+# 設定檔可覆寫的頂層區段；未指定的區段沿用 topics.yaml 頂層設定
+PROFILE_KEYS = ('categories', 'keywords', 'limits', 'date_filter', 'output')
+
+PROFILE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def matches_keywords(keywords_config: Optional[Dict], paper: Dict) -> bool:
+    """
+    判斷論文是否通過關鍵字條件
+
+    Args:
+        keywords_config: topics.yaml 的 keywords 區段（include / exclude）
+        paper: 論文資料（需含 title 與 summary）
+    """
+    keywords_config = keywords_config or {}
+    include_keywords = keywords_config.get('include', [])
+    exclude_keywords = keywords_config.get('exclude', [])
+    text_to_search = f"{paper['title']} {paper['summary']}".lower()
+
+    # 檢查包含關鍵字
+    if include_keywords and not any(
+        keyword.lower() in text_to_search for keyword in include_keywords
+    ):
+        return False
+
+    # 檢查排除關鍵字
+    if exclude_keywords and any(
+        keyword.lower() in text_to_search for keyword in exclude_keywords
+    ):
+        return False
+
+    return True
+
+
+def load_profiles(config: Dict, base_dir: Path, names: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    由 topics.yaml 的 profiles 區段建立設定檔
+
+    每個項目需要 name；可以用 config 指向另一份 topics.yaml 形式的檔案（相對於 base_dir），
+    項目中直接寫的區段優先於該檔案，兩者都沒有的區段沿用頂層設定
+
+    Args:
+        config: 已載入的 topics.yaml
+        base_dir: config 路徑的基準目錄（通常為 config/）
+        names: 只保留這些設定檔，None 表示全部
+
+    Returns:
+        設定檔列表（沒有 profiles 區段時為空列表）
+
+    Raises:
+        ValueError: 名稱缺少、重複、含有路徑不允許的字元，或指定的名稱不存在
+    """
+    profiles = []
+    for entry in config.get('profiles') or []:
+        profile = {key: config[key] for key in PROFILE_KEYS if key in config}
+        if entry.get('config'):
+            with open(Path(base_dir) / entry['config'], 'r', encoding='utf-8') as f:
+                external = yaml.safe_load(f) or {}
+            profile.update({key: external[key] for key in PROFILE_KEYS if key in external})
+        profile.update({key: entry[key] for key in PROFILE_KEYS if key in entry})
+
+        name = entry.get('name')
+        if not name or not PROFILE_NAME.match(str(name)):
+            raise ValueError(f"設定檔名稱無效: {name!r}（只能使用英數字、- 與 _）")
+        if any(p['name'] == name for p in profiles):
+            raise ValueError(f"設定檔名稱重複: {name}")
+        profile['name'] = name
+        profiles.append(profile)
+
+    if names is not None:
+        names = list(names)
+        missing = [n for n in names if not any(p['name'] == n for p in profiles)]
+        if missing:
+            raise ValueError(f"找不到設定檔: {', '.join(missing)}")
+        profiles = [p for p in profiles if p['name'] in names]
+    return profiles
+
+
+def union_categories(profiles: List[Dict]) -> List[str]:
+    """所有設定檔的類別聯集（保留第一次出現的順序）"""
+    categories: List[str] = []
+    for profile in profiles:
+        for category in profile.get('categories') or []:
+            if category not in categories:
+                categories.append(category)
+    return categories
+
+
+def profile_limit(profile: Dict) -> int:
+    """設定檔每日最多收錄的論文數"""
+    return (profile.get('limits') or {}).get('max_papers_per_day', 50)
+
+
+def profile_in_scope(profile: Dict, paper: Dict) -> bool:
+    """論文是否屬於設定檔的類別（未設定類別時全部屬於）"""
+    categories = profile.get('categories')
+    return not categories or bool(set(categories).intersection(paper.get('categories') or []))
+
+
+def profile_matches(profile: Dict, paper: Dict) -> bool:
+    """論文是否屬於設定檔的類別並通過其關鍵字條件"""
+    return profile_in_scope(profile, paper) and matches_keywords(profile.get('keywords'), paper)
+
+
+def profile_view(profile: Dict, papers: Iterable[Dict]) -> List[Dict]:
+    """設定檔的論文視圖（依爬取時標記的 paper['profiles']，保留原始順序）"""
+    name = profile['name']
+    return [paper for paper in papers if name in (paper.get('profiles') or ())]
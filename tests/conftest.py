@@ -0,0 +1,11 @@
+"""
+測試共用設定
+與命令列工具相同，以 src 為匯入根目錄（放在最前面，避免專案根目錄的舊版 ai/ 套件遮蔽 src/ai）
+"""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,53 @@
+"""
+DataArchive 封存與驗證測試
+"""
+
+import json
+
+import pytest
+
+from processor import archive as archive_module
+from processor.archive import DataArchive, main
+
+
+def write_day(data_dir, name, ids):
+    with open(data_dir / name, 'w', encoding='utf-8') as f:
+        for arxiv_id in ids:
+            f.write(json.dumps({'id': arxiv_id, 'title': f'Paper {arxiv_id}'}) + "\n")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_day(tmp_path, '2025-05-01.jsonl', [f'2505.{i:05d}' for i in range(5)])
+    write_day(tmp_path, '2025-05-02_unique.jsonl', [f'2505.{i:05d}' for i in range(5, 9)])
+    return tmp_path
+
+
+def test_compact_reads_back_and_removes_loose(data_dir):
+    archive = DataArchive(data_dir, frame_lines=2)
+    stats = archive.compact('2025-05')
+
+    assert stats['files'] == 2
+    assert not list(data_dir.glob('*.jsonl'))
+    reader = DataArchive(data_dir)
+    assert reader.glob('*.jsonl') == ['2025-05-01.jsonl', '2025-05-02_unique.jsonl']
+    assert [r['id'] for r in reader.iter_records('2025-05-02_unique.jsonl')] == [f'2505.{i:05d}' for i in range(5, 9)]
+    assert reader.get_paper('2505.00003')['title'] == 'Paper 2505.00003'
+
+
+def test_corrupt_pack_keeps_loose_files(data_dir, monkeypatch):
+    real = archive_module._compress
+    # 寫入的區塊與原始內容不同（模擬壓縮或寫入錯誤）
+    monkeypatch.setattr(archive_module, '_compress', lambda codec, data: real(codec, data.replace(b'Paper', b'Pap3r')))
+
+    with pytest.raises(RuntimeError, match="封存驗證失敗"):
+        DataArchive(data_dir).compact('2025-05')
+    assert sorted(p.name for p in data_dir.glob('*.jsonl')) == ['2025-05-01.jsonl', '2025-05-02_unique.jsonl']
+
+
+def test_list_includes_archived_days(data_dir, capsys):
+    DataArchive(data_dir).compact('2025-05')
+    write_day(data_dir, '2025-06-01.jsonl', ['2506.00001'])
+
+    assert main(['--data-dir', str(data_dir), 'list', '*.jsonl']) == 0
+    assert capsys.readouterr().out.split() == ['2025-05-01.jsonl', '2025-05-02_unique.jsonl', '2025-06-01.jsonl']
@@ -0,0 +1,84 @@
+"""
+常駐模式公告時間與健康檢查測試
+"""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pipeline.daemon import ANNOUNCE_TZ, DaemonStatus, check_health, main, next_announcement
+
+UTC = timezone.utc
+
+
+def eastern(*args):
+    return datetime(*args, tzinfo=ANNOUNCE_TZ)
+
+
+@pytest.mark.parametrize("now, expected", [
+    # 週四公告前 → 當天；週四公告時間整點（已公告）→ 跳過週五、週六到週日
+    (eastern(2025, 6, 12, 19, 59), eastern(2025, 6, 12, 20)),
+    (eastern(2025, 6, 12, 20), eastern(2025, 6, 15, 20)),
+    # 週五、週六沒有公告
+    (eastern(2025, 6, 13, 9), eastern(2025, 6, 15, 20)),
+    (eastern(2025, 6, 14, 23, 30), eastern(2025, 6, 15, 20)),
+    # 週日公告後 → 週一
+    (eastern(2025, 6, 15, 20, 0, 1), eastern(2025, 6, 16, 20)),
+    # UTC 已是週六，美東仍是週五晚上
+    (datetime(2025, 6, 14, 1, 0, tzinfo=UTC), eastern(2025, 6, 15, 20)),
+])
+def test_next_announcement_skips_weekend(now, expected):
+    result = next_announcement(now)
+    assert result == expected
+    assert result.weekday() in (6, 0, 1, 2, 3)
+
+
+def test_next_announcement_across_dst():
+    # 2025-03-09（週日）凌晨開始夏令時間：公告仍是當地 20:00，即 UTC 00:00（前一天是 01:00）
+    spring = next_announcement(eastern(2025, 3, 8, 12))
+    assert (spring.hour, spring.utcoffset()) == (20, timedelta(hours=-4))
+    assert spring.astimezone(UTC) == datetime(2025, 3, 10, 0, tzinfo=UTC)
+    assert next_announcement(eastern(2025, 3, 6, 21)) == spring
+
+    # 2025-11-02（週日）凌晨結束夏令時間：當地 20:00 為 UTC 01:00
+    fall = next_announcement(datetime(2025, 11, 1, 12, tzinfo=UTC))
+    assert (fall.hour, fall.utcoffset()) == (20, timedelta(hours=-5))
+    assert fall.astimezone(UTC) == datetime(2025, 11, 3, 1, tzinfo=UTC)
+
+
+def write_status(path, **fields):
+    status = {'state': 'waiting', 'pid': 0, 'heartbeat': datetime.now(UTC).isoformat(timespec='seconds')}
+    status.update(fields)
+    path.write_text(json.dumps(status), encoding='utf-8')
+
+
+def test_check_health_live_daemon(tmp_path):
+    path = tmp_path / "status.json"
+    DaemonStatus(path).update(state='waiting')
+
+    healthy, reason = check_health(path)
+    assert healthy, reason
+    assert main(['status', '--status-file', str(path)]) == 0
+
+
+def test_check_health_failures(tmp_path):
+    path = tmp_path / "status.json"
+    assert not check_health(path)[0]
+
+    write_status(path, state='stopped', pid=os.getpid())
+    assert check_health(path) == (False, "常駐行程已停止")
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    write_status(path, pid=exited.pid)
+    assert check_health(path) == (False, "常駐行程不存在")
+
+    stale = (datetime.now(UTC) - timedelta(minutes=10)).isoformat(timespec='seconds')
+    write_status(path, pid=os.getpid(), heartbeat=stale)
+    healthy, reason = check_health(path, max_age=300)
+    assert not healthy and "心跳" in reason
+    assert main(['status', '--status-file', str(path), '--max-age', '300']) == 1
@@ -0,0 +1,106 @@
+"""
+LocalFeatureExtractor 背景語料與命令列測試
+"""
+
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+import main as pipeline_main
+from processor.data_processor import DataProcessor
+from processor.feature_extractor import LocalFeatureExtractor, main
+
+sys.path.append(str(Path(__file__).parent.parent))
+from to_md.convert import convert  # noqa: E402
+
+PAPERS = [
+    {'id': '2506.00001', 'title': 'Graph neural networks for molecules', 'summary': 'Message passing on molecular graphs.'},
+    {'id': '2506.00002', 'title': 'Diffusion models for images', 'summary': 'Score-based generative modeling.'},
+    {'id': '2506.00003', 'title': 'Graph transformers', 'summary': 'Attention over graph structure.'},
+]
+
+
+def write_jsonl(path, papers):
+    with open(path, 'w', encoding='utf-8') as f:
+        for paper in papers:
+            f.write(json.dumps(paper) + "\n")
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def updater(tmp_path):
+    """只帶有 _update_background 所需屬性的更新器（不讀取專案的設定與資料目錄）"""
+    updater = object.__new__(pipeline_main.DailyArxivUpdater)
+    updater.topics_config = {'ai_analysis': {'enable_keyword_scoring': True}}
+    updater.data_dir = tmp_path
+    updater.processor = DataProcessor()
+    updater.logger = logging.getLogger("test")
+    updater.feature_extractor = LocalFeatureExtractor(tmp_path / "background_df.json")
+    return updater
+
+
+def test_update_background_same_date_counts_once(updater, tmp_path):
+    write_jsonl(tmp_path / "2025-06-01_unique.jsonl", PAPERS[:1])
+    unique_file = tmp_path / "2025-06-02_unique.jsonl"
+    write_jsonl(unique_file, PAPERS[1:])
+
+    updater._update_background("2025-06-02", unique_file)
+    extractor = updater.feature_extractor
+    snapshot = (extractor.n_docs, extractor.total_tokens, dict(extractor.doc_freq))
+    assert extractor.n_docs == 3
+    assert extractor.doc_freq['graph'] == 2
+
+    updater._update_background("2025-06-02", unique_file)
+    assert (extractor.n_docs, extractor.total_tokens, extractor.doc_freq) == snapshot
+
+    # 重新啟動後（由快取載入）再跑同一天也不會重複計算
+    updater.feature_extractor = LocalFeatureExtractor(tmp_path / "background_df.json")
+    updater._update_background("2025-06-02", unique_file)
+    assert (updater.feature_extractor.n_docs, updater.feature_extractor.doc_freq) == (snapshot[0], snapshot[2])
+
+
+def test_annotate_cli_feeds_legacy_report(tmp_path):
+    config = tmp_path / "topics.yaml"
+    config.write_text("ai_analysis:\n  enable_keyword_scoring: true\n  enable_difficulty_assessment: true\n")
+    write_jsonl(tmp_path / "2025-06-01_AI_enhanced_English.jsonl", [dict(PAPERS[0], AI={})])
+    enhanced = tmp_path / "2025-06-02_AI_enhanced_English.jsonl"
+    write_jsonl(enhanced, [
+        dict(paper, authors=['A. Author'], categories=['cs.LG'], abs=f"https://arxiv.org/abs/{paper['id']}",
+             AI={'tldr': 't', 'motivation': 'm', 'method': 'me', 'result': 'r', 'conclusion': 'c'})
+        for paper in PAPERS[1:]
+    ])
+    args = ['--data-dir', str(tmp_path), '--config', str(config), 'annotate', '--data', str(enhanced)]
+
+    assert main(args) == 0
+    papers = read_jsonl(enhanced)
+    assert all(paper['AI']['keywords'] and paper['AI']['difficulty'] for paper in papers)
+    background = json.loads((tmp_path / "background_df.json").read_text())
+    assert background['dates'] == ['2025-06-01', '2025-06-02'] and background['n_docs'] == 3
+
+    assert main(args) == 0
+    assert json.loads((tmp_path / "background_df.json").read_text()) == background
+
+    out = io.StringIO()
+    with open(enhanced, 'r', encoding='utf-8') as f:
+        convert(f, out, preference=['cs.LG'])
+    assert f"Keywords: {', '.join(papers[0]['AI']['keywords'])}" in out.getvalue()
+    assert f"Difficulty: {papers[0]['AI']['difficulty']}" in out.getvalue()
+
+
+def test_annotate_cli_disabled(tmp_path):
+    enhanced = tmp_path / "2025-06-02_AI_enhanced_English.jsonl"
+    write_jsonl(enhanced, PAPERS)
+    config = tmp_path / "topics.yaml"
+    config.write_text("ai_analysis:\n  enable_keyword_scoring: false\n")
+
+    assert main(['--data-dir', str(tmp_path), '--config', str(config), 'annotate', '--data', str(enhanced)]) == 0
+    assert read_jsonl(enhanced) == PAPERS
+    assert not (tmp_path / "background_df.json").exists()
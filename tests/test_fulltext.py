@@ -0,0 +1,305 @@
+"""
+全文擷取階段測試
+以標準函式庫的 http.server 提供測試用 PDF，驗證並行上限、每主機限速、Retry-After、快取與失敗時退回摘要
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import pytest
+
+from processor.fulltext import FullTextExtractor, PdfCache
+
+SECTIONS = [
+    ("1 Introduction", "Large models are expensive to run on long documents. " * 20),
+    ("2 Method", "Our method routes each chunk to a small expert network. " * 60),
+    ("3 Experiments", "Accuracy improves by ten points on every benchmark we tried. " * 40),
+    ("4 Conclusion", "Routing chunks is cheap and it works."),
+    ("References", "[1] Someone. A paper that should never reach the model."),
+]
+
+
+def make_pdf(sections=SECTIONS, lines_per_page: int = 50, width: int = 90) -> bytes:
+    """產生只含 Helvetica 文字的最小 PDF（每個章節標題獨立一行，內文依寬度換行）"""
+    lines: List[str] = []
+    for heading, body in sections:
+        lines += ["", heading]
+        words, line = body.split(), ""
+        for word in words:
+            if line and len(line) + len(word) + 1 > width:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}" if line else word
+        lines.append(line)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        escaped = (line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in page)
+        stream = ("BT /F1 10 Tf 12 TL 40 780 Td\n" + "".join(f"({line}) Tj T*\n" for line in escaped) + "ET")
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def unique_pdf(tag: str) -> bytes:
+    """內容不同（雜湊不同）的測試 PDF"""
+    return make_pdf(SECTIONS + [(f"Appendix {tag}", tag)])
+
+
+class PdfServer:
+    """記錄每個請求（路徑、主機、時間）與最大同時連線數的測試伺服器"""
+
+    def __init__(self):
+        self.routes: Dict[str, List[Dict]] = {}
+        self.requests: List[Dict] = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                    server.requests.append({'path': self.path, 'host': self.headers.get('Host', '').split(':')[0],
+                                            'time': time.monotonic()})
+                    responses = server.routes.get(self.path) or [{'status': 404}]
+                    response = responses.pop(0) if len(responses) > 1 else responses[0]
+                try:
+                    time.sleep(response.get('delay', 0.0))
+                    body = response.get('body', b'')
+                    self.send_response(response.get('status', 200))
+                    for name, value in response.get('headers', {}).items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def route(self, path: str, *responses: Dict):
+        """設定路徑的回應；有多個回應時依序使用，最後一個之後重複使用"""
+        self.routes[path] = list(responses)
+
+    def url(self, path: str, host: str = '127.0.0.1') -> str:
+        return f"http://{host}:{self.httpd.server_port}{path}"
+
+    def hits(self, path: Optional[str] = None) -> List[Dict]:
+        with self.lock:
+            return [r for r in self.requests if path is None or r['path'] == path]
+
+
+@pytest.fixture
+def server():
+    srv = PdfServer()
+    srv.thread.start()
+    yield srv
+    srv.httpd.shutdown()
+    srv.httpd.server_close()
+
+
+@pytest.fixture
+def make_extractor(tmp_path):
+    extractors = []
+
+    def make(**kwargs) -> FullTextExtractor:
+        kwargs.setdefault('per_host_interval', 0.0)
+        kwargs.setdefault('extract_workers', 1)
+        kwargs.setdefault('timeout', 5.0)
+        extractor = FullTextExtractor(tmp_path / "fulltext", **kwargs)
+        extractors.append(extractor)
+        return extractor
+
+    yield make
+    for extractor in extractors:
+        extractor.cache.close()
+
+
+def run_attach(extractor: FullTextExtractor, papers: List[Dict]) -> Dict[int, Dict]:
+    return dict(extractor.attach(enumerate(papers)))
+
+
+def test_attach_bounds_in_flight_papers_and_connections(server, make_extractor):
+    for i in range(8):
+        server.route(f"/pdf/{i}", {'body': unique_pdf(str(i)), 'delay': 0.15})
+    extractor = make_extractor(fetch_workers=2)
+    pulled = []
+
+    def source():
+        for i in range(8):
+            pulled.append(i)
+            yield i, {'id': str(i), 'pdf_url': server.url(f"/pdf/{i}")}
+
+    seen = []
+    for seq, paper in extractor.attach(source()):
+        seen.append(seq)
+        # 上游不會被整批讀完：同時處理的論文數不超過 fetch_workers 的兩倍
+        assert len(pulled) - len(seen) < 2 * extractor.fetch_workers
+    assert sorted(seen) == list(range(8))
+    assert server.max_active == 2
+    assert len(server.hits()) == 8
+
+
+def test_requests_to_one_host_are_spaced_by_interval(server, make_extractor):
+    for i in range(5):
+        server.route(f"/pdf/{i}", {'body': unique_pdf(str(i))})
+    server.route("/other", {'body': unique_pdf("other")})
+    extractor = make_extractor(per_host_interval=0.2)
+
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(extractor.fetch, [server.url(f"/pdf/{i}") for i in range(5)]
+                      + [server.url("/other", host='localhost')]))
+
+    times = sorted(r['time'] for r in server.hits() if r['host'] == '127.0.0.1')
+    assert len(times) == 5
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.19
+    # 另一個主機不受這個主機的排程影響
+    other = server.hits("/other")[0]['time']
+    assert other - times[0] < 0.2 * 4
+
+
+def test_retry_after_defers_the_next_request(server, make_extractor):
+    server.route("/busy", {'status': 429, 'headers': {'Retry-After': '1'}}, {'body': unique_pdf("busy")})
+    extractor = make_extractor(max_retries=3)
+
+    digest = extractor.fetch(server.url("/busy"))
+
+    first, second = [r['time'] for r in server.hits("/busy")]
+    assert second - first >= 0.95
+    assert extractor.cache.lookup(server.url("/busy")) == digest
+    assert extractor.stats['fetched'] == 1
+
+
+def test_persistent_429_falls_back_to_abstract(server, make_extractor):
+    server.route("/busy", {'status': 429, 'headers': {'Retry-After': '0'}})
+    extractor = make_extractor(max_retries=2)
+    paper = {'id': 'busy', 'summary': 'abstract', 'pdf_url': server.url("/busy")}
+
+    results = run_attach(extractor, [paper])
+
+    assert results[0] == paper
+    assert len(server.hits("/busy")) == 2
+    assert extractor.stats['failed'] == 1
+
+
+def test_cached_pdf_is_not_downloaded_again(server, make_extractor):
+    server.route("/pdf/a", {'body': unique_pdf("a")})
+    server.route("/mirror/a", {'body': unique_pdf("a")})
+    extractor = make_extractor()
+
+    digest = extractor.fetch(server.url("/pdf/a"))
+    assert extractor.fetch(server.url("/pdf/a")) == digest
+    # 重新啟動後仍由磁碟快取取得
+    assert make_extractor().fetch(server.url("/pdf/a")) == digest
+    assert len(server.hits("/pdf/a")) == 1
+    assert extractor.stats == {'fetched': 1, 'cached': 1, 'extracted': 0, 'failed': 0}
+
+    # 不同網址、相同內容只存一份
+    assert extractor.fetch(server.url("/mirror/a")) == digest
+    assert extractor.cache.conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0] == 1
+
+
+def test_least_recently_used_pdf_is_evicted_under_max_bytes(server, make_extractor):
+    blobs = {name: unique_pdf(name) for name in "abc"}
+    for name, blob in blobs.items():
+        server.route(f"/pdf/{name}", {'body': blob})
+    size = max(len(blob) for blob in blobs.values())
+    extractor = make_extractor(max_cache_bytes=int(size * 2.5))
+    url = {name: server.url(f"/pdf/{name}") for name in blobs}
+
+    digest_a = extractor.fetch(url['a'])
+    digest_b = extractor.fetch(url['b'])
+    extractor.fetch(url['a'])   # 快取命中，a 變成最近使用
+    extractor.fetch(url['c'])   # 超過上限，淘汰最久未使用的 b
+
+    assert extractor.cache.total_bytes() <= extractor.cache.max_bytes
+    assert extractor.cache.lookup(url['b']) is None
+    assert not extractor.cache.pdf_path(digest_b).exists()
+    assert extractor.cache.lookup(url['a']) == digest_a
+    extractor.fetch(url['b'])
+    assert len(server.hits("/pdf/b")) == 2
+    assert len(server.hits("/pdf/a")) == 1
+
+
+def test_failed_download_or_parse_falls_back_to_abstract(server, make_extractor):
+    server.route("/html", {'body': b"<html>not a pdf</html>"})
+    server.route("/broken", {'body': b"%PDF-1.4\nthis is not a parsable document"})
+    server.route("/down", {'status': 500})
+    extractor = make_extractor(max_retries=1)
+    papers = [
+        {'id': 'missing', 'summary': 'a', 'pdf_url': server.url("/missing")},
+        {'id': 'html', 'summary': 'b', 'pdf_url': server.url("/html")},
+        {'id': 'broken', 'summary': 'c', 'pdf_url': server.url("/broken")},
+        {'id': 'down', 'summary': 'd', 'pdf_url': server.url("/down")},
+    ]
+
+    results = run_attach(extractor, papers)
+
+    assert [results[i] for i in range(len(papers))] == papers
+    assert extractor.stats['failed'] == 4
+
+
+def test_sections_are_chunked_within_budget_and_cached(server, make_extractor):
+    pytest.importorskip("pypdf")
+    server.route("/pdf/full", {'body': make_pdf()})
+    paper = {'id': 'full', 'summary': 'abstract', 'pdf_url': server.url("/pdf/full")}
+
+    extractor = make_extractor(token_budget=600, chunk_tokens=200)
+    chunks = run_attach(extractor, [paper])[0]['fulltext']
+
+    assert extractor.stats['extracted'] == 1
+    assert sum(chunk['tokens'] for chunk in chunks) <= 600
+    titles = {chunk['section'] for chunk in chunks}
+    assert {'Method', 'Experiments', 'Conclusion'} <= titles
+    assert not any('should never reach' in chunk['text'] for chunk in chunks)
+
+    # 第二次執行：PDF 與章節都由快取取得，不再下載或解析
+    again = make_extractor(token_budget=600, chunk_tokens=200)
+    assert run_attach(again, [paper])[0]['fulltext'] == chunks
+    assert again.stats == {'fetched': 0, 'cached': 1, 'extracted': 0, 'failed': 0}
+    assert len(server.hits("/pdf/full")) == 1
+
+
+def test_pdf_cache_evicts_oldest_entries_first(tmp_path):
+    cache = PdfCache(tmp_path / "cache", max_bytes=2500)
+    try:
+        digests = {name: cache.put(f"http://h/{name}", (b"%PDF" + name.encode()) * 250) for name in "ab"}
+        cache.lookup("http://h/a")
+        cache.put("http://h/c", b"%PDFc" * 200)
+
+        assert cache.total_bytes() <= 2500
+        assert cache.lookup("http://h/b") is None
+        assert not cache.pdf_path(digests['b']).exists()
+        assert cache.lookup("http://h/a") == digests['a']
+    finally:
+        cache.close()
@@ -0,0 +1,164 @@
+"""
+流程階段指標的獨佔時間與退步比較測試
+"""
+
+import json
+
+import pytest
+
+from utils import metrics as metrics_module
+from utils.metrics import PipelineMetrics, compare, main, write_run_metrics
+
+
+class FakeClock:
+    """取代 time 模組的假時鐘：牆鐘與 CPU 時間只在 advance 時前進"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def thread_time(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return 1_750_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics_module, "time", clock)
+    return clock
+
+
+def stage(summary, name):
+    return summary['stages'][name]
+
+
+def test_nested_measure_subtracts_children(clock):
+    metrics = PipelineMetrics()
+    with metrics.measure('render', items_in=3):
+        clock.advance(1.0)
+        with metrics.measure('enhance', items_out=3):
+            clock.advance(2.0)
+            with metrics.measure(None):  # 等待佇列：只從外層扣除
+                clock.advance(4.0)
+            clock.advance(0.5)
+        clock.advance(0.25)
+
+    summary = metrics.summary()
+    assert list(summary['stages']) == ['enhance', 'render']
+    assert stage(summary, 'enhance')['wall_seconds'] == pytest.approx(2.5)
+    assert stage(summary, 'enhance')['cpu_seconds'] == pytest.approx(2.5)
+    assert stage(summary, 'render')['wall_seconds'] == pytest.approx(1.25)
+    assert (stage(summary, 'render')['items_in'], stage(summary, 'enhance')['items_out']) == (3, 3)
+
+
+def test_measure_records_error_and_reraises(clock):
+    metrics = PipelineMetrics()
+    with pytest.raises(ValueError):
+        with metrics.measure('parse'):
+            clock.advance(1.0)
+            raise ValueError("bad entry")
+    with metrics.measure('parse'):
+        clock.advance(1.0)
+
+    parse = stage(metrics.summary(), 'parse')
+    assert parse['errors'] == 1
+    assert parse['wall_seconds'] == pytest.approx(2.0)
+
+
+def test_timed_iter_chain_is_exclusive(clock):
+    metrics = PipelineMetrics()
+
+    def crawl():
+        for i in range(4):
+            clock.advance(1.0)
+            yield i
+
+    def parse(items):
+        for item in items:
+            clock.advance(0.25)
+            yield item * 10
+
+    start = clock.now
+    with metrics.measure('render'):
+        results = []
+        for item in metrics.timed_iter('parse', parse(metrics.timed_iter('crawl', crawl()))):
+            clock.advance(0.1)
+            results.append(item)
+    total = clock.now - start
+
+    summary = metrics.summary()
+    assert results == [0, 10, 20, 30]
+    assert stage(summary, 'crawl')['wall_seconds'] == pytest.approx(4.0)
+    assert stage(summary, 'parse')['wall_seconds'] == pytest.approx(1.0)
+    assert stage(summary, 'render')['wall_seconds'] == pytest.approx(0.4)
+    assert sum(s['wall_seconds'] for s in summary['stages'].values()) == pytest.approx(total)
+    assert (stage(summary, 'crawl')['items_out'], stage(summary, 'parse')['items_out']) == (4, 4)
+
+
+def test_timed_iter_counts_error(clock):
+    metrics = PipelineMetrics()
+
+    def failing():
+        clock.advance(1.0)
+        yield 1
+        clock.advance(1.0)
+        raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        list(metrics.timed_iter('crawl', failing()))
+
+    crawl = stage(metrics.summary(), 'crawl')
+    assert (crawl['items_out'], crawl['errors']) == (1, 1)
+    assert crawl['wall_seconds'] == pytest.approx(2.0)
+
+
+def run_summary(**stages):
+    return {'stages': {
+        name: {'wall_seconds': wall, 'cpu_seconds': wall, 'peak_rss_bytes': rss, 'items_in': items, 'items_out': items}
+        for name, (wall, rss, items) in stages.items()
+    }}
+
+
+def test_compare_flags_regressions():
+    mib = 1024 * 1024
+    previous = run_summary(enhance=(10.0, 200 * mib, 50), render=(1.0, 200 * mib, 50), parse=(0.01, 100 * mib, 50))
+    current = run_summary(
+        enhance=(40.0, 210 * mib, 100),   # 每篇 0.2 → 0.4 秒：退步
+        render=(2.0, 420 * mib, 100),     # 每篇時間不變，峰值 RSS 2.1 倍：退步
+        parse=(0.04, 100 * mib, 50),      # 4 倍但絕對差低於下限：不算退步
+        crawl=(5.0, 100 * mib, 1),        # 上一次沒有的階段：略過
+    )
+
+    flagged = {(r['stage'], r['metric']): r for r in compare(current, previous, threshold=0.5)}
+    assert set(flagged) == {('enhance', 'wall_seconds'), ('enhance', 'cpu_seconds'), ('render', 'peak_rss_bytes')}
+    assert flagged['enhance', 'wall_seconds']['ratio'] == pytest.approx(2.0)
+    assert flagged['enhance', 'wall_seconds']['previous'] == pytest.approx(0.2)
+    assert compare(current, previous, threshold=1.5) == []
+
+
+def test_write_run_metrics_reports_fake_regression(clock, tmp_path, capsys):
+    for seconds in (1.0, 3.0):
+        metrics = PipelineMetrics()
+        with metrics.measure('render', items_in=10):
+            clock.advance(seconds)
+        summary = write_run_metrics(metrics, tmp_path, date='2025-06-01')
+
+    assert [(r['stage'], r['metric']) for r in summary['regressions']] == [
+        ('render', 'wall_seconds'), ('render', 'cpu_seconds')
+    ]
+    prom = (tmp_path / "pipeline.prom").read_text()
+    assert 'daily_arxiv_stage_regression{stage="render",metric="wall_seconds"} 1' in prom
+    assert 'daily_arxiv_stage_regression{stage="render",metric="peak_rss_bytes"} 0' in prom
+
+    previous = tmp_path / "previous.json"
+    previous.write_text(json.dumps(run_summary(render=(1.0, None, 10))))
+    assert main(['compare', str(previous), str(tmp_path / "last_run.json")]) == 1
+    assert main(['compare', str(previous), str(previous)]) == 0
@@ -0,0 +1,54 @@
+"""
+RelevancePrefilter 歷史資料訓練測試
+"""
+
+import json
+
+import pytest
+
+from processor.prefilter import RelevancePrefilter, main
+
+
+def write_enhanced(data_dir, date, ids):
+    with open(data_dir / f'{date}_AI_enhanced_English.jsonl', 'w', encoding='utf-8') as f:
+        for arxiv_id in ids:
+            f.write(json.dumps({'id': arxiv_id, 'title': f'Graph neural network {arxiv_id}',
+                                'summary': 'message passing on molecules'}) + "\n")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_enhanced(tmp_path, '2025-05-01', ['2505.00001', '2505.00002'])
+    write_enhanced(tmp_path, '2025-05-02', ['2505.00003'])
+    return tmp_path
+
+
+def test_bootstrap_refuses_second_run(data_dir):
+    model_dir = data_dir / 'prefilter'
+    assert RelevancePrefilter(model_dir).bootstrap(data_dir) == 3
+
+    model = RelevancePrefilter(model_dir)
+    assert model.bootstrapped
+    assert model.dates == ['2025-05-01', '2025-05-02']
+    with pytest.raises(ValueError):
+        model.bootstrap(data_dir)
+    assert RelevancePrefilter(model_dir).n_positive == 3
+
+
+def test_bootstrap_force_skips_trained_dates(data_dir):
+    model_dir = data_dir / 'prefilter'
+    model = RelevancePrefilter(model_dir)
+    model.update_day('2025-05-01', [{'id': '2505.00001', 'title': 'a'}], [{'id': '2505.09999', 'title': 'b'}])
+
+    assert model.bootstrap(data_dir) == 1
+    write_enhanced(data_dir, '2025-05-03', ['2505.00004', '2505.00005'])
+    assert RelevancePrefilter(model_dir).bootstrap(data_dir, force=True) == 2
+    assert RelevancePrefilter(model_dir).n_positive == 4
+
+
+def test_cli_requires_force(data_dir, capsys):
+    args = ['bootstrap', '--model-dir', str(data_dir / 'prefilter'), '--data-dir', str(data_dir)]
+    assert main(args) == 0
+    assert main(args) == 1
+    assert '--force' in capsys.readouterr().err
+    assert main(args + ['--force']) == 0
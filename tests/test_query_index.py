@@ -0,0 +1,63 @@
+"""
+PaperIndex 查詢結果快取測試
+"""
+
+import pytest
+
+from processor.query_index import PaperIndex
+
+
+def paper(arxiv_id, title, summary='', categories=('cs.CL',), authors=('Jane Doe',)):
+    return {
+        'id': arxiv_id,
+        'title': title,
+        'summary': summary,
+        'categories': list(categories),
+        'authors': list(authors),
+        'published': '2025-06-10T00:00:00Z',
+        'pdf_url': f'https://arxiv.org/pdf/{arxiv_id}',
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    with PaperIndex(tmp_path / "query_index.sqlite") as index:
+        index.add_day('2025-06-10', [
+            paper('2506.00001', 'Diffusion models for text', 'We study diffusion.'),
+            paper('2506.00002', 'Graph neural networks', 'Message passing.', categories=('cs.LG',)),
+        ])
+        yield index
+
+
+def test_repeated_query_hits_cache(index):
+    first = index.query(keyword='diffusion')
+    assert index.cache_hits == 0
+    assert index.query(keyword='diffusion') == first
+    assert index.query(keyword='diffusion') == first
+    assert index.cache_hits == 2
+    assert first['total'] == 1
+    assert [r['id'] for r in first['results']] == ['2506.00001']
+
+    # 條件不同時不共用快取
+    index.query(keyword='diffusion', page_size=5)
+    assert index.cache_hits == 2
+
+
+def test_add_day_clears_cache(index):
+    assert index.query(categories=['cs.CL'])['total'] == 1
+    index.query(categories=['cs.CL'])
+    assert index.cache_hits == 1
+
+    index.add_day('2025-06-11', [paper('2506.00003', 'Speech recognition', 'Audio.')])
+    result = index.query(categories=['cs.CL'])
+    assert index.cache_hits == 1
+    assert result['total'] == 2
+    assert [r['id'] for r in result['results']] == ['2506.00003', '2506.00001']
+
+
+def test_cache_disabled(tmp_path):
+    with PaperIndex(tmp_path / "query_index.sqlite", cache_size=0) as index:
+        index.add_day('2025-06-10', [paper('2506.00001', 'Diffusion models')])
+        index.query(keyword='diffusion')
+        index.query(keyword='diffusion')
+        assert index.cache_hits == 0
@@ -0,0 +1,73 @@
+"""
+BM25Ranker 詞頻矩陣與效能預算測試
+"""
+
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from processor.feature_extractor import tokenize
+from processor.relevance import BM25Ranker, query_terms
+
+BENCHMARKS_DIR = Path(__file__).parent.parent / "benchmarks"
+
+PIECES = [
+    "graph", "neural", "network", "networks", "diffusion", "model", "the", "of", "a", "an", "is",
+    "3d", "gpt-4", "x-ray", "self-", "-based", "2024", "12", "ai", "llm", "naïve", "Über",
+    "Transformer", "ATTENTION", "state-of-the-art", "e.g.", "(ours)", "α-stable", "\0", "\n", "--",
+]
+
+
+def random_text(rng: random.Random) -> str:
+    return rng.choice(["", " ", "\t"]).join(
+        rng.choice(PIECES) + rng.choice([" ", ", ", ". ", "-", "/", ""]) for _ in range(rng.randint(0, 40))
+    )
+
+
+def test_term_matrix_matches_tokenize():
+    rng = random.Random(0)
+    texts = [random_text(rng) for _ in range(300)] + ["", "the of a", "graph\0neural network"]
+    expected = [Counter(tokenize(text)) for text in texts]
+    terms = sorted(set().union(*expected)) + ["missing", "graph missing"]
+    vocab = {term: i for i, term in enumerate(terms)}
+
+    counts, lengths = BM25Ranker().term_matrix(texts, vocab)
+
+    dense = counts.toarray()
+    for i, counter in enumerate(expected):
+        assert lengths[i] == sum(counter.values())
+        assert {terms[j]: dense[i, j] for j in np.flatnonzero(dense[i])} == counter
+    assert counts.has_canonical_format
+
+
+def test_scores_prefer_matching_bigram():
+    papers = [
+        {'id': '1', 'title': 'Graph neural networks', 'summary': 'Graph neural message passing.'},
+        {'id': '2', 'title': 'Neural graph', 'summary': 'A graph of neural activity.'},
+        {'id': '3', 'title': 'Protein folding', 'summary': 'Structure prediction.'},
+    ]
+    assert query_terms(["graph neural", "protein"]) == ["graph neural", "protein"]
+
+    ranker = BM25Ranker(n_docs=100, doc_freq={'graph neural': 5}, total_tokens=1000)
+    scores = ranker.score(papers, ["graph neural"])
+
+    assert scores[0] > 0 and scores[1] == 0 and scores[2] == 0
+    assert ranker.rank(papers, scores)[0] == 0
+
+
+def test_bm25_rank_within_budget():
+    """一萬篇論文 × 一千個查詢詞彙的最佳耗時在預算內（與 benchmarks/run_benchmarks.py 相同的量測）"""
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    try:
+        import run_benchmarks
+    finally:
+        sys.path.remove(str(BENCHMARKS_DIR))
+
+    n = 10_000
+    fn, items = run_benchmarks.bench_bm25_rank(n, Path())
+    best = min(run_benchmarks.time_benchmark(fn, 3))
+    budget = run_benchmarks.budget_seconds("bm25_rank", items)
+    assert best <= budget, f"bm25_rank {best * 1000:.0f} ms > 預算 {budget * 1000:.0f} ms"
@@ -0,0 +1,140 @@
+"""
+模型分層路由測試（離線假後端，AI_BACKEND=fake）
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ai.fake_backend import FakeBackend
+from ai.gemini_enhancer import AI_FIELDS, GeminiEnhancer
+from ai.router import ModelRouter, RoutingExhausted
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TIERS = ['cheap', 'mid', 'strong']
+SHORT = "We propose a simple method. It works well. Results improve. We conclude."
+LONG = "We study a hard problem. " * 80
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    monkeypatch.setenv('AI_BACKEND', 'fake')
+    monkeypatch.setenv('MODEL_TIERS', ','.join(TIERS))
+    monkeypatch.delenv('FAKE_FAIL_MODELS', raising=False)
+    monkeypatch.delenv('FAKE_LATENCY', raising=False)
+    monkeypatch.delenv('ROUTING_SHORT_ABSTRACT_CHARS', raising=False)
+    return monkeypatch
+
+
+def test_short_abstract_starts_at_cheapest_tier(fake_env):
+    enhancer = GeminiEnhancer()
+    assert isinstance(enhancer.backend, FakeBackend)
+    assert enhancer.router.tiers == TIERS
+
+    enhanced = enhancer.enhance_paper({'id': '2506.00001', 'summary': SHORT})
+    assert enhanced['AI']['tldr'] == "We propose a simple method."
+    [decision] = enhancer.router.decisions
+    assert decision['initial_model'] == 'cheap'
+    assert decision['final_model'] == 'cheap'
+    assert decision['escalations'] == 0
+    assert enhancer.router.tier_stats['cheap']['calls'] == 1
+    assert enhancer.router.tier_stats['mid']['calls'] == 0
+
+
+def test_long_abstract_skips_cheapest_tier(fake_env):
+    enhancer = GeminiEnhancer()
+    enhancer.enhance_paper({'id': '2506.00002', 'summary': LONG})
+    assert enhancer.router.decisions[0]['initial_model'] == 'mid'
+
+
+def test_exception_escalates_to_next_tier(fake_env):
+    fake_env.setenv('FAKE_FAIL_MODELS', 'cheap')
+    enhancer = GeminiEnhancer()
+    enhanced = enhancer.enhance_paper({'id': '2506.00003', 'summary': SHORT})
+
+    assert enhanced['AI']['tldr'] != "Error"
+    [decision] = enhancer.router.decisions
+    assert decision['final_model'] == 'mid'
+    assert decision['escalations'] == 1
+    assert [a['ok'] for a in decision['attempts']] == [False, True]
+    assert decision['attempts'][0]['error'].startswith('ValueError')
+    summary = enhancer.router.summary()
+    assert summary['escalated'] == 1
+    assert (summary['tiers']['cheap']['calls'], summary['tiers']['cheap']['failures']) == (1, 1)
+    assert summary['tiers']['mid']['failures'] == 0
+
+
+def test_validation_failure_escalates():
+    router = ModelRouter(TIERS)
+    backend = FakeBackend()
+
+    def invoke(model):
+        result = backend.structured(model, SHORT)
+        # 便宜與中階模型的輸出缺少結論
+        return result if model == 'strong' else {**result, 'conclusion': ''}
+
+    result = router.route('2506.00004', SHORT, invoke, validate=lambda r: all(r[f] for f in AI_FIELDS))
+    assert result['conclusion'] == "We conclude."
+    [decision] = router.decisions
+    assert [a['model'] for a in decision['attempts']] == TIERS
+    assert [a['error'] for a in decision['attempts']] == ["validation failed", "validation failed", None]
+    assert router.tier_stats['mid']['failures'] == 1
+
+
+def test_exhausting_all_tiers_raises():
+    router = ModelRouter(TIERS, escalate_on=(ValueError,))
+    backend = FakeBackend(fail_models=TIERS)
+
+    with pytest.raises(RoutingExhausted) as info:
+        router.route('2506.00005', SHORT, lambda model: backend.structured(model, SHORT))
+    assert info.value.paper_id == '2506.00005'
+    assert isinstance(info.value.last_error, ValueError)
+    [decision] = router.decisions
+    assert decision['ok'] is False
+    assert decision['escalations'] == 2
+    assert router.summary()['failed'] == 1
+    assert all(router.tier_stats[m]['failures'] == 1 for m in TIERS)
+
+
+def test_exhausted_paper_gets_error_fields(fake_env):
+    fake_env.setenv('FAKE_FAIL_MODELS', ','.join(TIERS))
+    enhanced = GeminiEnhancer().enhance_paper({'id': '2506.00006', 'summary': SHORT})
+    assert enhanced['AI'] == {field: "Error" for field in AI_FIELDS}
+
+
+def test_unlisted_exception_is_not_escalated():
+    router = ModelRouter(TIERS, escalate_on=(ValueError,))
+    backend = FakeBackend(fail_models=['cheap'], error_cls=RuntimeError)
+
+    with pytest.raises(RuntimeError):
+        router.route('2506.00007', SHORT, lambda model: backend.structured(model, SHORT))
+    assert router.tier_stats['mid']['calls'] == 0
+
+
+def test_enhance_script_writes_routing_log(tmp_path):
+    pytest.importorskip('langchain_core')
+    pytest.importorskip('dotenv')
+    data = tmp_path / "2025-06-10.jsonl"
+    papers = [{'id': '2506.00001', 'summary': SHORT}, {'id': '2506.00002', 'summary': LONG}]
+    data.write_text("".join(json.dumps(p) + "\n" for p in papers), encoding='utf-8')
+    env = {**os.environ, 'AI_BACKEND': 'fake', 'MODEL_TIERS': 'cheap,strong',
+           'FAKE_FAIL_MODELS': 'cheap', 'LANGUAGE': 'English'}
+
+    subprocess.run([sys.executable, 'enhance.py', '--data', str(data)], cwd=PROJECT_ROOT / "ai",
+                   env=env, check=True, capture_output=True)
+
+    lines = [json.loads(line) for line in
+             (tmp_path / "2025-06-10_routing_English.jsonl").read_text(encoding='utf-8').splitlines()]
+    decisions, summary = lines[:-1], lines[-1]['summary']
+    assert [(d['id'], d['initial_model'], d['final_model']) for d in decisions] == [
+        ('2506.00001', 'cheap', 'strong'), ('2506.00002', 'strong', 'strong'),
+    ]
+    assert summary['papers'] == 2
+    assert summary['escalated'] == 1
+    assert summary['tiers']['cheap']['failures'] == 1
+    enhanced = (tmp_path / "2025-06-10_AI_enhanced_English.jsonl").read_text(encoding='utf-8').splitlines()
+    assert all(json.loads(line)['AI']['tldr'] != "Error" for line in enhanced)
@@ -0,0 +1,77 @@
+"""
+靜態搜尋索引測試（含中文 TL;DR）
+"""
+
+import json
+
+import pytest
+
+from generator.search_index import INDEX_VERSION, SearchIndex, SearchIndexBuilder, main, tokenize
+
+
+def paper(arxiv_id, title, tldr, keywords=()):
+    return {'id': arxiv_id, 'title': title, 'authors': ['Jane Doe'],
+            'AI': {'tldr': tldr, 'keywords': list(keywords)}}
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    builder = SearchIndexBuilder(tmp_path / "search")
+    builder.add_day('2025-06-10', [
+        paper('2506.00001', 'Diffusion Policies for Robots', '提出一種新的擴散模型，用於機器人控制。'),
+        paper('2506.00002', 'Sparse Attention', '以稀疏注意力降低長文本的計算成本。', ['attention']),
+    ])
+    builder.add_day('2025-06-11', [
+        paper('2506.00003', 'Graph Transformers', '圖神經網路結合擴散過程的分子生成模型。'),
+    ])
+    return tmp_path / "search"
+
+
+def test_tokenize_cjk_bigrams():
+    assert tokenize('擴散模型 for Diffusion') == ['擴散', '散模', '模型', 'diffusion']
+    assert tokenize('圖') == ['圖']
+
+
+def test_query_chinese_tldr(index_dir):
+    index = SearchIndex(index_dir)
+    assert [d['id'] for d in index.query('擴散模型')] == ['2506.00001']
+    # 「擴散」同時出現在兩篇的 TL;DR 中，較新的排在前面
+    assert [d['id'] for d in index.query('擴散')] == ['2506.00003', '2506.00001']
+    # 最後一個字以前綴比對（輸入中的即時搜尋）
+    assert [d['id'] for d in index.query('稀')] == ['2506.00002']
+    assert index.query('擴散', start='2025-06-11')[0]['id'] == '2506.00003'
+    assert index.query('量子') == []
+
+
+def test_query_mixed_language(index_dir):
+    index = SearchIndex(index_dir)
+    assert [d['id'] for d in index.query('attention 稀疏')] == ['2506.00002']
+
+
+def test_old_index_version_is_rebuilt(index_dir):
+    meta_path = index_dir / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    meta['version'] = INDEX_VERSION - 1
+    meta_path.write_text(json.dumps(meta), encoding='utf-8')
+
+    builder = SearchIndexBuilder(index_dir)
+    assert builder.indexed_dates() == []
+    assert not (index_dir / "2025-06").exists()
+
+
+def test_build_if_enabled_respects_config(tmp_path, capsys):
+    config = tmp_path / "topics.yaml"
+    config.write_text("history:\n  search_index: false\n", encoding='utf-8')
+    argv = ['--data-dir', str(tmp_path / "data"), '--index-dir', str(tmp_path / "search"),
+            'build', '--if-enabled', '--config', str(config)]
+    assert main(argv) == 0
+    assert not (tmp_path / "search").exists()
+
+    config.write_text("history:\n  search_index: true\n", encoding='utf-8')
+    (tmp_path / "data").mkdir()
+    record = paper('2506.00001', 'Diffusion Policies', '提出一種新的擴散模型。')
+    (tmp_path / "data" / "2025-06-10_AI_enhanced_English.jsonl").write_text(
+        json.dumps(record, ensure_ascii=False) + "\n", encoding='utf-8'
+    )
+    assert main(argv) == 0
+    assert [d['id'] for d in SearchIndex(tmp_path / "search").query('擴散')] == ['2506.00001']
@@ -0,0 +1,94 @@
+"""
+WorkQueue 去重、租約到期與回收測試
+"""
+
+import time
+
+import pytest
+
+from pipeline.work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue, run_worker
+from utils.jsonl_codec import iter_jsonl
+
+
+class EchoEnhancer:
+    """以論文 ID 填入 AI 欄位的離線增強器"""
+
+    def __init__(self):
+        self.calls = []
+
+    def enhance_paper(self, paper):
+        self.calls.append(paper['id'])
+        return {**paper, 'AI': {'tldr': f"tldr {paper['id']}"}}
+
+
+def paper(arxiv_id):
+    return {'id': arxiv_id, 'title': f'Paper {arxiv_id}'}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    with WorkQueue(tmp_path / "queue.sqlite", max_attempts=2) as queue:
+        yield queue
+
+
+def test_reenqueue_dedups_by_id_and_appends_new_papers(queue, tmp_path):
+    output = tmp_path / "out.jsonl"
+    assert queue.enqueue('day', [paper('A'), paper('B'), paper('A')], output) == 2
+    enhancer = EchoEnhancer()
+    run_worker(queue, enhancer, owner='w1', poll_interval=0.01)
+
+    # 重新放入時順序不同且多了一篇：只新增 C，已完成的 A、B 不重做
+    assert queue.enqueue('day', [paper('C'), paper('A'), paper('B')], output) == 1
+    assert queue.progress('day') == {PENDING: 1, LEASED: 0, DONE: 2, FAILED: 0}
+    run_worker(queue, enhancer, owner='w1', poll_interval=0.01)
+
+    assert enhancer.calls == ['A', 'B', 'C']
+    assert queue.merge('day') == 3
+    assert [(p['id'], p['AI']['tldr']) for p in iter_jsonl(output)] == [
+        ('A', 'tldr A'), ('B', 'tldr B'), ('C', 'tldr C')
+    ]
+    assert queue.batches()[0]['total'] == 3
+
+
+def test_expired_lease_is_reclaimed_then_fails_after_max_attempts(queue, tmp_path):
+    output = tmp_path / "out.jsonl"
+    queue.enqueue('day', [paper('A')], output)
+
+    [job] = queue.claim('w1', lease_seconds=60)
+    assert job['attempts'] == 1
+    # 租約未到期時其他工作行程領不到
+    assert queue.claim('w2', lease_seconds=60) == []
+    assert queue.reclaim(now=time.time() + 30) == {'requeued': 0, 'failed': 0}
+
+    assert queue.reclaim(now=time.time() + 61) == {'requeued': 1, 'failed': 0}
+    [job2] = queue.claim('w2', lease_seconds=60)
+    assert job2['attempts'] == 2
+
+    # 嘗試次數用完的到期租約標記為失敗，合併時各欄位為 "Error"
+    assert queue.reclaim(now=time.time() + 61) == {'requeued': 0, 'failed': 1}
+    assert queue.finished('day')
+    queue.merge('day')
+    [merged] = list(iter_jsonl(output))
+    assert merged['AI']['tldr'] == "Error"
+
+
+def test_expired_lease_claimed_directly_and_first_result_wins(queue, tmp_path):
+    queue.enqueue('day', [paper('A')], tmp_path / "out.jsonl")
+    [stale] = queue.claim('w1', lease_seconds=-1)
+
+    # 已到期的租約不需等待 reclaim 就能被領取
+    [job] = queue.claim('w2', lease_seconds=60)
+    assert job['attempts'] == 2
+    assert queue.complete(job, {**job['paper'], 'AI': {'tldr': 'w2'}})
+    # 原本的工作行程較晚送來的結果被丟棄
+    assert not queue.complete(stale, {**stale['paper'], 'AI': {'tldr': 'w1'}})
+    queue.merge('day')
+    assert [p['AI']['tldr'] for p in iter_jsonl(tmp_path / "out.jsonl")] == ['w2']
+
+
+def test_release_returns_lease_without_counting_attempt(queue, tmp_path):
+    queue.enqueue('day', [paper('A')], tmp_path / "out.jsonl")
+    queue.claim('w1', lease_seconds=60)
+    assert queue.release('w1') == 1
+    [job] = queue.claim('w2', lease_seconds=60)
+    assert job['attempts'] == 1
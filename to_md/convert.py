@@ -1,59 +1,123 @@
+import sys
 import json
 import argparse
 import os
 from itertools import count
+from pathlib import Path
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--data", type=str, help="Path to the jsonline file")
-    args = parser.parse_args()
-    data = []
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from utils.manifest import ReportManifest
+
+TEMPLATE_PATH = Path(__file__).parent / "paper_template.md"
+
+
+def load_preference():
     preference = os.environ.get('CATEGORIES', 'cs.AI,cs.LG,cs.CV,cs.CL').split(',')
-    preference = list(map(lambda x: x.strip(), preference))
+    return list(map(lambda x: x.strip(), preference))
+
+
+def group_by_category(lines):
+    """單次走訪 JSONL 行，依主要類別分組（保留原始順序）"""
+    groups = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        groups.setdefault(item["categories"][0], []).append(item)
+    return groups
+
+
+def format_features(ai):
+    """本地關鍵詞與技術難度（feature_extractor annotate 寫入；沒有時為空字串，版面不變）"""
+    features = ""
+    if ai.get('keywords'):
+        features += f"\n\nKeywords: {', '.join(ai['keywords'])}"
+    if ai.get('difficulty'):
+        features += f"\n\nDifficulty: {ai['difficulty']}"
+    return features
+
+
+def convert(lines, out, template=None, preference=None):
+    """
+    將 AI 增強後的 JSONL 轉成 Markdown，逐段寫入 out
+
+    Args:
+        lines: JSONL 行的可迭代物件（檔案、sys.stdin 或上游產生器）
+        out: 可寫入的文字串流
+        template: 單篇論文的範本，預設為 paper_template.md
+        preference: 類別排序偏好，預設讀取 CATEGORIES 環境變數
+
+    Returns:
+        {類別: 論文數量}，依輸出順序排列
+    """
+    if template is None:
+        template = TEMPLATE_PATH.read_text()
+    if preference is None:
+        preference = load_preference()
+
     def rank(cate):
         if cate in preference:
             return preference.index(cate)
         else:
             return len(preference)
 
-    with open(args.data, "r") as f:
-        for line in f:
-            data.append(json.loads(line))
-
-    categories = set([item["categories"][0] for item in data])
-    template = open("paper_template.md", "r").read()
-    categories = sorted(categories, key=rank)
-    cnt = {cate: 0 for cate in categories}
-    for item in data:
-        if item["categories"][0] not in cnt.keys():
-            continue
-        cnt[item["categories"][0]] += 1
+    groups = group_by_category(lines)
+    categories = sorted(set(groups), key=rank)
 
-    markdown = f"<div id=toc></div>\n\n# Table of Contents\n\n"
-    for idx, cate in enumerate(categories):
-        markdown += f"- [{cate}](#{cate}) [Total: {cnt[cate]}]\n"
+    out.write(f"<div id=toc></div>\n\n# Table of Contents\n\n")
+    for cate in categories:
+        out.write(f"- [{cate}](#{cate}) [Total: {len(groups[cate])}]\n")
 
     idx = count(1)
     for cate in categories:
-        markdown += f"\n\n<div id='{cate}'></div>\n\n"
-        markdown += f"# {cate} [[Back]](#toc)\n\n"
-        markdown += "\n\n".join(
-            [
-                template.format(
-                    title=item["title"],
-                    authors=",".join(item["authors"]),
-                    summary=item["summary"],
-                    url=item['abs'],
-                    tldr=item['AI']['tldr'],
-                    motivation=item['AI']['motivation'],
-                    method=item['AI']['method'],
-                    result=item['AI']['result'],
-                    conclusion=item['AI']['conclusion'],
-                    cate=item['categories'][0],
-                    idx=next(idx)
-                )
-                for item in data if item["categories"][0] == cate
-            ]
-        )
-    with open(args.data.split('_')[0] + '.md', "w") as f:
-        f.write(markdown)
+        out.write(f"\n\n<div id='{cate}'></div>\n\n")
+        out.write(f"# {cate} [[Back]](#toc)\n\n")
+        for n, item in enumerate(groups[cate]):
+            if n:
+                out.write("\n\n")
+            out.write(template.format(
+                title=item["title"],
+                authors=",".join(item["authors"]),
+                summary=item["summary"],
+                url=item['abs'],
+                tldr=item['AI']['tldr'],
+                motivation=item['AI']['motivation'],
+                method=item['AI']['method'],
+                result=item['AI']['result'],
+                conclusion=item['AI']['conclusion'],
+                features=format_features(item['AI']),
+                cate=item['categories'][0],
+                idx=next(idx)
+            ))
+    return {cate: len(groups[cate]) for cate in categories}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=str, help="Path to the jsonline file, or - for stdin")
+    parser.add_argument("--output", type=str, help="Path to the markdown file (default: derived from --data)")
+    args = parser.parse_args()
+
+    if args.data == "-" and not args.output:
+        parser.error("--output is required when reading from stdin")
+    output = args.output or args.data.split('_')[0] + '.md'
+
+    if args.data == "-":
+        with open(output, "w") as f:
+            counts = convert(sys.stdin, f)
+    else:
+        with open(args.data, "r") as data, open(output, "w") as f:
+            counts = convert(data, f)
+
+    # 記錄到報告清單，供 update_readme.py 與其他工具讀取
+    output_path = Path(output).resolve()
+    data_dir = output_path.parent
+    manifest = ReportManifest(data_dir / "manifest.jsonl")
+    if not manifest.exists():
+        manifest.rebuild(data_dir, path_prefix=data_dir.name)
+    manifest.append(
+        output_path.stem,
+        sum(counts.values()),
+        list(counts),
+        f"{data_dir.name}/{output_path.name}"
+    )
@@ -3,29 +3,34 @@
 Update README with latest reports
 """
 
-import os
+import sys
 from pathlib import Path
 import re
-from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from utils.manifest import ReportManifest
+
+MANIFEST_PATH = Path("data") / "manifest.jsonl"
+
 
 def update_readme():
-    """Update README with latest report links"""
+    """Update README with latest report links from the report manifest"""
     data_dir = Path("data")
     if not data_dir.exists():
         return
     
-    # Find all markdown files
-    md_files = sorted(list(data_dir.glob("*.md")), reverse=True)
+    manifest = ReportManifest(MANIFEST_PATH)
+    if not manifest.exists():
+        # One-time bootstrap from the existing reports
+        manifest.rebuild(data_dir)
     
-    if not md_files:
+    # Only the tail of the manifest is read
+    latest = manifest.latest(10)  # Latest 10 reports
+    if not latest:
         return
     
     # Generate report links
-    report_links = []
-    for md_file in md_files[:10]:  # Latest 10 reports
-        date_str = md_file.stem
-        link = f"- [{date_str}](data/{md_file.name})"
-        report_links.append(link)
+    report_links = [f"- [{record['date']}]({record['path']})" for record in latest]
     
     # Update README
     readme_path = Path("README.md")
@@ -40,7 +45,7 @@ def update_readme():
         
         if updated_content != content:
             readme_path.write_text(updated_content)
-            print(f"Updated README with {len(md_files)} reports")
+            print(f"Updated README with {manifest.last()['total_reports']} reports")
 
 if __name__ == "__main__":
-    update_readme()
\ No newline at end of file
+    update_readme()